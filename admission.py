@@ -0,0 +1,211 @@
+"""
+Controle de admissão das rotas de visão computacional (/verify, /register, streaming).
+
+Até ADMISSION_MAX_CONCURRENT requisições executam ao mesmo tempo; as seguintes
+esperam numa fila FIFO de até ADMISSION_QUEUE_SIZE lugares por no máximo
+ADMISSION_MAX_WAIT_SECONDS; a vaga liberada é entregue diretamente ao primeiro da
+fila (sem disputa com quem acabou de chegar). Fila cheia ou espera esgotada: 503 com Retry-After
+estimado a partir dos tempos de serviço recentes (média móvel exponencial).
+Rotas leves (/toxin, /user, /healthz...) não passam por aqui.
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from functools import wraps
+from typing import AsyncIterator, Callable, Deque, Dict, Iterator, Optional
+
+from deadline import remaining, DeadlineExceeded
+
+# ============================
+# CONFIGURAÇÕES
+# ============================
+
+# requisições de visão computacional executando ao mesmo tempo (0 = sem limite)
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", str(os.cpu_count() or 2)))
+
+# requisições aguardando vaga além das que estão executando
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", str(2 * (os.cpu_count() or 2))))
+
+# tempo máximo (s) de espera na fila antes do 503
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "5"))
+
+# peso da amostra mais recente na média móvel do tempo de serviço
+ADMISSION_EWMA_ALPHA = float(os.getenv("ADMISSION_EWMA_ALPHA", "0.2"))
+
+
+class AdmissionRejected(Exception):
+    """Servidor saturado; `retry_after` é a sugestão (s) para o cliente."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    """Lugar na fila: `granted` é marcado (sob o lock) por quem entrega a vaga."""
+
+    __slots__ = ("event", "granted")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class AdmissionController:
+    """Semáforo com fila de espera FIFO limitada e prazo."""
+
+    def __init__(self, max_concurrent: int = ADMISSION_MAX_CONCURRENT, queue_size: int = ADMISSION_QUEUE_SIZE,
+                 max_wait: float = ADMISSION_MAX_WAIT_SECONDS, alpha: float = ADMISSION_EWMA_ALPHA):
+        self.max_concurrent = max_concurrent
+        self.queue_size = max(0, queue_size)
+        self.max_wait = max_wait
+        self.alpha = alpha
+
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queue: Deque[_Waiter] = deque()
+        self._service_ewma = 1.0
+
+        # métricas
+        self._admitted = 0
+        self._rejected_queue_full = 0
+        self._rejected_timeout = 0
+        self._admitted_from_queue = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrent > 0
+
+    def retry_after(self) -> int:
+        """
+        Estimativa (s) até haver vaga: fila à frente dividida pelas vagas,
+        vezes o tempo de serviço médio recente.
+        """
+        with self._lock:
+            return self._retry_after_locked()
+
+    def _acquire(self) -> float:
+        start = time.monotonic()
+        with self._lock:
+            if self._active < self.max_concurrent and not self._queue:
+                self._active += 1
+                self._admitted += 1
+                return 0.0
+
+            if len(self._queue) >= self.queue_size:
+                self._rejected_queue_full += 1
+                raise AdmissionRejected("fila cheia", self._retry_after_locked())
+
+            # não espera além do prazo da própria requisição
+            request_left = remaining()
+            max_wait = self.max_wait if request_left is None else min(self.max_wait, request_left)
+            bounded_by_request = request_left is not None and request_left < self.max_wait
+
+            waiter = _Waiter()
+            self._queue.append(waiter)
+
+        waiter.event.wait(max(0.0, max_wait))
+
+        with self._lock:
+            # a vaga pode ter sido entregue entre o fim da espera e o lock: é nossa
+            if not waiter.granted:
+                self._queue.remove(waiter)
+                self._rejected_timeout += 1
+                if bounded_by_request:
+                    raise DeadlineExceeded("admission")
+                raise AdmissionRejected("tempo de espera esgotado", self._retry_after_locked())
+
+            self._admitted += 1
+            self._admitted_from_queue += 1
+            waited = time.monotonic() - start
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            return waited
+
+    def _retry_after_locked(self) -> int:
+        rounds = (len(self._queue) + 1) / max(1, self.max_concurrent)
+        return max(1, math.ceil(rounds * self._service_ewma))
+
+    def _release(self, service_time: Optional[float]) -> None:
+        """Devolve a vaga: passa direto ao primeiro da fila ou libera. None = sem amostra de serviço."""
+        with self._lock:
+            if service_time is not None:
+                self._service_ewma += self.alpha * (service_time - self._service_ewma)
+            if self._queue:
+                waiter = self._queue.popleft()
+                waiter.granted = True
+                waiter.event.set()
+            else:
+                self._active -= 1
+
+    @contextmanager
+    def slot(self) -> Iterator[float]:
+        """Ocupa uma vaga durante o bloco (retorna o tempo de espera na fila)."""
+        if not self.enabled:
+            yield 0.0
+            return
+
+        waited = self._acquire()
+        start = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self._release(time.monotonic() - start)
+
+    @asynccontextmanager
+    async def async_slot(self) -> AsyncIterator[float]:
+        """slot() para código asyncio: a espera na fila roda numa thread, fora do event loop."""
+        if not self.enabled:
+            yield 0.0
+            return
+
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self._acquire))
+        try:
+            waited = await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # cliente desconectou durante a espera: a vaga obtida depois é devolvida
+            acquiring.add_done_callback(lambda f: f.cancelled() or f.exception() or self._release(None))
+            raise
+        start = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self._release(time.monotonic() - start)
+
+    def limit(self, view: Callable) -> Callable:
+        """Decorator de rota Flask: a view só executa com uma vaga."""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            with self.slot():
+                return view(*args, **kwargs)
+        return wrapper
+
+    def stats(self) -> Dict:
+        with self._lock:
+            queued = self._admitted_from_queue
+            return {
+                "max_concurrent": self.max_concurrent,
+                "queue_size": self.queue_size,
+                "active": self._active,
+                "waiting": len(self._queue),
+                "admitted": self._admitted,
+                "rejected_queue_full": self._rejected_queue_full,
+                "rejected_timeout": self._rejected_timeout,
+                "avg_queue_wait_s": self._wait_total / queued if queued > 0 else 0.0,
+                "max_queue_wait_s": self._wait_max,
+                "service_time_ewma_s": self._service_ewma,
+            }
+
+
+ADMISSION = AdmissionController()
+
+
+def admission_stats() -> Dict:
+    return ADMISSION.stats()
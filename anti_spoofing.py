@@ -1,15 +1,20 @@
 import cv2
+import logging
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple
 import os
 import math
+import threading
+from dataclasses import dataclass, field
 
-try:
-    from ultralytics import YOLO
-    YOLO_AVAILABLE = True
-except ImportError:
-    YOLO_AVAILABLE = False
-    print("[Warning] YOLO não disponível. Instale com: pip install ultralytics")
+from liveness_backend import load_backend, detect_backend, LIVENESS_BACKEND, DEFAULT_MODEL_PATHS
+from inference_server import MicroBatcher
+from model_registry import ModelRegistry, MODEL_WATCH_INTERVAL
+from deadline import check_deadline, DeadlineExceeded
+from metrics import stage, LIVENESS_DECISIONS
+from utils import crop_face, coarse_to_fine_order
+
+logger = logging.getLogger(__name__)
 
 # ============================
 # CONFIGURAÇÕES
@@ -25,84 +30,256 @@ INVERT_CLASSES = os.getenv("YOLO_INVERT_CLASSES", "true").lower() == "true"
 
 FINAL_SCORE_THRESHOLD = float(os.getenv("FINAL_SCORE_THRESHOLD", "0.6"))
 
-YOLO_MODEL = None
+# máximo de frames por forward pass do classificador
+YOLO_BATCH_SIZE = max(1, int(os.getenv("YOLO_BATCH_SIZE", "8")))
+
+# resolução de entrada do classificador (0 = padrão do modelo)
+YOLO_IMGSZ = int(os.getenv("YOLO_IMGSZ", "0"))
+
+# juntar frames de requisições concorrentes em micro-batches (ver inference_server.py)
+LIVENESS_MICROBATCH = os.getenv("LIVENESS_MICROBATCH", "true").lower() == "true"
+
+# entrada do classificador: "frame" (cena inteira) ou "face_crop" (recorte do rosto,
+# requer modelo treinado em recortes: yolo_auto_train.py --crop)
+LIVENESS_INPUT = os.getenv("LIVENESS_INPUT", "frame").lower()
+
+# resolução de entrada do classificador no modo face_crop
+LIVENESS_CROP_IMGSZ = int(os.getenv("LIVENESS_CROP_IMGSZ", "128"))
+
+YOLO_AVAILABLE = True
 YOLO_MODEL_PATH = os.getenv("YOLO_MODEL_PATH", None)
 
 # descobrir modelo automaticamente
 if not YOLO_MODEL_PATH:
-    possible_paths = [
-        "best.pt",
-    ]
+    if LIVENESS_BACKEND in DEFAULT_MODEL_PATHS:
+        possible_paths = [DEFAULT_MODEL_PATHS[LIVENESS_BACKEND]]
+    else:
+        possible_paths = [
+            "best.pt",
+        ]
     for path in possible_paths:
         if os.path.exists(path):
             YOLO_MODEL_PATH = path
-            print(f"[YOLO] Modelo encontrado automaticamente: {path}")
+            logger.info("Modelo encontrado automaticamente: %s", path)
             break
 
-# carregar modelo
-if YOLO_AVAILABLE and YOLO_MODEL_PATH and os.path.exists(YOLO_MODEL_PATH):
+def _load_model(path: str):
+    """Carrega o modelo no backend configurado (torch, onnx ou openvino)."""
+    model_imgsz = LIVENESS_CROP_IMGSZ if LIVENESS_INPUT == "face_crop" else YOLO_IMGSZ
+    return load_backend(path, imgsz=model_imgsz)
+
+
+# modelo ativo: trocado a quente via /admin/model/reload ou MODEL_WATCH_INTERVAL
+MODEL_REGISTRY = ModelRegistry(_load_model)
+
+if YOLO_MODEL_PATH and os.path.exists(YOLO_MODEL_PATH):
     try:
-        YOLO_MODEL = YOLO(YOLO_MODEL_PATH)
-        print(f"[YOLO] Modelo carregado: {YOLO_MODEL_PATH}")
+        MODEL_REGISTRY.load(YOLO_MODEL_PATH, block=True)
+    except ImportError as e:
+        YOLO_AVAILABLE = False
+        logger.warning("Backend '%s' não disponível (%s). Instale ultralytics, onnxruntime ou openvino "
+                       "conforme LIVENESS_BACKEND", detect_backend(YOLO_MODEL_PATH), e)
     except Exception as e:
-        print(f"[YOLO] Erro ao carregar modelo: {e}")
-        YOLO_MODEL = None
-elif YOLO_AVAILABLE and YOLO_MODEL_PATH:
-    print(f"[YOLO] Modelo não encontrado em: {YOLO_MODEL_PATH}")
+        logger.error("Erro ao carregar modelo: %s", e)
+
+    if YOLO_AVAILABLE and MODEL_WATCH_INTERVAL > 0:
+        MODEL_REGISTRY.watch(YOLO_MODEL_PATH, MODEL_WATCH_INTERVAL)
+elif YOLO_MODEL_PATH:
+    logger.warning("Modelo não encontrado em: %s", YOLO_MODEL_PATH)
+
+
+def model_ready() -> bool:
+    return YOLO_AVAILABLE and MODEL_REGISTRY.has_model()
+
+
+def _predict_on(frames: List[np.ndarray], model) -> List[List[float]]:
+    """Forward pass no modelo emprestado pela verificação (chave do micro-batch)."""
+    return model.predict(frames)
 
 
 # ==========================================
 # CLASSIFICAÇÃO VIA YOLOv8-CLS (REAL/FAKE)
 # ==========================================
 
-def score_yolo(frames: List[np.ndarray]) -> float:
+def _real_prob(probs: List[float]) -> float:
+    """Extrai a probabilidade da classe REAL do vetor de probabilidades do modelo."""
+    fake_prob = probs[0]
+    real_prob = probs[1]
+
+    # inverter se necessário
+    if INVERT_CLASSES:
+        fake_prob, real_prob = real_prob, fake_prob
+
+    # manter apenas prob de real
+    return real_prob
+
+
+def _face_crops(frames: List[np.ndarray]) -> List[np.ndarray]:
+    """Recorta o rosto de cada frame; sem rosto detectado, usa o frame inteiro."""
+    crops = []
+    for frame in frames:
+        face = crop_face(frame)
+        crops.append(frame if face is None else face)
+    return crops
+
+
+def _classify_real_probs(frames: List[np.ndarray], model) -> List[float]:
+    """
+    Classifica os frames em batches de até YOLO_BATCH_SIZE (um forward pass por batch)
+    e retorna a probabilidade de REAL de cada frame, na mesma ordem.
+    `model` é o modelo emprestado (MODEL_REGISTRY) uma única vez por verificação:
+    todos os batches da verificação usam a mesma versão, mesmo durante uma troca.
+    """
+    if LIVENESS_INPUT == "face_crop":
+        with stage("face_crop"):
+            frames = _face_crops(frames)
+
+    def predict(batch):
+        if LIVENESS_MICROBATCH:
+            return LIVENESS_BATCHER.predict(batch, key=model)
+        return model.predict(batch)
+
+    real_probs = []
+    for start in range(0, len(frames), YOLO_BATCH_SIZE):
+        check_deadline("yolo")
+        batch = frames[start:start + YOLO_BATCH_SIZE]
+        with stage("yolo"):
+            outputs = predict(batch)
+        real_probs.extend(_real_prob(probs) for probs in outputs)
+
+    return real_probs
+
+
+# worker único dono do modelo, alimentado pelas requisições concorrentes
+LIVENESS_BATCHER = MicroBatcher(_predict_on, name="liveness-batcher")
+
+
+@dataclass
+class YoloScore:
+    """Resultado do YOLO-CLS para uma requisição: média e probabilidades de REAL por frame."""
+    score: float = 0.5
+    real_scores: List[float] = field(default_factory=list)
+
+
+def score_yolo_detailed(frames: List[np.ndarray]) -> YoloScore:
     """
     Roda o YOLO-CLS em frames.
     Calcula score baseado na média da probabilidade de REAL.
+    Orçamento adaptativo: classifica LIVENESS_MIN_FRAMES frames espalhados no vídeo e
+    só pede mais (até LIVENESS_MAX_FRAMES) enquanto a média estiver na faixa ambígua.
+    Não guarda estado global: seguro para chamadas concorrentes.
     """
     
-    if not YOLO_AVAILABLE or YOLO_MODEL is None:
-        return 0.5
+    if not model_ready():
+        return YoloScore()
     
     if len(frames) < 1:
-        return 0.5
+        return YoloScore()
 
     try:
-        real_scores = []
-        sample_frames = frames[::max(1, len(frames)//5)]  # reduz processamento
-
-        for frame in sample_frames:
-
-            # --- classificação ---
-            results = YOLO_MODEL(frame, verbose=False)[0]
-            probs = results.probs.data.tolist()
+        ordered = [frames[i] for i in coarse_to_fine_order(len(frames))][:LIVENESS_MAX_FRAMES]
 
-            fake_prob = probs[0]
-            real_prob = probs[1]
+        with MODEL_REGISTRY.lease() as model:
+            real_scores = _classify_real_probs(ordered[:LIVENESS_MIN_FRAMES], model)
 
-            # inverter se necessário
-            if INVERT_CLASSES:
-                fake_prob, real_prob = real_prob, fake_prob
-
-            # manter apenas prob de real
-            real_scores.append(real_prob)
+            while is_ambiguous(real_scores) and 0 < len(real_scores) < len(ordered):
+                start = len(real_scores)
+                real_scores.extend(_classify_real_probs(ordered[start:start + LIVENESS_BUDGET_STEP], model))
 
         if len(real_scores) == 0:
-            return 0.5
+            return YoloScore()
 
         avg_real = float(np.mean(real_scores))
 
-        print(f"[YOLO] Probs Reais: {[round(s,3) for s in real_scores]}")
-        print(f"[YOLO] Score final YOLO (média real): {avg_real:.3f}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Probs reais: %s | média: %.3f", [round(s, 3) for s in real_scores], avg_real)
 
-        # salvar info para o process_anti_spoofing
-        score_yolo._last_detections = {"real_scores": real_scores}
+        return YoloScore(score=avg_real, real_scores=real_scores)
 
-        return avg_real
+    except DeadlineExceeded:
+        raise
 
     except Exception as e:
-        print(f"Erro em YOLO: {e}")
-        return 0.5
+        logger.exception("Erro em YOLO: %s", e)
+        return YoloScore()
+
+
+def score_yolo(frames: List[np.ndarray]) -> float:
+    """Score médio de REAL dos frames (ver score_yolo_detailed)."""
+    return score_yolo_detailed(frames).score
+
+
+# =============================================
+# PRÉ-FILTRO DE MOVIMENTO (SEM REDE NEURAL)
+# =============================================
+
+# descartar vídeos estáticos (foto impressa/tela parada) antes de rodar o modelo
+MOTION_FILTER = os.getenv("MOTION_FILTER", "true").lower() == "true"
+
+# largura das miniaturas em escala de cinza usadas na análise
+MOTION_WIDTH = int(os.getenv("MOTION_WIDTH", "64"))
+
+# frames mínimos antes do primeiro teste de movimento no modo incremental
+MOTION_MIN_FRAMES = max(2, int(os.getenv("MOTION_MIN_FRAMES", "3")))
+
+# score de movimento abaixo do qual o vídeo é considerado estático (spoof)
+MOTION_STATIC_THRESHOLD = float(os.getenv("MOTION_STATIC_THRESHOLD", "0.1"))
+
+# diferença média entre frames (níveis de cinza) e magnitude média do fluxo óptico
+# (pixels na miniatura) que correspondem a score de movimento 1.0
+MOTION_DIFF_REF = float(os.getenv("MOTION_DIFF_REF", "6.0"))
+MOTION_FLOW_REF = float(os.getenv("MOTION_FLOW_REF", "0.5"))
+
+
+def motion_thumbnail(frame: np.ndarray) -> np.ndarray:
+    """Miniatura em cinza (MOTION_WIDTH de largura) para o pré-filtro de movimento."""
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape[:2]
+    height = max(1, round(h * MOTION_WIDTH / w))
+    return cv2.resize(gray, (MOTION_WIDTH, height), interpolation=cv2.INTER_AREA)
+
+
+def motion_score(thumbnails: List[np.ndarray]) -> Optional[float]:
+    """
+    Score de movimento em [0, 1] a partir de miniaturas consecutivas (motion_thumbnail).
+    Combina diferença entre frames (sem o brilho médio, para ignorar auto-exposição)
+    e magnitude do fluxo óptico Farneback; usa o par com mais movimento, então só
+    vídeos estáticos do começo ao fim ficam próximos de 0.
+    Retorna None com menos de 2 frames ou com o filtro desativado.
+    """
+    if not MOTION_FILTER or len(thumbnails) < 2:
+        return None
+
+    with stage("motion"):
+        return _motion_score(thumbnails)
+
+
+def _motion_score(thumbnails: List[np.ndarray]) -> float:
+    shape = thumbnails[0].shape
+    thumbs = [t if t.shape == shape else cv2.resize(t, (shape[1], shape[0])) for t in thumbnails]
+
+    stack = np.stack(thumbs).astype(np.float32)
+    stack -= stack.mean(axis=(1, 2), keepdims=True)
+    diffs = np.abs(np.diff(stack, axis=0)).mean(axis=(1, 2))
+
+    flows = np.empty(len(thumbs) - 1, dtype=np.float32)
+    for i, (prev, curr) in enumerate(zip(thumbs, thumbs[1:])):
+        flow = cv2.calcOpticalFlowFarneback(prev, curr, None, 0.5, 2, 9, 2, 5, 1.1, 0)
+        flows[i] = np.hypot(flow[..., 0], flow[..., 1]).mean()
+
+    per_pair = np.maximum(diffs / MOTION_DIFF_REF, flows / MOTION_FLOW_REF)
+    return float(min(1.0, per_pair.max()))
+
+
+def score_motion(frames: List[np.ndarray]) -> Optional[float]:
+    """Score de movimento dos frames (ver motion_score)."""
+    if not MOTION_FILTER:
+        return None
+    return motion_score([motion_thumbnail(f) for f in frames])
+
+
+def is_static(motion: Optional[float]) -> bool:
+    return motion is not None and motion < MOTION_STATIC_THRESHOLD
 
 
 # ===================
@@ -110,12 +287,17 @@ def score_yolo(frames: List[np.ndarray]) -> float:
 # ===================
 
 REAL_THRESHOLD = 0.6
+SPOOF_THRESHOLD = 0.1
 
 def fuse_scores(scores: Dict[str, float], detections_info: Optional[Dict] = None) -> Tuple[float, Optional[str]]:
     yolo_score = scores.get("yolo", 0.5)
 
+    # vídeo estático: nenhuma variação entre frames
+    if is_static(scores.get("motion")):
+        return 0.0, "spoof_detected_static"
+
     # spoof claro
-    if yolo_score < 0.1:
+    if yolo_score < SPOOF_THRESHOLD:
         return 0.0, "spoof_detected_yolo_fake"
 
     # sem confiança suficiente
@@ -130,32 +312,315 @@ def fuse_scores(scores: Dict[str, float], detections_info: Optional[Dict] = None
     return 0.0, "low_confidence"
 
 
+# =============================================
+# ORÇAMENTO ADAPTATIVO DE FRAMES
+# =============================================
+
+# frames classificados antes da primeira decisão (orçamento mínimo)
+LIVENESS_MIN_FRAMES = max(1, int(os.getenv("LIVENESS_MIN_FRAMES", "3")))
+
+# máximo de frames amostrados/classificados por requisição (orçamento máximo)
+LIVENESS_MAX_FRAMES = max(LIVENESS_MIN_FRAMES, int(os.getenv("LIVENESS_MAX_FRAMES", "12")))
+
+# frames adicionais por rodada enquanto o score estiver ambíguo
+LIVENESS_BUDGET_STEP = max(1, int(os.getenv("LIVENESS_BUDGET_STEP", "2")))
+
+# faixa da média de REAL em que vale a pena ver mais frames
+AMBIGUOUS_LOW = float(os.getenv("LIVENESS_AMBIGUOUS_LOW", "0.45"))
+AMBIGUOUS_HIGH = float(os.getenv("LIVENESS_AMBIGUOUS_HIGH", str(REAL_THRESHOLD)))
+
+
+def is_ambiguous(real_scores: List[float]) -> bool:
+    """True enquanto a média de REAL ainda não decide (ou não há frames classificados)."""
+    if not real_scores:
+        return True
+    return AMBIGUOUS_LOW <= float(np.mean(real_scores)) < AMBIGUOUS_HIGH
+
+
+class FrameBudgetStats:
+    """Quantos frames cada requisição decodificou e classificou (agregado por processo)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._frames_decoded = 0
+        self._frames_classified = 0
+        self._extended = 0
+        self._at_max = 0
+        self._histogram: Dict[int, int] = {}
+
+    def record(self, frames_decoded: int, frames_classified: int) -> None:
+        with self._lock:
+            self._requests += 1
+            self._frames_decoded += frames_decoded
+            self._frames_classified += frames_classified
+            if frames_classified > LIVENESS_MIN_FRAMES:
+                self._extended += 1
+            if frames_classified >= LIVENESS_MAX_FRAMES:
+                self._at_max += 1
+            self._histogram[frames_classified] = self._histogram.get(frames_classified, 0) + 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            requests = self._requests
+            return {
+                "requests": requests,
+                "avg_frames_decoded": self._frames_decoded / requests if requests else 0.0,
+                "avg_frames_classified": self._frames_classified / requests if requests else 0.0,
+                "extended": self._extended,
+                "at_max_budget": self._at_max,
+                "frames_classified_histogram": dict(sorted(self._histogram.items())),
+                "min_frames": LIVENESS_MIN_FRAMES,
+                "max_frames": LIVENESS_MAX_FRAMES,
+            }
+
+
+FRAME_BUDGET_STATS = FrameBudgetStats()
+
+
+def frame_budget_stats() -> Dict:
+    return FRAME_BUDGET_STATS.stats()
+
+
 # =============================================
 # PROCESSO COMPLETO DE ANTI-SPOOFING FINAL
 # =============================================
 
-def process_anti_spoofing(frames: List[np.ndarray], fps: float) -> Dict:
+@dataclass
+class LivenessResult:
+    """
+    Resultado de anti-spoofing de uma única requisição.
+    Cada chamada cria o seu; nada é compartilhado entre threads.
+    """
+    liveness: bool
+    final_score: float
+    scores: Dict[str, float]
+    reason: Optional[str]
+    real_scores: List[float] = field(default_factory=list)
+    frames_used: int = 0
+    early_exit: bool = False
+
+    @property
+    def frames_classified(self) -> int:
+        return len(self.real_scores)
+
+    def to_dict(self) -> Dict:
+        return {
+            "liveness": self.liveness,
+            "final_score": self.final_score,
+            "scores": dict(self.scores),
+            "reason": self.reason,
+            "frames_used": self.frames_used,
+            "frames_classified": self.frames_classified,
+            "early_exit": self.early_exit
+        }
+
+
+def _build_result(yolo: YoloScore, frames_used: int, early_exit: bool = False,
+                  motion: Optional[float] = None) -> LivenessResult:
+    scores = {
+        "yolo": yolo.score
+    }
+    if motion is not None:
+        scores["motion"] = motion
+
+    final_score, reason = fuse_scores(scores, {"real_scores": yolo.real_scores})
+    liveness = final_score >= REAL_THRESHOLD
+    LIVENESS_DECISIONS.inc(reason=reason, liveness=str(liveness).lower())
+
+    return LivenessResult(
+        liveness=liveness,
+        final_score=final_score,
+        scores=scores,
+        reason=reason,
+        real_scores=list(yolo.real_scores),
+        frames_used=frames_used,
+        early_exit=early_exit
+    )
+
+
+def analyze_liveness(frames: List[np.ndarray], fps: float) -> LivenessResult:
     """
     frames = lista de frames (numpy arrays)
     fps = fps do vídeo
     """
-    
-    yolo_score = score_yolo(frames)
+    motion = score_motion(frames)
 
-    scores = {
-        "yolo": yolo_score
-    }
+    # estático: spoof decidido sem rodar o modelo
+    yolo = YoloScore() if is_static(motion) else score_yolo_detailed(frames)
+    result = _build_result(yolo, frames_used=len(frames), motion=motion)
+    FRAME_BUDGET_STATS.record(result.frames_used, result.frames_classified)
 
-    detections_info = getattr(score_yolo, "_last_detections", {})
-    final_score, reason = fuse_scores(scores, detections_info)
+    _log_decision(result)
 
-    liveness = final_score >= REAL_THRESHOLD
+    return result
 
-    print(f"[Anti-Spoofing] YOLO Score: {yolo_score:.3f} | Final: {final_score:.3f} | Liveness: {liveness} | Reason: {reason}")
 
-    return {
-        "liveness": liveness,
-        "final_score": final_score,
-        "scores": scores,
-        "reason": reason
-    }
+def _log_decision(result: LivenessResult) -> None:
+    """Uma linha estruturada por decisão de liveness."""
+    logger.info("Decisão de liveness: %s", result.reason, extra={
+        "liveness": result.liveness,
+        "final_score": round(result.final_score, 3),
+        "yolo": round(result.scores["yolo"], 3),
+        "motion": round(result.scores["motion"], 3) if "motion" in result.scores else None,
+        "frames_used": result.frames_used,
+        "frames_classified": result.frames_classified,
+        "early_exit": result.early_exit,
+    })
+
+
+def process_anti_spoofing(frames: List[np.ndarray], fps: float) -> Dict:
+    """Versão em dicionário de analyze_liveness (formato usado nas respostas da API)."""
+    return analyze_liveness(frames, fps).to_dict()
+
+
+# =============================================
+# DECISÃO INCREMENTAL (EARLY EXIT)
+# =============================================
+
+# classificar frames à medida que são decodificados e parar assim que a decisão for clara
+LIVENESS_INCREMENTAL = os.getenv("LIVENESS_INCREMENTAL", "true").lower() == "true"
+
+
+class IncrementalLiveness:
+    """
+    Estado de liveness de uma requisição (uma instância por requisição).
+    Acumula a probabilidade de REAL frame a frame com orçamento adaptativo:
+    após `min_frames`, decide assim que a média sai da faixa ambígua
+    (AMBIGUOUS_LOW..AMBIGUOUS_HIGH); dentro dela, classifica mais `step` frames
+    por rodada, até `max_frames`.
+    O modelo é emprestado na primeira rodada e devolvido em result()/close():
+    todas as rodadas usam a mesma versão, mesmo durante uma troca.
+    """
+
+    def __init__(self, min_frames: int = LIVENESS_MIN_FRAMES, max_frames: int = LIVENESS_MAX_FRAMES,
+                 step: int = LIVENESS_BUDGET_STEP):
+        self.min_frames = max(1, min_frames)
+        self.max_frames = max(self.min_frames, max_frames)
+        self.step = max(1, step)
+        # o primeiro batch também alimenta o pré-filtro de movimento
+        self.first_batch = max(self.min_frames, MOTION_MIN_FRAMES) if MOTION_FILTER else self.min_frames
+        self.real_scores: List[float] = []
+        self.pending: List[np.ndarray] = []
+        self.thumbnails: List[np.ndarray] = []
+        self.motion: Optional[float] = None
+        self.frames_seen = 0
+        self.decided = False
+        self.failed = False
+        self.static = False
+        self._model_handle = None
+
+    def __enter__(self) -> "IncrementalLiveness":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Devolve o modelo emprestado (idempotente)."""
+        handle, self._model_handle = self._model_handle, None
+        if handle is not None:
+            MODEL_REGISTRY.release(handle)
+
+    def add_frame(self, frame: np.ndarray) -> bool:
+        """
+        Recebe um frame. Os primeiros frames são testados pelo pré-filtro de movimento e
+        classificados juntos num único batch; depois, em rodadas de `step` frames.
+        Retorna True quando não é preciso ver mais frames.
+        """
+        self.frames_seen += 1
+
+        if MOTION_FILTER:
+            self.thumbnails.append(motion_thumbnail(frame))
+
+        if model_ready():
+            self.pending.append(frame)
+
+        if self.frames_seen < self.first_batch:
+            return False
+
+        # vídeo estático: spoof decidido antes de chamar o modelo
+        if self.frames_seen == self.first_batch and is_static(motion_score(self.thumbnails)):
+            self.pending = []
+            self.static = True
+            self.decided = True
+            return True
+
+        if not model_ready():
+            return False
+
+        # depois do primeiro batch, espera completar a rodada (ou o orçamento máximo)
+        if self.real_scores and len(self.pending) < self.step and self.frames_seen < self.max_frames:
+            return False
+
+        if not self._flush():
+            return True
+
+        self.decided = self._is_decisive()
+        return self.decided or self.frames_seen >= self.max_frames
+
+    def _flush(self) -> bool:
+        """Classifica os frames pendentes. Retorna False em caso de erro do modelo."""
+        if not self.pending or self.failed:
+            return not self.failed
+
+        try:
+            if self._model_handle is None:
+                self._model_handle = MODEL_REGISTRY.acquire()
+            self.real_scores.extend(_classify_real_probs(self.pending, self._model_handle.model))
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.exception("Erro em YOLO: %s", e)
+            self.failed = True
+        finally:
+            self.pending = []
+
+        return not self.failed
+
+    def _is_decisive(self) -> bool:
+        return len(self.real_scores) >= self.min_frames and not is_ambiguous(self.real_scores)
+
+    def result(self) -> LivenessResult:
+        # frames que chegaram antes de completar o primeiro batch
+        try:
+            if model_ready() and not self.static:
+                self._flush()
+        finally:
+            self.close()
+
+        self.motion = motion_score(self.thumbnails)
+
+        if self.failed or not self.real_scores:
+            yolo = YoloScore()
+        else:
+            yolo = YoloScore(score=float(np.mean(self.real_scores)), real_scores=self.real_scores)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Probs reais: %s", [round(s, 3) for s in self.real_scores])
+
+        result = _build_result(yolo, frames_used=self.frames_seen, early_exit=self.decided, motion=self.motion)
+        FRAME_BUDGET_STATS.record(result.frames_used, result.frames_classified)
+        return result
+
+
+def analyze_liveness_incremental(frames: Iterable[np.ndarray], fps: float) -> LivenessResult:
+    """
+    Versão incremental de analyze_liveness.
+    frames = iterável de frames (ex.: utils.FrameSampler), consumido apenas até a decisão
+    fps = fps do vídeo
+    """
+    with IncrementalLiveness() as detector:
+        for frame in frames:
+            if detector.add_frame(frame):
+                break
+
+        result = detector.result()
+
+    _log_decision(result)
+
+    return result
+
+
+def process_anti_spoofing_incremental(frames: Iterable[np.ndarray], fps: float) -> Dict:
+    """Versão em dicionário de analyze_liveness_incremental."""
+    return analyze_liveness_incremental(frames, fps).to_dict()
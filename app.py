@@ -1,26 +1,200 @@
-from flask import Flask, request, jsonify, Response
-import cv2
-import base64
+from flask import Flask, request, jsonify, Response, g
 import numpy as np
-import face_recognition
 import os
+import hmac
+import json
 import logging
-from datetime import datetime
-from database import salvar_usuario, buscar_todos_encodings, buscar_todos_encodings_com_id, armarzenar_toxicina, procurar_toxina_por_id, atualizar_toxina, remover_toxina, listar_toxinas, buscar_toxinas_por_nivel_maximo, verificar_usuario_nivel_3, buscar_usuario_por_id, remover_usuario
-from utils import decode_base64_image, validate_video_file, extract_frames_from_video, save_temp_video, convert_to_mp4
+import time
+from logging_setup import setup_logging, logging_stats
+from database import salvar_usuario, buscar_todos_encodings, armarzenar_toxicina, procurar_toxina_por_id, atualizar_toxina, remover_toxina, listar_toxinas, buscar_toxinas_por_nivel_maximo, verificar_usuario_nivel_3, buscar_usuario_por_id, remover_usuario
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge
+from utils import decode_base64_image, save_temp_video, VideoTooLargeError, MAX_VIDEO_MB
 from flask_cors import CORS
 from validate import validateToxin
-from anti_spoofing import process_anti_spoofing
-
-
-logging.basicConfig(level=logging.DEBUG)
+from startup import face_recognition_module, anti_spoofing_module, readiness, start_background_loading, NotReadyError, STARTUP_BACKGROUND_LOAD, SUBSYSTEMS
+from spool import SPOOL, SpoolFullError, spool_stats
+from inference_server import FACE_ENCODING_POOL
+from jobs import JOBS, JobQueueFullError, job_stats
+from admission import ADMISSION, AdmissionRejected, admission_stats
+from deadline import DeadlineExceeded, seconds_from_headers, set_deadline, reset_deadline
+from metrics import stage, render as render_metrics, register_stats, REQUEST_SECONDS
+import tracing
+from pipeline import verify_video, prefetch_gallery, identify_face, encode_faces, processing_error_body, handle_deadline_exceeded, finish_stream_session
+from streaming import VerificationSession, StreamProtocolError, iter_length_prefixed_frames, STREAM_IDLE_TIMEOUT, STREAM_MAX_FRAMES, STREAM_MAX_FRAME_BYTES
+
+# handlers e níveis (LOG_LEVEL, LOG_LEVELS) antes de criar o app e carregar os modelos
+setup_logging()
+logger = logging.getLogger(__name__)
+
+try:
+    from flask_sock import Sock
+    SOCK_AVAILABLE = True
+except ImportError:
+    SOCK_AVAILABLE = False
+    logger.warning("WebSocket (/verify/ws) não disponível. Instale com: pip install flask-sock")
 
 
 app = Flask(__name__)
 CORS(app)
 
-app.logger.setLevel(logging.DEBUG)
+# limite do corpo das rotas JSON (/register, /verify com imagem, /toxin...)
+MAX_CONTENT_LENGTH_MB = int(os.getenv("MAX_CONTENT_LENGTH_MB", str(MAX_VIDEO_MB + 1)))
+
+# limites por rota (bytes); as demais usam MAX_CONTENT_LENGTH_MB
+ROUTE_MAX_CONTENT_LENGTH = {
+    # vídeo: o limite exato (MAX_VIDEO_MB) é aplicado na cópia para o spool
+    "verify_face": max(MAX_CONTENT_LENGTH_MB, MAX_VIDEO_MB + 1) * 1024 * 1024,
+    "submit_verify_job": (MAX_VIDEO_MB + 1) * 1024 * 1024,
+    # streaming: frames com prefixo de 4 bytes; o próprio protocolo limita frame e sessão
+    "verify_face_stream": STREAM_MAX_FRAMES * (STREAM_MAX_FRAME_BYTES + 4) + 1024 * 1024,
+}
+
+# teto global aplicado pelo Werkzeug durante a leitura (inclusive corpos chunked);
+# o limite de cada rota é conferido pelo Content-Length antes de ler o corpo
+app.config["MAX_CONTENT_LENGTH"] = max(MAX_CONTENT_LENGTH_MB * 1024 * 1024, *ROUTE_MAX_CONTENT_LENGTH.values())
+
+
+def _route_max_content_length() -> int:
+    return ROUTE_MAX_CONTENT_LENGTH.get(request.endpoint, MAX_CONTENT_LENGTH_MB * 1024 * 1024)
+
+# token dos endpoints administrativos (/admin/*); sem token, ficam desativados
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# diretório de onde /admin/model/reload aceita modelos (um .pt é desserializado com pickle)
+MODEL_DIR = os.path.realpath(os.getenv("MODEL_DIR", "."))
+
+# formatos aceitos na recarga (além do diretório *_openvino_model exportado)
+MODEL_EXTENSIONS = (".pt", ".onnx", ".xml")
+
+# processos servindo o app (definido pelo gunicorn.conf.py); com mais de um, a recarga
+# pelo endpoint só trocaria o modelo de um deles: usar MODEL_WATCH_INTERVAL
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+
+# face_recognition e anti_spoofing (modelo) carregam em segundo plano; CRUD já responde
+if STARTUP_BACKGROUND_LOAD:
+    start_background_loading()
+
+
+def _liveness_stats(name: str):
+    """Estatísticas do anti_spoofing, só depois de carregado (não força a carga)."""
+    def provider():
+        module = SUBSYSTEMS["liveness"].module
+        if module is None:
+            return {}
+        if name == "batcher":
+            return module.LIVENESS_BATCHER.stats()
+        if name == "model":
+            return module.MODEL_REGISTRY.status()
+        return module.frame_budget_stats()
+    return provider
+
+
+register_stats("spool", spool_stats)
+register_stats("admission", admission_stats)
+register_stats("jobs", job_stats)
+register_stats("liveness_batcher", _liveness_stats("batcher"))
+register_stats("liveness_model", _liveness_stats("model"))
+register_stats("frame_budget", _liveness_stats("frame_budget"))
+register_stats("logging", logging_stats)
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+    # trace opcional (cabeçalho TRACE_HEADER ou amostragem)
+    if tracing.should_trace(request.headers):
+        g.trace = tracing.begin(f"{request.method} {request.path}")
+    # prazo da requisição (o WebSocket é uma sessão no ritmo do cliente, sem prazo)
+    if request.endpoint != "verify_face_ws":
+        g.deadline_token = set_deadline(seconds_from_headers(request.headers))
+
+
+@app.before_request
+def _enforce_route_content_length():
+    if request.content_length is not None and request.content_length > _route_max_content_length():
+        raise RequestEntityTooLarge()
+
+
+def _end_trace():
+    trace = g.pop("trace", None)
+    if trace is None:
+        return None
+    return trace[0].id, tracing.end(*trace)
+
+
+@app.after_request
+def _observe_request(response):
+    start = g.get("request_start")
+    if start is not None and request.url_rule is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - start, route=request.url_rule.rule,
+                                method=request.method, status=response.status_code)
+    ended = _end_trace()
+    if ended is not None:
+        response.headers["X-Trace-Id"], response.headers["Server-Timing"] = ended
+    return response
+
+
+@app.teardown_request
+def _end_request_context(exc):
+    # requisições encerradas sem passar pelo after_request
+    _end_trace()
+    # threads do servidor são reaproveitadas entre requisições
+    token = g.pop("deadline_token", None)
+    if token is not None:
+        reset_deadline(token)
+
+
+@app.get("/metrics")
+def metrics():
+    """Métricas no formato texto do Prometheus."""
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    limit_mb = _route_max_content_length() // (1024 * 1024)
+    logger.warning("Requisição excede %s MB", limit_mb, extra={"status": 413})
+    return jsonify({"erro": f"Requisição excede {limit_mb} MB"}), 413
+
+
+@app.errorhandler(AdmissionRejected)
+def admission_rejected(e):
+    logger.warning("Admissão recusada: %s", e.reason, extra={"status": 503})
+    response = jsonify({"erro": "Servidor ocupado, tente novamente", "detalhe": e.reason})
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response, 503
+
+
+@app.errorhandler(NotReadyError)
+def not_ready(e):
+    logger.warning("%s", e, extra={"status": 503})
+    response = jsonify({"erro": "Serviço inicializando, tente novamente", "detalhe": str(e)})
+    response.headers["Retry-After"] = "5"
+    return response, 503
+
+
+@app.errorhandler(DeadlineExceeded)
+def deadline_exceeded(e):
+    body, status = handle_deadline_exceeded(e)
+    return jsonify(body), status
+
+
+@app.get("/healthz")
+def healthz():
+    """Liveness do processo: responde assim que o servidor sobe."""
+    return jsonify({"status": "ok"}), 200
+
+
+@app.get("/readyz")
+def readyz():
+    """Prontidão: 200 apenas com visão computacional, modelo e MongoDB prontos."""
+    report = readiness()
+    return jsonify(report), 200 if report["ready"] else 503
+
+
 @app.route("/register", methods=["POST"])
+@ADMISSION.limit
 def register_face():
     data = request.get_json()
     nome = data.get("nome")
@@ -33,11 +207,13 @@ def register_face():
     if nivel == 3 and verificar_usuario_nivel_3():
         return jsonify({"erro": "Já existe um usuário de nível 3 cadastrado."}), 409
 
-    rgb = decode_base64_image(image_base64)
+    with stage("base64_decode"):
+        rgb = decode_base64_image(image_base64)
     if rgb is None:
         return jsonify({"erro": "Imagem inválida"}), 400
 
-    encodings = face_recognition.face_encodings(rgb)
+    face_recognition = face_recognition_module()
+    encodings = FACE_ENCODING_POOL.run(encode_faces, rgb)
     if not encodings:
         return jsonify({"erro": "Nenhum rosto detectado"}), 400
 
@@ -66,162 +242,301 @@ def register_face():
     }), 201
 
 
+# Retry-After (s) das respostas 503 por falta de espaço no spool
+SPOOL_RETRY_AFTER = "5"
+
+
+def _spool_full_response(e: SpoolFullError) -> tuple:
+    logger.warning("%s", e, extra={"status": 503})
+    response = jsonify({"erro": "Servidor sem espaço temporário no momento, tente novamente"})
+    response.headers["Retry-After"] = SPOOL_RETRY_AFTER
+    return response, 503
+
+
+def _save_video_upload(video_file) -> tuple:
+    """
+    Valida e grava no spool o vídeo recebido em multipart.
+    Retorna (caminho, formato, None) ou (None, None, resposta de erro).
+    """
+    logger.debug("Arquivo de vídeo recebido: %s", video_file.filename)
+
+    if video_file.filename == '':
+        logger.warning("Arquivo de vídeo vazio", extra={"status": 400})
+        return None, None, (jsonify({"erro": "Arquivo de vídeo vazio"}), 400)
+
+    content_type = video_file.content_type
+    logger.debug("Content-Type do vídeo: %s", content_type)
+    if content_type not in ['video/mp4', 'video/webm']:
+        logger.warning("Formato não suportado: %s", content_type, extra={"status": 415})
+        return None, None, (jsonify({"erro": "Formato de vídeo não suportado. Use video/mp4 ou video/webm"}), 415)
+
+    video_format = "mp4" if content_type == "video/mp4" else "webm"
+
+    # antes de gravar o vídeo: 503 se o modelo ainda estiver carregando
+    anti_spoofing_module()
+
+    # Salvar temporário (cópia em blocos, interrompida ao passar do limite)
+    try:
+        with stage("temp_save"):
+            temp_video_path = save_temp_video(video_file, video_format, max_bytes=MAX_VIDEO_MB * 1024 * 1024)
+    except VideoTooLargeError as e:
+        logger.warning("%s", e, extra={"status": 400})
+        return None, None, (jsonify({"erro": str(e)}), 400)
+    except SpoolFullError as e:
+        return None, None, _spool_full_response(e)
+
+    if not temp_video_path:
+        logger.error("Falha ao salvar arquivo temporário", extra={"status": 500})
+        return None, None, (jsonify({"erro": "Erro ao processar vídeo"}), 500)
+
+    logger.debug("Vídeo salvo temporariamente em: %s", temp_video_path)
+    return temp_video_path, video_format, None
+
+
 @app.route("/verify", methods=["POST"])
 def verify_face():
     """
     Endpoint de verificação com anti-spoofing.
     Aceita vídeo (multipart/form-data) ou imagem (JSON base64) como fallback.
+    O upload é recebido fora da admissão: a vaga só cobre o trabalho de visão computacional.
     """
     temp_video_path = None
-    video_format = None
-    
+
     try:
-        print(f"[DEBUG] Requisição recebida - Method: {request.method}, Content-Type: {request.content_type}")
-        print(f"[DEBUG] Files no request: {list(request.files.keys())}")
-        print(f"[DEBUG] Form data: {list(request.form.keys())}")
+        logger.debug("Requisição recebida - Method: %s, Content-Type: %s", request.method, request.content_type)
+        logger.debug("Files no request: %s", list(request.files.keys()))
+        logger.debug("Form data: %s", list(request.form.keys()))
         
         # Prioridade para vídeo
         if 'video' in request.files:
-            video_file = request.files['video']
-            print(f"[DEBUG] Arquivo de vídeo recebido: {video_file.filename}")
-
-            if video_file.filename == '':
-                print("[ERROR 400] Arquivo de vídeo vazio")
-                return jsonify({"erro": "Arquivo de vídeo vazio"}), 400
-
-            content_type = video_file.content_type
-            print(f"[DEBUG] Content-Type do vídeo: {content_type}")
-            if content_type not in ['video/mp4', 'video/webm']:
-                print(f"[ERROR 415] Formato não suportado: {content_type}")
-                return jsonify({"erro": "Formato de vídeo não suportado. Use video/mp4 ou video/webm"}), 415
-
-            video_format = "mp4" if content_type == "video/mp4" else "webm"
-            
-            # Salvar temporário
-            temp_video_path = save_temp_video(video_file, video_format)
-            if not temp_video_path:
-                print("[ERROR 500] Falha ao salvar arquivo temporário")
-                return jsonify({"erro": "Erro ao processar vídeo"}), 500
-
-            print(f"[DEBUG] Vídeo salvo temporariamente em: {temp_video_path}")
-
-            # Conversão WebM → MP4
-            if video_format == "webm":
-                print("[DEBUG] Convertendo WebM para MP4...")
-                try:
-                    temp_video_path_mp4 = convert_to_mp4(temp_video_path)
-                    os.unlink(temp_video_path)
-                    temp_video_path = temp_video_path_mp4
-                    video_format = "mp4"
-                    print(f"[DEBUG] Conversão concluída: {temp_video_path}")
-                except Exception as e:
-                    print(f"[ERROR 500] Falha na conversão: {e}")
-                    raise
-
-            # Validar vídeo
-            is_valid, error_msg = validate_video_file(temp_video_path, max_size_mb=15)
-            if not is_valid:
-                print(f"[ERROR 400] Validação de vídeo falhou: {error_msg}")
-                if os.path.exists(temp_video_path):
-                    os.unlink(temp_video_path)
-                return jsonify({"erro": error_msg}), 400
-
-            # Extrair frames
-            try:
-                frames, fps = extract_frames_from_video(temp_video_path, num_frames=12)
-                print(f"[DEBUG] Frames extraídos: {len(frames)}, FPS: {fps}")
-                if len(frames) < 5:
-                    raise ValueError(f"Frames insuficientes: {len(frames)}")
-            except Exception as e:
-                print(f"[ERROR 500] Falha ao extrair frames: {e}")
-                raise
-
-            # Anti-spoofing
-            try:
-                anti_spoof_result = process_anti_spoofing(frames, fps)
-                print(f"[DEBUG] Resultado anti-spoofing: {anti_spoof_result}")
-            except Exception as e:
-                print(f"[ERROR 500] Falha no anti-spoofing: {e}")
-                raise
-
-            # Limpar temporário
-            if os.path.exists(temp_video_path):
-                os.unlink(temp_video_path)
-                temp_video_path = None
-
-            if not anti_spoof_result.get("liveness", False):
-                return jsonify({
-                    "erro": f"Falha na verificação de liveness: {anti_spoof_result.get('reason', 'spoof_detectado')}",
-                    "scores": anti_spoof_result.get("scores", {}),
-                    "final_score": anti_spoof_result.get("final_score", 0.0)
-                }), 403
-
-            rgb = cv2.cvtColor(frames[-1], cv2.COLOR_BGR2RGB)
+            temp_video_path, video_format, error = _save_video_upload(request.files['video'])
+            if error:
+                return error
+
+            # o núcleo assume o arquivo temporário (devolvido ao spool ao final)
+            with ADMISSION.slot():
+                body, status = verify_video(temp_video_path, video_format)
+            temp_video_path = None
+            response = jsonify(body)
+            if status == 503:
+                # spool cheio ou modelo carregando: o cliente pode repetir
+                response.headers["Retry-After"] = SPOOL_RETRY_AFTER
+            return response, status
 
         else:
             # Fallback imagem base64
             data = request.get_json()
             if not data:
-                print("[ERROR 400] Nenhum dado JSON recebido e nenhum vídeo no multipart")
+                logger.warning("Nenhum dado JSON recebido e nenhum vídeo no multipart", extra={"status": 400})
                 return jsonify({"erro": "Campo obrigatório: video (multipart) ou imagem_base64 (JSON)"}), 400
 
             image_base64 = data.get("imagem_base64")
             if not image_base64:
-                print("[ERROR 400] Campo imagem_base64 não encontrado no JSON")
+                logger.warning("Campo imagem_base64 não encontrado no JSON", extra={"status": 400})
                 return jsonify({"erro": "Campo obrigatório: video (multipart) ou imagem_base64 (JSON)"}), 400
 
-            rgb = decode_base64_image(image_base64)
+            with stage("base64_decode"):
+                rgb = decode_base64_image(image_base64)
             if rgb is None:
-                print("[ERROR 400] Falha ao decodificar imagem base64")
+                logger.warning("Falha ao decodificar imagem base64", extra={"status": 400})
                 return jsonify({"erro": "Imagem inválida"}), 400
 
-            anti_spoof_result = {"liveness": True, "final_score": 1.0, "scores": {"yolo": 1.0}, "reason": "image_fallback"}
-
-        # Reconhecimento facial
-        encodings = face_recognition.face_encodings(rgb)
-        if not encodings:
-            print("[ERROR 400] Nenhum rosto detectado na imagem/frame")
-            return jsonify({"erro": "Nenhum rosto detectado"}), 400
-
-        encoding = np.array(encodings[0])
-        usuarios = buscar_todos_encodings_com_id()
-        if not usuarios:
-            return jsonify({"erro": "Nenhum usuário cadastrado"}), 404
-
-        best_match = None
-        lowest_distance = 1.0
-        for u in usuarios:
-            known_encoding = np.array(u["face_encoding"])
-            distance = face_recognition.face_distance([known_encoding], encoding)[0]
-            if distance < lowest_distance and distance < 0.45:
-                lowest_distance = distance
-                best_match = u
-
-        if best_match:
-            return jsonify({
-                "_id": best_match.get("_id"),
-                "nome": best_match["nome"],
-                "nivel": best_match["nivel"],
-                "imagem_base64": best_match.get("imagem_base64")
-            }), 200
+            with ADMISSION.slot():
+                # galeria buscada em paralelo ao encoding
+                gallery = prefetch_gallery()
+
+                # Reconhecimento facial
+                body, status = identify_face(rgb, gallery=gallery)
+            return jsonify(body), status
+
+    except (HTTPException, AdmissionRejected, NotReadyError, DeadlineExceeded):
+        # ex.: 413 do MAX_CONTENT_LENGTH / 503 sem vaga ou no startup / 504 por prazo, tratados pelos errorhandlers
+        raise
 
-        return jsonify({"erro": "Rosto não reconhecido"}), 404
+    except SpoolFullError as e:
+        return _spool_full_response(e)
 
     except Exception as e:
-        if temp_video_path and os.path.exists(temp_video_path):
-            os.unlink(temp_video_path)
-        print(f"[CRITICAL] Exceção não tratada em verify_face: {e}", flush=True)
-        import traceback
-        traceback.print_exc()
-        return jsonify({
-            "liveness": False,
-            "final_score": 0.0,
-            "scores": {"yolo": 0.0},
-            "identity_match": False,
-            "identity_confidence": 0.0,
-            "reason": "erro_processamento",
-            "timestamp": datetime.utcnow().isoformat() + "Z"
-        }), 500
+        logger.exception("Exceção não tratada em verify_face: %s", e)
+        return jsonify(processing_error_body()), 500
+
+    finally:
+        # arquivo temporário sempre devolvido ao spool, inclusive em erros
+        SPOOL.release(temp_video_path)
+
+
+@app.route("/verify/jobs", methods=["POST"])
+def submit_verify_job():
+    """
+    Verificação assíncrona: grava o vídeo, enfileira e responde 202 com o id do job.
+    O resultado sai em GET /verify/jobs/<id>, no mesmo formato de /verify.
+    """
+    if 'video' not in request.files:
+        return jsonify({"erro": "Campo obrigatório: video (multipart)"}), 400
+
+    temp_video_path, video_format, error = _save_video_upload(request.files['video'])
+    if error:
+        return error
+
+    try:
+        # o job assume o arquivo temporário (verify_video devolve ao spool)
+        job = JOBS.submit(verify_video, temp_video_path, video_format,
+                          on_reject=lambda: SPOOL.release(temp_video_path),
+                          on_abandon=lambda: SPOOL.release(temp_video_path))
+    except JobQueueFullError as e:
+        logger.warning("%s", e, extra={"status": 503})
+        response = jsonify({"erro": "Fila de verificações cheia, tente novamente"})
+        response.headers["Retry-After"] = "5"
+        return response, 503
+
+    response = jsonify({**job.to_dict(), "status_url": f"/verify/jobs/{job.id}"})
+    response.headers["Location"] = f"/verify/jobs/{job.id}"
+    return response, 202
+
+
+@app.get("/verify/jobs/<string:job_id>")
+def get_verify_job(job_id: str):
+    """
+    Estado do job. Com ?wait=N (segundos) espera o término (long-poll).
+    Pronto: 200 com {"state": "done", "status": <status de /verify>, "result": <corpo>}.
+    """
+    try:
+        wait = max(0.0, float(request.args.get("wait", "0")))
+    except ValueError:
+        return jsonify({"erro": "Parâmetro wait inválido"}), 400
+
+    job = JOBS.get(job_id, wait=wait)
+    if job is None:
+        return jsonify({"erro": "Job não encontrado ou expirado"}), 404
+
+    return jsonify(job.to_dict()), 200 if job.state == "done" else 202
+
+
+@app.route("/verify/stream", methods=["POST"])
+@ADMISSION.limit
+def verify_face_stream():
+    """
+    Verificação por streaming via HTTP chunked.
+    Corpo: sequência de frames JPEG, cada um prefixado pelo tamanho (uint32 big-endian).
+    A resposta é enviada assim que o anti-spoofing decide, sem esperar o fim do corpo.
+    """
+    try:
+        with VerificationSession() as session:
+            for data in iter_length_prefixed_frames(request.stream):
+                if session.push_frame(data):
+                    break
+
+            body, status = finish_stream_session(session)
+        return jsonify(body), status
+
+    except StreamProtocolError as e:
+        logger.warning("Streaming inválido: %s", e, extra={"status": 400})
+        return jsonify({"erro": str(e)}), 400
+
+    except (HTTPException, NotReadyError, DeadlineExceeded):
+        raise
+
+    except Exception as e:
+        logger.exception("Exceção não tratada em verify_face_stream: %s", e)
+        return jsonify(processing_error_body()), 500
+
+
+if SOCK_AVAILABLE:
+    sock = Sock(app)
+
+    @sock.route("/verify/ws")
+    def verify_face_ws(ws):
+        """
+        Verificação por streaming via WebSocket.
+        O cliente envia frames JPEG como mensagens binárias (texto "fim" encerra o envio);
+        o servidor responde com uma única mensagem JSON: corpo de /verify + "status".
+        """
+        try:
+            with ADMISSION.slot(), VerificationSession() as session:
+                while True:
+                    data = ws.receive(timeout=STREAM_IDLE_TIMEOUT)
+                    if data is None or isinstance(data, str):
+                        break
+                    if session.push_frame(data):
+                        break
+
+                body, status = finish_stream_session(session)
+
+        except AdmissionRejected as e:
+            logger.warning("Admissão recusada: %s", e.reason, extra={"status": 503})
+            body, status = {"erro": "Servidor ocupado, tente novamente", "detalhe": e.reason, "retry_after": e.retry_after}, 503
+
+        except StreamProtocolError as e:
+            logger.warning("Streaming inválido: %s", e, extra={"status": 400})
+            body, status = {"erro": str(e)}, 400
+
+        except NotReadyError as e:
+            logger.warning("%s", e, extra={"status": 503})
+            body, status = {"erro": "Serviço inicializando, tente novamente", "detalhe": str(e)}, 503
+
+        except Exception as e:
+            logger.exception("Exceção não tratada em verify_face_ws: %s", e)
+            body, status = processing_error_body(), 500
+
+        ws.send(json.dumps({**body, "status": status}))
+        ws.close()
+
+
+def _admin_authorized() -> bool:
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN)
+
+
+def _resolve_model_path(path: str):
+    """Caminho real do modelo, ou None se estiver fora de MODEL_DIR ou não for um formato aceito."""
+    real = os.path.realpath(path)
+    if os.path.commonpath([real, MODEL_DIR]) != MODEL_DIR:
+        return None
+    if os.path.isdir(real):
+        return real if real.endswith("_openvino_model") else None
+    return real if real.lower().endswith(MODEL_EXTENSIONS) and os.path.isfile(real) else None
+
+
+@app.get("/admin/model")
+def model_status():
+    if not _admin_authorized():
+        return jsonify({"erro": "Não autorizado"}), 403
+
+    return jsonify(anti_spoofing_module().MODEL_REGISTRY.status()), 200
+
+
+@app.post("/admin/model/reload")
+def reload_model():
+    """
+    Carrega um novo modelo de liveness em segundo plano e o ativa após o warmup.
+    Corpo opcional: {"path": "novo_modelo.onnx"} (padrão: YOLO_MODEL_PATH).
+    Recusado com vários workers: cada um tem o seu modelo e só este seria trocado.
+    """
+    if not _admin_authorized():
+        return jsonify({"erro": "Não autorizado"}), 403
+
+    if WEB_CONCURRENCY > 1:
+        return jsonify({"erro": f"Recarga pelo endpoint trocaria o modelo de só 1 de {WEB_CONCURRENCY} workers; "
+                                "substitua o arquivo com MODEL_WATCH_INTERVAL ativo"}), 409
+
+    anti_spoofing = anti_spoofing_module()
+    registry = anti_spoofing.MODEL_REGISTRY
+
+    data = request.get_json(silent=True) or {}
+    path = data.get("path") or registry.status()["path"] or anti_spoofing.YOLO_MODEL_PATH
+
+    if not path or not os.path.exists(path):
+        return jsonify({"erro": f"Modelo não encontrado: {path}"}), 400
+
+    resolved = _resolve_model_path(path)
+    if resolved is None:
+        logger.warning("Recarga recusada: %s fora de MODEL_DIR ou formato inválido", path, extra={"status": 400})
+        return jsonify({"erro": f"Modelo deve estar em MODEL_DIR ({MODEL_DIR}) e ser {', '.join(MODEL_EXTENSIONS)}"}), 400
+    path = resolved
+
+    if not registry.load(path):
+        return jsonify({"erro": "Já existe uma recarga em andamento", "status": registry.status()}), 409
+
+    return jsonify({"mensagem": "Recarga iniciada", "path": path}), 202
 
 
 @app.get("/toxin")
@@ -250,7 +565,7 @@ def list_toxins_by_user_id(id: str):
         return jsonify(toxinas), 200
     
     except Exception as e:
-        print(e)
+        logger.exception("Falha ao buscar toxinas do usuário %s: %s", id, e)
         return jsonify({
             "erro": "Não foi possível buscar as toxinas no momento."
         }), 500
@@ -278,7 +593,7 @@ def store_toxin():
             "message": "toxin store successfully!"
         }), 201
     except Exception as e:
-        print(e)
+        logger.exception("Falha ao armazenar toxina: %s", e)
         return jsonify({
             "message": "Can't store data at the moment"
         }), 500
@@ -345,7 +660,7 @@ def delete_user(id: str):
         }), 200
     
     except Exception as e:
-        print(e)
+        logger.exception("Falha ao remover usuário %s: %s", id, e)
         return jsonify({
             "erro": "Não foi possível remover o usuário no momento."
         }), 500
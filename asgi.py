@@ -0,0 +1,269 @@
+"""
+Camada ASGI: rotas de I/O assíncronas na frente do app Flask.
+
+    uvicorn asgi:app --workers N
+
+- /toxin e /user/<id> são async e usam o driver assíncrono do MongoDB
+  (database_async): enquanto esperam o banco, não ocupam thread, e poucos
+  processos atendem muitas requisições simultâneas.
+- /verify/ws é async: a espera pelos frames do cliente fica no event loop; o trabalho
+  de CPU de cada frame (decodificação, liveness) e o reconhecimento final rodam no
+  pool de threads do loop.
+- As demais rotas (/register, /verify, /verify/stream, /verify/jobs, /admin, /metrics,
+  /healthz, /readyz) são o app Flask, montado como WSGI e executado num pool de
+  ASGI_WSGI_THREADS threads; o trabalho de visão computacional continua nos pools
+  de inference_server.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route, WebSocketRoute
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from app import app as flask_app
+import database_async
+from admission import ADMISSION, AdmissionRejected
+from metrics import REQUEST_SECONDS
+from pipeline import processing_error_body, finish_stream_session
+from startup import NotReadyError
+from streaming import VerificationSession, StreamProtocolError, STREAM_IDLE_TIMEOUT
+from validate import validateToxin
+
+logger = logging.getLogger(__name__)
+
+# ============================
+# CONFIGURAÇÕES
+# ============================
+
+# threads que executam as requisições encaminhadas ao app Flask (WSGI)
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "8"))
+
+
+def observed(route: str):
+    """Registra a duração da rota em REQUEST_SECONDS, como o after_request do Flask."""
+    def decorator(view):
+        async def wrapper(request: Request) -> Response:
+            start = time.perf_counter()
+            response = await view(request)
+            REQUEST_SECONDS.observe(time.perf_counter() - start, route=route,
+                                    method=request.method, status=response.status_code)
+            return response
+        return wrapper
+    return decorator
+
+
+async def _json_body(request: Request) -> dict:
+    try:
+        body = await request.json()
+    except ValueError:
+        return {}
+    return body if isinstance(body, dict) else {}
+
+
+def _toxin_from_body(body: dict) -> dict:
+    return {
+        "nome": body.get('nome'),
+        "tipo": body.get('tipo'),
+        "periculosidade": body.get('periculosidade'),
+        "nivel": body.get('nivel')
+    }
+
+
+@observed("/toxin")
+async def list_all_toxins(request: Request) -> Response:
+    params = {field: request.query_params.get(field) for field in ("nome", "tipo", "periculosidade", "nivel")}
+
+    toxins = await database_async.listar_toxinas(params)
+    return JSONResponse(toxins, status_code=200)
+
+
+@observed("/toxin/user/<string:id>")
+async def list_toxins_by_user_id(request: Request) -> Response:
+    id = request.path_params["id"]
+    try:
+        usuario = await database_async.buscar_usuario_por_id(id)
+        if usuario is None:
+            return JSONResponse({
+                "erro": "Usuário não encontrado"
+            }, status_code=404)
+
+        toxinas = await database_async.buscar_toxinas_por_nivel_maximo(usuario.get("nivel"))
+        return JSONResponse(toxinas, status_code=200)
+
+    except Exception as e:
+        logger.exception("Falha ao buscar toxinas do usuário %s: %s", id, e)
+        return JSONResponse({
+            "erro": "Não foi possível buscar as toxinas no momento."
+        }, status_code=500)
+
+
+@observed("/toxin")
+async def store_toxin(request: Request) -> Response:
+    toxin = _toxin_from_body(await _json_body(request))
+
+    if not validateToxin(toxin):
+        return JSONResponse({
+            "error": "Invalid data",
+        }, status_code=400)
+
+    try:
+        await database_async.armarzenar_toxicina(toxin)
+        return JSONResponse({
+            "message": "toxin store successfully!"
+        }, status_code=201)
+    except Exception as e:
+        logger.exception("Falha ao armazenar toxina: %s", e)
+        return JSONResponse({
+            "message": "Can't store data at the moment"
+        }, status_code=500)
+
+
+@observed("/toxin/<string:id>")
+async def update_toxin(request: Request) -> Response:
+    id = request.path_params["id"]
+    try:
+        if await database_async.procurar_toxina_por_id(id) is None:
+            return JSONResponse({
+                "error": "Toxin not found"
+            }, status_code=404)
+
+        toxin = _toxin_from_body(await _json_body(request))
+
+        if not validateToxin(toxin):
+            return JSONResponse({
+                "error": "invalid data"
+            }, status_code=400)
+
+        await database_async.atualizar_toxina(id, toxin)
+        return Response(status_code=204)
+
+    except Exception:
+        return JSONResponse({
+            "error": "Can't update toxin"
+        }, status_code=500)
+
+
+@observed("/toxin/<string:id>")
+async def delete_toxin(request: Request) -> Response:
+    id = request.path_params["id"]
+    try:
+        if await database_async.procurar_toxina_por_id(id) is None:
+            return JSONResponse({
+                "error": "Toxina not found"
+            }, status_code=404)
+
+        await database_async.remover_toxina(id)
+        return Response(status_code=204)
+
+    except Exception:
+        return JSONResponse({
+            "error": "Can't remove toxin at the moment."
+        }, status_code=500)
+
+
+@observed("/user/<string:id>")
+async def delete_user(request: Request) -> Response:
+    id = request.path_params["id"]
+    try:
+        usuario = await database_async.buscar_usuario_por_id(id)
+        if usuario is None:
+            return JSONResponse({
+                "erro": "Usuário não encontrado"
+            }, status_code=404)
+
+        await database_async.remover_usuario(id)
+        return JSONResponse({
+            "mensagem": f"Usuário {usuario.get('nome')} removido com sucesso!"
+        }, status_code=200)
+
+    except Exception as e:
+        logger.exception("Falha ao remover usuário %s: %s", id, e)
+        return JSONResponse({
+            "erro": "Não foi possível remover o usuário no momento."
+        }, status_code=500)
+
+
+async def verify_face_ws(websocket: WebSocket) -> None:
+    """
+    Verificação por streaming via WebSocket (mesmo protocolo do /verify/ws do Flask).
+    O cliente envia frames JPEG como mensagens binárias (texto "fim" encerra o envio);
+    o servidor responde com uma única mensagem JSON: corpo de /verify + "status".
+    """
+    await websocket.accept()
+    try:
+        async with ADMISSION.async_slot():
+            session = await run_in_threadpool(VerificationSession)
+            try:
+                while True:
+                    try:
+                        message = await asyncio.wait_for(websocket.receive(), timeout=STREAM_IDLE_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        break
+                    if message["type"] == "websocket.disconnect":
+                        raise WebSocketDisconnect(message.get("code", 1000))
+                    data = message.get("bytes")
+                    if data is None:
+                        break
+                    if await run_in_threadpool(session.push_frame, data):
+                        break
+
+                body, status = await run_in_threadpool(finish_stream_session, session)
+            finally:
+                # devolve o modelo emprestado mesmo se o cliente desconectar
+                session.close()
+
+    except WebSocketDisconnect:
+        logger.info("Cliente desconectou do /verify/ws antes do veredito")
+        return
+
+    except AdmissionRejected as e:
+        logger.warning("Admissão recusada: %s", e.reason, extra={"status": 503})
+        body, status = {"erro": "Servidor ocupado, tente novamente", "detalhe": e.reason, "retry_after": e.retry_after}, 503
+
+    except StreamProtocolError as e:
+        logger.warning("Streaming inválido: %s", e, extra={"status": 400})
+        body, status = {"erro": str(e)}, 400
+
+    except NotReadyError as e:
+        logger.warning("%s", e, extra={"status": 503})
+        body, status = {"erro": "Serviço inicializando, tente novamente", "detalhe": str(e)}, 503
+
+    except Exception as e:
+        logger.exception("Exceção não tratada em verify_face_ws: %s", e)
+        body, status = processing_error_body(), 500
+
+    await websocket.send_text(json.dumps({**body, "status": status}))
+    await websocket.close()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await database_async.fechar_conexao()
+
+
+app = Starlette(
+    routes=[
+        Route("/toxin", list_all_toxins, methods=["GET"]),
+        Route("/toxin", store_toxin, methods=["POST"]),
+        Route("/toxin/user/{id}", list_toxins_by_user_id, methods=["GET"]),
+        Route("/toxin/{id}", update_toxin, methods=["PUT"]),
+        Route("/toxin/{id}", delete_toxin, methods=["DELETE"]),
+        Route("/user/{id}", delete_user, methods=["DELETE"]),
+        WebSocketRoute("/verify/ws", verify_face_ws),
+        Mount("/", WSGIMiddleware(flask_app, workers=ASGI_WSGI_THREADS)),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])],
+    lifespan=lifespan,
+)
@@ -0,0 +1,97 @@
+"""
+Comparação de acurácia/latência: classificador na cena inteira vs. no recorte do rosto.
+
+- frame: modelo de cena inteira (best.pt) nas imagens completas do split de teste
+- face_crop: detecção do rosto (utils.crop_face, como em produção) + modelo de recortes
+  (yolo_auto_train.py --crop) na resolução reduzida; a latência inclui a detecção
+
+Exemplo:
+    python benchmarks/bench_face_crop.py --frame-model best.pt \\
+        --crop-model models/anti_spoofing_crop_cls.pt --crop-imgsz 128
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from liveness_backend import load_backend  # noqa: E402
+from utils import crop_face  # noqa: E402
+from yolo_evaluate import load_split, SPLIT_FOLDER  # noqa: E402
+
+
+def run(name, model, images, labels, invert_classes, prepare=None):
+    # warmup
+    model.predict([prepare(images[0]) if prepare else images[0]])
+
+    latencies, correct, no_face = [], 0, 0
+    for image, label in zip(images, labels):
+        t0 = time.perf_counter()
+        x = image
+        if prepare:
+            crop = prepare(image)
+            if crop is None:
+                no_face += 1
+                crop = image
+            x = crop
+        probs = model.predict([x])[0]
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+
+        real_prob = probs[0] if invert_classes else probs[1]
+        correct += int((real_prob >= 0.5) == (label == 1))
+
+    return {
+        "mode": name,
+        "imgsz": model.imgsz if hasattr(model, "imgsz") else None,
+        "accuracy": round(correct / len(labels), 4),
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "no_face": no_face,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cena inteira vs. recorte do rosto')
+    parser.add_argument('--frame-model', default='best.pt')
+    parser.add_argument('--crop-model', default='models/anti_spoofing_crop_cls.pt')
+    parser.add_argument('--frame-imgsz', type=int, default=0)
+    parser.add_argument('--crop-imgsz', type=int, default=128)
+    parser.add_argument('--frame-invert', action='store_true', default=True,
+                        help='Modelo de cena inteira com classes invertidas (padrão do best.pt)')
+    parser.add_argument('--no-frame-invert', dest='frame_invert', action='store_false')
+    parser.add_argument('--crop-invert', action='store_true',
+                        help='Modelo de recortes com classes invertidas')
+    parser.add_argument('--split-folder', default=SPLIT_FOLDER)
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--output', help='Arquivo JSON de saída')
+    args = parser.parse_args()
+
+    images, labels = load_split(args.split_folder, 'test', args.limit)
+    if not images:
+        print(f"[ERRO] Nenhuma imagem rotulada em {args.split_folder}/test")
+        exit(1)
+
+    results = [
+        run("frame", load_backend(args.frame_model, imgsz=args.frame_imgsz), images, labels, args.frame_invert),
+        run("face_crop", load_backend(args.crop_model, imgsz=args.crop_imgsz), images, labels, args.crop_invert,
+            prepare=crop_face),
+    ]
+
+    print(f"\n{len(images)} imagens de teste")
+    print(f"{'modo':<10} {'imgsz':>6} {'acc':>7} {'p50 (ms)':>9} {'p95 (ms)':>9} {'sem rosto':>10}")
+    for r in results:
+        print(f"{r['mode']:<10} {str(r['imgsz']):>6} {r['accuracy']:>7.4f} {r['latency_p50_ms']:>9} "
+              f"{r['latency_p95_ms']:>9} {r['no_face']:>10}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
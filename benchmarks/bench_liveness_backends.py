@@ -0,0 +1,162 @@
+"""
+Benchmark dos backends do classificador de liveness (torch, onnx, openvino).
+
+Cada backend roda num subprocesso próprio, para medir de forma isolada o tempo de
+import + carga, a memória residente (pico) e a latência por batch. As probabilidades
+são comparadas com as do backend torch (diferença absoluta máxima): acima de
+--max-diff o script sai com código 1, para que uma divergência de pré-processamento ou
+de exportação não mude decisões perto de REAL_THRESHOLD/SPOOF_THRESHOLD.
+
+Exemplo:
+    python benchmarks/bench_liveness_backends.py \\
+        --torch best.pt --onnx best.onnx --openvino best_openvino_model \\
+        --images Dataset/SplitData/test/images --output bench_backends.json
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def load_frames(images_dir, count, seed=0):
+    import cv2
+    import numpy as np
+
+    frames = []
+    if images_dir:
+        names = sorted(f for f in os.listdir(images_dir) if f.lower().endswith(('.jpg', '.jpeg', '.png')))
+        for name in names[:count]:
+            frame = cv2.imread(os.path.join(images_dir, name))
+            if frame is not None:
+                frames.append(frame)
+
+    rng = np.random.default_rng(seed)
+    while len(frames) < count:
+        frames.append(rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8))
+
+    return frames
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * p / 100.0
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def run_worker(backend, model_path, args):
+    """Executado no subprocesso: mede um único backend e imprime JSON."""
+    frames = load_frames(args.images, args.frames)
+
+    start = time.perf_counter()
+    from liveness_backend import load_backend
+    model = load_backend(model_path, backend=backend, imgsz=args.imgsz)
+    load_seconds = time.perf_counter() - start
+
+    # warmup
+    for _ in range(args.warmup):
+        model.predict(frames[:1])
+
+    latencies = {}
+    for batch_size in args.batch_sizes:
+        batch = frames[:batch_size]
+        samples = []
+        for _ in range(args.iterations):
+            t0 = time.perf_counter()
+            model.predict(batch)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+        latencies[str(batch_size)] = {
+            "p50_ms": round(percentile(samples, 50), 3),
+            "p95_ms": round(percentile(samples, 95), 3),
+            "per_frame_ms": round(percentile(samples, 50) / batch_size, 3),
+        }
+
+    probs = model.predict(frames)
+
+    print(json.dumps({
+        "backend": backend,
+        "model": model_path,
+        "import_and_load_s": round(load_seconds, 3),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+        "latency": latencies,
+        "probs": probs,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dos backends de liveness')
+    parser.add_argument('--torch', help='Modelo PyTorch (best.pt)')
+    parser.add_argument('--onnx', help='Modelo ONNX (best.onnx)')
+    parser.add_argument('--openvino', help='Modelo OpenVINO (diretório ou .xml)')
+    parser.add_argument('--images', help='Pasta com imagens reais (padrão: frames sintéticos)')
+    parser.add_argument('--frames', type=int, default=16, help='Número de frames de teste')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 6])
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--imgsz', type=int, default=0)
+    parser.add_argument('--output', help='Arquivo JSON de saída')
+    parser.add_argument('--max-diff', type=float, default=0.01,
+                        help='Diferença máxima de probabilidade em relação ao torch')
+    parser.add_argument('--worker', nargs=2, metavar=('BACKEND', 'MODEL'), help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    args.frames = max(args.frames, max(args.batch_sizes))
+
+    if args.worker:
+        run_worker(args.worker[0], args.worker[1], args)
+        return
+
+    targets = [(name, path) for name, path in
+               (("torch", args.torch), ("onnx", args.onnx), ("openvino", args.openvino)) if path]
+    if not targets:
+        parser.error("informe pelo menos um modelo (--torch, --onnx ou --openvino)")
+
+    passthrough = sys.argv[1:]
+    results = []
+    for backend, path in targets:
+        print(f"[BENCH] {backend}: {path}")
+        cmd = [sys.executable, os.path.abspath(__file__), *passthrough, '--worker', backend, path]
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=ROOT)
+        if proc.returncode != 0:
+            print(f"[ERRO] {backend} falhou:\n{proc.stderr.decode(errors='replace')}")
+            continue
+        results.append(json.loads(proc.stdout.decode().strip().splitlines()[-1]))
+
+    # equivalência numérica em relação ao torch
+    reference = next((r for r in results if r["backend"] == "torch"), None)
+    for result in results:
+        if reference is not None:
+            diff = max(abs(a - b) for ra, rb in zip(result["probs"], reference["probs"]) for a, b in zip(ra, rb))
+            result["max_abs_diff_vs_torch"] = round(diff, 6)
+        del result["probs"]
+
+    print(f"\n{'backend':<10} {'load (s)':>9} {'RSS (MB)':>9} " +
+          " ".join(f"{'b' + b + ' p50 (ms)':>14}" for b in map(str, args.batch_sizes)) + f" {'diff':>9}")
+    for r in results:
+        print(f"{r['backend']:<10} {r['import_and_load_s']:>9} {r['max_rss_mb']:>9} " +
+              " ".join(f"{r['latency'][str(b)]['p50_ms']:>14}" for b in args.batch_sizes) +
+              f" {r.get('max_abs_diff_vs_torch', '-'):>9}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n[OK] Relatório salvo em: {args.output}")
+
+    divergent = [r for r in results if r.get('max_abs_diff_vs_torch', 0.0) > args.max_diff]
+    for r in divergent:
+        print(f"[ERRO] {r['backend']}: diferença {r['max_abs_diff_vs_torch']} > {args.max_diff} em relação ao torch")
+    if divergent:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+"""
+Teste de carga ponta a ponta do app Flask, offline e só com CPU.
+
+Sobe o app no próprio processo (servidor threaded do Werkzeug numa porta local), com
+o MongoDB substituído por um mongomock em memória, e dispara --concurrency clientes
+HTTP (keep-alive) contra cada cenário durante --duration segundos:
+
+    toxin_list     GET  /toxin?nivel=...
+    toxin_create   POST /toxin
+    verify_image   POST /verify  (JSON, imagem_base64)
+    verify_mp4     POST /verify  (multipart, video/mp4)
+    verify_webm    POST /verify  (multipart, video/webm; conversão pelo ffmpeg)
+    register       POST /register
+
+Entradas sintéticas, geradas a partir de --seed: rostos desenhados (pele, olhos,
+sobrancelhas, nariz e boca com geometria e tons variados) e clipes curtos com leve
+movimento de câmera. A galeria recebe --gallery-size usuários: os rostos de teste
+(com o encoding real calculado pelo face_recognition, para que o /verify encontre o
+usuário) e o restante com encodings aleatórios. Com --faces-dir, fotos reais
+substituem os rostos desenhados.
+
+O relatório (--output, JSON) traz, por cenário, vazão, latências média/p50/p95/p99/máx
+e a distribuição de status HTTP. Cada cenário tem os status que provam que a requisição
+percorreu o pipeline completo (END_TO_END_STATUS: ex. 200/403 no /verify com vídeo, ou
+seja, decisão de liveness e reconhecimento); um 400 "nenhum rosto" mede só a detecção.
+O benchmark sai com código 1 se algum cenário não tiver nenhuma resposta ponta a ponta
+(rostos sintéticos não detectados pelo HOG do dlib: use --faces-dir com fotos reais) ou,
+com --baseline, se a vazão cair ou o p95 subir mais que --max-regression em relação a um
+relatório anterior.
+
+Dependências extras: pip install -r benchmarks/requirements.txt (mongomock) e, para o
+cenário webm, o ffmpeg.
+
+Exemplo:
+    python benchmarks/bench_load.py --gallery-size 1000 --concurrency 8 --duration 15 --output load.json
+    python benchmarks/bench_load.py --scenarios verify_image toxin_list --baseline load.json
+"""
+import argparse
+import base64
+import http.client
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCENARIOS = ["toxin_list", "toxin_create", "verify_image", "verify_mp4", "verify_webm", "register"]
+
+# status que só saem depois do pipeline completo de cada cenário
+# (403: liveness decidiu; 409: encoding calculado e galeria percorrida)
+END_TO_END_STATUS = {
+    "toxin_list": {200},
+    "toxin_create": {201},
+    "verify_image": {200},
+    "verify_mp4": {200, 403},
+    "verify_webm": {200, 403},
+    "register": {201, 409},
+}
+
+# cenários que dependem de um rosto detectável
+FACE_SCENARIOS = {"verify_image", "verify_mp4", "verify_webm", "register"}
+
+
+# ============================
+# ENTRADAS SINTÉTICAS
+# ============================
+
+def synthetic_face(seed, size=480):
+    """Rosto frontal desenhado (BGR), com geometria e cores derivadas de `seed`."""
+    rng = np.random.default_rng(seed)
+    background = rng.integers(60, 200, size=3)
+    img = np.empty((size, size, 3), np.uint8)
+    img[:] = background
+    img = cv2.add(img, rng.integers(0, 25, size=img.shape, dtype=np.uint8))
+
+    cx, cy = size // 2 + int(rng.integers(-15, 16)), size // 2 + int(rng.integers(-10, 11))
+    fw, fh = int(size * rng.uniform(0.22, 0.28)), int(size * rng.uniform(0.30, 0.36))
+    skin = tuple(int(c) for c in rng.uniform([90, 120, 160], [170, 190, 235]))
+    hair = tuple(int(c) for c in rng.uniform(10, 90, size=3))
+
+    # pescoço, cabelo e rosto
+    cv2.rectangle(img, (cx - fw // 2, cy + fh // 2), (cx + fw // 2, size), skin, -1)
+    cv2.ellipse(img, (cx, cy - fh // 6), (int(fw * 1.08), int(fh * 0.95)), 0, 180, 360, hair, -1)
+    cv2.ellipse(img, (cx, cy), (fw, fh), 0, 0, 360, skin, -1)
+
+    # olhos e sobrancelhas
+    eye_dx, eye_y = int(fw * rng.uniform(0.36, 0.46)), cy - int(fh * rng.uniform(0.12, 0.22))
+    eye_w, eye_h = int(fw * 0.20), int(fh * 0.07)
+    iris = tuple(int(c) for c in rng.uniform(20, 120, size=3))
+    for side in (-1, 1):
+        ex = cx + side * eye_dx
+        cv2.ellipse(img, (ex, eye_y), (eye_w, eye_h), 0, 0, 360, (235, 235, 235), -1)
+        cv2.circle(img, (ex, eye_y), int(eye_h * 0.9), iris, -1)
+        cv2.circle(img, (ex, eye_y), int(eye_h * 0.4), (10, 10, 10), -1)
+        brow_y = eye_y - int(fh * rng.uniform(0.12, 0.17))
+        cv2.line(img, (ex - eye_w, brow_y + 4), (ex + eye_w, brow_y - 2 * side), hair, max(3, eye_h // 2))
+
+    # nariz e boca
+    nose_len = int(fh * rng.uniform(0.22, 0.30))
+    shadow = tuple(int(c * 0.7) for c in skin)
+    cv2.line(img, (cx, eye_y + eye_h), (cx - 6, eye_y + nose_len), shadow, 4)
+    cv2.ellipse(img, (cx, eye_y + nose_len), (int(fw * 0.14), int(fh * 0.04)), 0, 0, 180, shadow, 3)
+    mouth_y = cy + int(fh * rng.uniform(0.40, 0.50))
+    lips = tuple(int(c) for c in rng.uniform([60, 60, 140], [110, 110, 200]))
+    cv2.ellipse(img, (cx, mouth_y), (int(fw * rng.uniform(0.30, 0.42)), int(fh * 0.07)), 0, 0, 180, lips, -1)
+
+    return cv2.GaussianBlur(img, (5, 5), 0)
+
+
+def load_faces(faces_dir, count, seed):
+    """Fotos de --faces-dir (se houver) ou rostos sintéticos."""
+    if faces_dir:
+        names = sorted(n for n in os.listdir(faces_dir) if n.lower().endswith((".jpg", ".jpeg", ".png")))
+        faces = [cv2.imread(os.path.join(faces_dir, n)) for n in names[:count]]
+        faces = [f for f in faces if f is not None]
+        if faces:
+            return faces
+    return [synthetic_face(seed + i) for i in range(count)]
+
+
+def encode_jpeg_base64(frame):
+    ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return base64.b64encode(jpeg.tobytes()).decode()
+
+
+def write_clip(face, path, fourcc, frames=30, fps=15, seed=0):
+    """Clipe curto do rosto com leve deslocamento/zoom de câmera e ruído de sensor."""
+    rng = np.random.default_rng(seed)
+    h, w = face.shape[:2]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, (w, h))
+    if not writer.isOpened():
+        raise RuntimeError(f"OpenCV não grava {fourcc} ({path})")
+    for i in range(frames):
+        t = i / max(1, frames - 1)
+        scale = 1.0 + 0.04 * np.sin(2 * np.pi * t)
+        matrix = cv2.getRotationMatrix2D((w / 2, h / 2), 1.5 * np.sin(4 * np.pi * t), scale)
+        matrix[:, 2] += (6 * np.sin(2 * np.pi * t), 4 * np.cos(2 * np.pi * t))
+        frame = cv2.warpAffine(face, matrix, (w, h), borderMode=cv2.BORDER_REFLECT)
+        noise = rng.normal(0, 3, frame.shape)
+        writer.write(np.clip(frame + noise, 0, 255).astype(np.uint8))
+    writer.release()
+
+
+def video_payload(path, content_type):
+    boundary = uuid.uuid4().hex
+    with open(path, "rb") as f:
+        data = f.read()
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="video"; filename="{os.path.basename(path)}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def json_payload(data):
+    return json.dumps(data).encode(), "application/json"
+
+
+# ============================
+# MONGODB LOCAL
+# ============================
+
+def install_mongo_standin():
+    """Troca o cliente do database.py por um mongomock em memória (antes de importar o app)."""
+    import mongomock
+    import database
+
+    database._client = mongomock.MongoClient()
+    database._client_pid = os.getpid()
+    return database
+
+
+def seed_gallery(database, face_recognition, faces, gallery_size, seed):
+    """
+    Usuários com os encodings reais dos rostos de teste + encodings aleatórios até
+    `gallery_size`. Retorna quantos rostos de teste tiveram um rosto detectado.
+    """
+    rng = np.random.default_rng(seed)
+    thumbnail = encode_jpeg_base64(cv2.resize(faces[0], (96, 96)))
+
+    users, detected = [], 0
+    for i, face in enumerate(faces):
+        encodings = face_recognition.face_encodings(cv2.cvtColor(face, cv2.COLOR_BGR2RGB))
+        if encodings:
+            detected += 1
+            users.append({"nome": f"probe-{i}", "nivel": 1, "face_encoding": encodings[0].tolist(),
+                          "imagem_base64": thumbnail})
+
+    # encodings do dlib têm norma próxima de 1; vetores aleatórios ficam longe (> 0.45) entre si
+    while len(users) < gallery_size:
+        encoding = rng.normal(0.0, 0.09, 128)
+        users.append({"nome": f"seed-{len(users)}", "nivel": int(rng.integers(1, 3)),
+                      "face_encoding": encoding.tolist(), "imagem_base64": thumbnail})
+
+    collection = database._get_collection()
+    collection.delete_many({})
+    if users:
+        collection.insert_many(users)
+
+    toxins = database._get_db().toxin
+    toxins.delete_many({})
+    toxins.insert_many([{"nome": f"toxina-{i}", "tipo": "quimica", "periculosidade": i % 5 + 1,
+                         "nivel": i % 3 + 1, "criado_em": "01/01/2025 00:00:00"} for i in range(200)])
+    return detected
+
+
+# ============================
+# CARGA
+# ============================
+
+def request(conn, method, path, body=None, content_type=None):
+    headers = {"Content-Type": content_type} if content_type else {}
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+def make_scenarios(faces, register_faces, clips):
+    """Cenário -> função(i) que monta (método, caminho, corpo, content-type) da i-ésima requisição."""
+    face_bodies = [json_payload({"imagem_base64": encode_jpeg_base64(f)}) for f in faces]
+    register_images = [encode_jpeg_base64(f) for f in register_faces]
+    run_id = uuid.uuid4().hex[:8]
+
+    def register(i):
+        body = {"nome": f"load-{run_id}-{i}", "nivel": 1 + i % 2,
+                "imagem_base64": register_images[i % len(register_images)]}
+        return ("POST", "/register") + json_payload(body)
+
+    def toxin_create(i):
+        body = {"nome": f"toxina-{run_id}-{i}", "tipo": "biologica", "periculosidade": i % 5 + 1, "nivel": i % 3 + 1}
+        return ("POST", "/toxin") + json_payload(body)
+
+    scenarios = {
+        "toxin_list": lambda i: ("GET", f"/toxin?nivel={i % 3 + 1}", None, None),
+        "toxin_create": toxin_create,
+        "verify_image": lambda i: ("POST", "/verify") + face_bodies[i % len(face_bodies)],
+        "register": register,
+    }
+    for name, payloads in clips.items():
+        scenarios[name] = lambda i, payloads=payloads: ("POST", "/verify") + payloads[i % len(payloads)]
+    return scenarios
+
+
+def run_scenario(port, build, concurrency, duration):
+    latencies, statuses, errors = [], {}, [0]
+    lock = threading.Lock()
+    counter = iter(range(10 ** 9))
+    deadline = time.monotonic() + duration
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+        while time.monotonic() < deadline:
+            with lock:
+                i = next(counter)
+            method, path, body, content_type = build(i)
+            start = time.perf_counter()
+            try:
+                status = request(conn, method, path, body, content_type)
+            except (OSError, http.client.HTTPException):
+                with lock:
+                    errors[0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+        conn.close()
+
+    start = time.perf_counter()
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in clients:
+        t.start()
+    for t in clients:
+        t.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "throughput_rps": len(latencies) / wall,
+        "mean_ms": float(np.mean(latencies)) * 1000 if latencies else 0.0,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+
+def warm_up(port, build, timeout):
+    """Uma requisição por vez até o cenário não responder 503 (modelos carregando)."""
+    deadline = time.monotonic() + timeout
+    status = None
+    while time.monotonic() < deadline:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+        status = request(conn, *build(0))
+        conn.close()
+        if status != 503:
+            return status
+        time.sleep(1.0)
+    raise RuntimeError(f"cenário ainda responde 503 após {timeout:.0f} s")
+
+
+def start_server(app, port):
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def compare(report, baseline, max_regression):
+    """Regressões de vazão e p95 em relação a um relatório anterior."""
+    failures = []
+    for name, result in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base or not base.get("requests"):
+            continue
+        if result["throughput_rps"] < base["throughput_rps"] * (1 - max_regression):
+            failures.append(f"{name}: vazão {result['throughput_rps']:.2f} < {base['throughput_rps']:.2f} req/s")
+        if result["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            failures.append(f"{name}: p95 {result['p95_ms']:.1f} > {base['p95_ms']:.1f} ms")
+    return failures
+
+
+def main():
+    cpu = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description='Teste de carga ponta a ponta (Flask + mongomock, offline)')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--gallery-size', type=int, default=1000, help='Usuários na galeria')
+    parser.add_argument('--faces', type=int, default=8, help='Rostos de teste (galeria e /verify)')
+    parser.add_argument('--faces-dir', help='Fotos reais no lugar dos rostos sintéticos')
+    parser.add_argument('--clip-frames', type=int, default=30)
+    parser.add_argument('--clip-fps', type=int, default=15)
+    parser.add_argument('--concurrency', type=int, default=max(2, cpu))
+    parser.add_argument('--duration', type=float, default=15.0, help='Segundos por cenário')
+    parser.add_argument('--port', type=int, default=5098)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ready-timeout', type=float, default=300.0)
+    parser.add_argument('--output', help='Relatório JSON')
+    parser.add_argument('--baseline', help='Relatório anterior para comparação')
+    parser.add_argument('--max-regression', type=float, default=0.20,
+                        help='Tolerância relativa de vazão/p95 em relação ao --baseline')
+    args = parser.parse_args()
+
+    # logs do servidor só a partir de WARNING (o relatório é a saída)
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+
+    database = install_mongo_standin()
+    from app import app
+    from startup import SUBSYSTEMS
+    from liveness_backend import LIVENESS_BACKEND
+
+    print("Carregando face_recognition...")
+    deadline = time.monotonic() + args.ready_timeout
+    face_recognition = SUBSYSTEMS["face_recognition"].get(timeout=args.ready_timeout)
+
+    faces = load_faces(args.faces_dir, args.faces, args.seed)
+    register_faces = [synthetic_face(args.seed + 10_000 + i) for i in range(32)]
+    detected = seed_gallery(database, face_recognition, faces, args.gallery_size, args.seed)
+    print(f"Galeria: {max(args.gallery_size, detected)} usuários ({detected}/{len(faces)} rostos de teste detectados)")
+    if not detected and FACE_SCENARIOS & set(args.scenarios):
+        print("Nenhum rosto de teste detectado pelo face_recognition: /verify e /register só mediriam "
+              "o caminho 400 'nenhum rosto'. Use --faces-dir com fotos reais.")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory(prefix="bench_load_") as tmp:
+        clips = {}
+        for name, ext, fourcc, content_type in (("verify_mp4", "mp4", "mp4v", "video/mp4"),
+                                                ("verify_webm", "webm", "VP80", "video/webm")):
+            if name not in args.scenarios:
+                continue
+            payloads = []
+            for i, face in enumerate(faces[:4]):
+                path = os.path.join(tmp, f"clip_{i}.{ext}")
+                write_clip(face, path, fourcc, args.clip_frames, args.clip_fps, seed=args.seed + i)
+                payloads.append(video_payload(path, content_type))
+            clips[name] = payloads
+
+        scenarios = make_scenarios(faces, register_faces, clips)
+        server = start_server(app, args.port)
+        results = {}
+        try:
+            for name in args.scenarios:
+                warm_status = warm_up(args.port, scenarios[name], max(1.0, deadline - time.monotonic()))
+                result = run_scenario(args.port, scenarios[name], args.concurrency, args.duration)
+                end_to_end = sum(n for status, n in result["statuses"].items()
+                                 if int(status) in END_TO_END_STATUS[name])
+                result["end_to_end_status"] = sorted(END_TO_END_STATUS[name])
+                result["end_to_end_share"] = end_to_end / result["requests"] if result["requests"] else 0.0
+                result["status_mix"] = {status: n / result["requests"] for status, n in result["statuses"].items()}
+                result["warmup_status"] = warm_status
+                results[name] = result
+                print(f"{name:<13} {result['throughput_rps']:8.2f} req/s  p50={result['p50_ms']:8.1f}  "
+                      f"p95={result['p95_ms']:8.1f}  p99={result['p99_ms']:8.1f} ms  "
+                      f"ponta a ponta={result['end_to_end_share']:.0%}  status={result['statuses']}")
+        finally:
+            server.shutdown()
+
+    report = {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "environment": {
+            "cpu_count": cpu,
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "liveness_backend": LIVENESS_BACKEND,
+        },
+        "config": {
+            "gallery_size": args.gallery_size,
+            "faces": len(faces),
+            "faces_detected": detected,
+            "synthetic_faces": not args.faces_dir,
+            "clip_frames": args.clip_frames,
+            "clip_fps": args.clip_fps,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nRelatório salvo em {args.output}")
+
+    shallow = [name for name, result in results.items() if result["end_to_end_share"] == 0]
+    for name in shallow:
+        print(f"SEM PONTA A PONTA {name}: nenhum status {sorted(END_TO_END_STATUS[name])} "
+              f"(status={results[name]['statuses']})")
+
+    failures = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(report, json.load(f), args.max_regression)
+        for failure in failures:
+            print(f"REGRESSÃO {failure}")
+        if not failures:
+            print(f"Sem regressões acima de {args.max_regression:.0%} em relação a {args.baseline}")
+
+    if shallow or failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Escalonamento da vazão com o número de workers do gunicorn.
+
+Para cada valor de --workers, sobe `gunicorn -c gunicorn.conf.py app:app` com
+WEB_CONCURRENCY=N numa porta local, aquece os workers e dispara --concurrency clientes
+HTTP (keep-alive) contra POST /verify durante --duration segundos. Reporta vazão,
+latências p50/p95 e a eficiência em relação ao escalonamento linear do primeiro valor.
+
+Carga padrão: imagem sintética (ruído, sem rosto) no fallback base64 do /verify. Exercita
+a decodificação e a detecção facial (HOG do dlib, CPU) e responde 400; não precisa de
+rosto cadastrado. Com --image, usa uma foto real (requer MongoDB configurado no .env
+para o reconhecimento). Com --video, envia o vídeo em multipart (liveness completo).
+
+Exemplo:
+    python benchmarks/bench_worker_scaling.py --workers 1 2 4 --duration 20
+"""
+import argparse
+import base64
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def synthetic_image_payload(width=640, height=480, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    frame = cv2.GaussianBlur(frame, (9, 9), 0)
+    ok, jpeg = cv2.imencode(".jpg", frame)
+    body = json.dumps({"imagem_base64": base64.b64encode(jpeg.tobytes()).decode()}).encode()
+    return body, "application/json"
+
+
+def image_payload(path):
+    with open(path, "rb") as f:
+        body = json.dumps({"imagem_base64": base64.b64encode(f.read()).decode()}).encode()
+    return body, "application/json"
+
+
+def video_payload(path):
+    boundary = uuid.uuid4().hex
+    content_type = "video/webm" if path.endswith(".webm") else "video/mp4"
+    with open(path, "rb") as f:
+        data = f.read()
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="video"; filename="{os.path.basename(path)}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def post(conn, body, content_type):
+    conn.request("POST", "/verify", body=body, headers={"Content-Type": content_type})
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+def start_server(workers, port, extra_env):
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_BIND=f"127.0.0.1:{port}", **extra_env)
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(port, body, content_type, workers, timeout):
+    """Espera o /healthz e aquece: requisições até nenhuma responder 503 (modelos carregando)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/healthz")
+            if conn.getresponse().status == 200:
+                break
+        except OSError:
+            time.sleep(0.5)
+    else:
+        raise RuntimeError("servidor não respondeu ao /healthz")
+
+    # várias conexões em paralelo para alcançar todos os workers
+    while time.monotonic() < deadline:
+        statuses = []
+
+        def warm():
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+            statuses.append(post(conn, body, content_type))
+
+        clients = [threading.Thread(target=warm) for _ in range(workers * 2)]
+        for t in clients:
+            t.start()
+        for t in clients:
+            t.join()
+        if 503 not in statuses:
+            return
+        time.sleep(1.0)
+    raise RuntimeError("workers não ficaram prontos (503)")
+
+
+def run_load(port, body, content_type, concurrency, duration):
+    latencies, statuses, errors = [], {}, [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                status = post(conn, body, content_type)
+            except (OSError, http.client.HTTPException):
+                with lock:
+                    errors[0] += 1
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in clients:
+        t.start()
+    for t in clients:
+        t.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "throughput_rps": len(latencies) / wall,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+    }
+
+
+def main():
+    cpu = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description='Vazão do /verify por número de workers do gunicorn')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, max(1, cpu // 4), max(1, cpu // 2), cpu}))
+    parser.add_argument('--concurrency', type=int, default=2 * cpu,
+                        help='Clientes simultâneos (o mesmo em todas as rodadas)')
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--image', help='Foto (JPEG/PNG) enviada como imagem_base64')
+    parser.add_argument('--video', help='Vídeo (mp4/webm) enviado em multipart')
+    parser.add_argument('--threads-per-worker', type=int,
+                        help='CV_THREADS_PER_WORKER (padrão: núcleos / workers)')
+    parser.add_argument('--ready-timeout', type=float, default=180.0)
+    parser.add_argument('--output', help='Arquivo JSON de saída')
+    args = parser.parse_args()
+
+    if args.video:
+        body, content_type = video_payload(args.video)
+    elif args.image:
+        body, content_type = image_payload(args.image)
+    else:
+        body, content_type = synthetic_image_payload()
+
+    extra_env = {}
+    if args.threads_per_worker:
+        extra_env["CV_THREADS_PER_WORKER"] = str(args.threads_per_worker)
+
+    results = []
+    for workers in args.workers:
+        server = start_server(workers, args.port, extra_env)
+        try:
+            wait_ready(args.port, body, content_type, workers, args.ready_timeout)
+            result = run_load(args.port, body, content_type, args.concurrency, args.duration)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+        result["workers"] = workers
+        results.append(result)
+        print(f"workers={workers:<3} {result['throughput_rps']:8.2f} req/s  "
+              f"p50={result['p50_ms']:7.1f} ms  p95={result['p95_ms']:7.1f} ms  status={result['statuses']}")
+
+    base = results[0]
+    print(f"\n{'workers':>8} {'req/s':>9} {'speedup':>8} {'eficiência':>11}")
+    for result in results:
+        speedup = result["throughput_rps"] / base["throughput_rps"] if base["throughput_rps"] else 0.0
+        ideal = result["workers"] / base["workers"]
+        result["speedup"] = speedup
+        result["efficiency"] = speedup / ideal
+        print(f"{result['workers']:>8} {result['throughput_rps']:>9.2f} {speedup:>7.2f}x {result['efficiency']:>10.0%}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"cpu_count": cpu, "concurrency": args.concurrency, "duration_s": args.duration,
+                       "results": results}, f, indent=2)
+        print(f"\nResultados salvos em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
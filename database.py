@@ -1,69 +1,130 @@
 import os
 from dotenv import load_dotenv
-from pymongo import MongoClient
+import pymongo
+from pymongo import MongoClient, monitoring
 from datetime import datetime
 from bson.regex import Regex
 from re import compile
 from bson.objectid import ObjectId
 from typing import Union
+import threading
 import certifi
 
+from tracing import start_span
+
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME", "face_auth")
 COLLECTION_NAME = os.getenv("COLLECTION_NAME", "users")
 
-client = MongoClient(MONGO_URI, tlsCAFile=certifi.where())
-db = client[DB_NAME]
-collection = db[COLLECTION_NAME]
+
+class TraceCommandListener(monitoring.CommandListener):
+    """Registra cada comando do MongoDB como span do trace da requisição (se houver)."""
+
+    def __init__(self):
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        span = start_span(f"mongo.{event.command_name}", database=event.database_name)
+        if span is not None:
+            with self._lock:
+                self._spans[event.request_id] = span
+
+    def _finish(self, event):
+        if not self._spans:
+            return
+        with self._lock:
+            span = self._spans.pop(event.request_id, None)
+        if span is not None:
+            span.finish()
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+
+# cliente criado no primeiro uso (não no import): startup rápido e seguro após fork
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def _get_db():
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = MongoClient(MONGO_URI, tlsCAFile=certifi.where(),
+                                      event_listeners=[TraceCommandListener()])
+                _client_pid = os.getpid()
+    return _client[DB_NAME]
+
+
+def _get_collection():
+    return _get_db()[COLLECTION_NAME]
+
+
+def verificar_conexao(timeout: float = 2.0) -> bool:
+    """
+    Verifica se o MongoDB responde (ping) em até `timeout` segundos. Usado pelo /readyz.
+    """
+    try:
+        with pymongo.timeout(timeout):
+            _get_db().command("ping")
+        return True
+    except Exception:
+        return False
 
 
 def salvar_usuario(nome: str, nivel: int, face_encoding: list, imagem_base64: str) -> dict:
     """
     Salva um novo usuário e retorna o usuário criado com o ID.
     """
-    result = collection.insert_one({
+    result = _get_collection().insert_one({
         "nome": nome,
         "nivel": nivel,
         "face_encoding": face_encoding,
         "imagem_base64": imagem_base64
     })
-    usuario = collection.find_one({"_id": result.inserted_id})
+    usuario = _get_collection().find_one({"_id": result.inserted_id})
     if usuario:
         usuario['_id'] = str(usuario['_id'])
     return usuario
 
 
 def buscar_todos_encodings():
-    usuarios = list(collection.find({}, {"_id": 0}))
+    usuarios = list(_get_collection().find({}, {"_id": 0}))
     return usuarios
 
 def buscar_todos_encodings_com_id():
     """
     Busca todos os usuários com seus IDs incluídos.
     """
-    usuarios = list(collection.find({}))
+    usuarios = list(_get_collection().find({}))
     for usuario in usuarios:
         usuario['_id'] = str(usuario['_id'])
     return usuarios
 
 
 def buscar_por_nome(nome: str):
-    return collection.find_one({"nome": nome}, {"_id": 0})
+    return _get_collection().find_one({"nome": nome}, {"_id": 0})
 
 def buscar_usuario_por_nome(nome: str):
     """
     Busca um usuário por nome e retorna com _id.
     """
-    return collection.find_one({"nome": nome})
+    return _get_collection().find_one({"nome": nome})
 
 def buscar_usuario_por_id(id: str) -> Union[dict, None]:
     """
     Busca um usuário por ID do MongoDB.
     """
     try:
-        usuario = collection.find_one({"_id": ObjectId(id)})
+        usuario = _get_collection().find_one({"_id": ObjectId(id)})
         if usuario:
             usuario['_id'] = str(usuario['_id'])
         return usuario
@@ -76,7 +137,7 @@ def remover_usuario(id: str) -> bool:
     Retorna True se o usuário foi removido, False caso contrário.
     """
     try:
-        result = collection.delete_one({"_id": ObjectId(id)})
+        result = _get_collection().delete_one({"_id": ObjectId(id)})
         return result.deleted_count > 0
     except:
         return False
@@ -86,25 +147,25 @@ def verificar_usuario_nivel_3():
     Verifica se já existe um usuário de nível 3 cadastrado.
     Retorna True se existir, False caso contrário.
     """
-    usuario = collection.find_one({"nivel": 3})
+    usuario = _get_collection().find_one({"nivel": 3})
     return usuario is not None
 
 def armarzenar_toxicina(toxin: dict) -> None:
     criado_em = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
 
-    db.toxin.insert_one({
+    _get_db().toxin.insert_one({
         **toxin,
         "criado_em": criado_em
     })
     
 
 def procurar_toxina_por_id(id: str) -> Union[dict, None]:
-    return db.toxin.find_one({
+    return _get_db().toxin.find_one({
         "_id": ObjectId(id)
     })
 
 def atualizar_toxina(id: str, toxina: dict) -> None:
-    db.toxin.update_one(
+    _get_db().toxin.update_one(
         {
             "_id": ObjectId(id)
         },
@@ -116,11 +177,14 @@ def atualizar_toxina(id: str, toxina: dict) -> None:
     )
 
 def remover_toxina(id: str) -> None:
-    db.toxin.delete_one({
+    _get_db().toxin.delete_one({
         "_id": ObjectId(id)
     })
 
-def listar_toxinas(params: dict) -> list[dict]:
+def montar_filtro_toxinas(params: dict) -> dict:
+    """
+    Filtro do MongoDB para a listagem de toxinas (campos numéricos exatos, texto por trecho).
+    """
     numeric_fields = ['nivel', 'periculosidade']
 
     query = {}
@@ -135,8 +199,11 @@ def listar_toxinas(params: dict) -> list[dict]:
 
         query[field] = Regex.from_native(compile(f".*{params[field]}.*"))
 
+    return query
+
 
-    toxins = db.toxin.find(query).to_list()
+def listar_toxinas(params: dict) -> list[dict]:
+    toxins = list(_get_db().toxin.find(montar_filtro_toxinas(params)))
 
     for i in range(len(toxins)):
         toxins[i]['_id'] = str(toxins[i]['_id'])
@@ -147,7 +214,7 @@ def buscar_toxinas_por_nivel_maximo(nivel_maximo: int) -> list[dict]:
     """
     Busca toxinas com nível menor ou igual ao nível máximo fornecido.
     """
-    toxins = list(db.toxin.find({"nivel": {"$lte": nivel_maximo}}))
+    toxins = list(_get_db().toxin.find({"nivel": {"$lte": nivel_maximo}}))
     
     for i in range(len(toxins)):
         toxins[i]['_id'] = str(toxins[i]['_id'])
@@ -0,0 +1,117 @@
+"""
+Versão assíncrona (asyncio) das funções de database.py usadas pelas rotas de I/O
+da camada ASGI (asgi.py): toxinas e usuários.
+
+Usa o driver assíncrono nativo do pymongo (AsyncMongoClient): enquanto a consulta
+espera o MongoDB, o event loop atende outras requisições, sem ocupar uma thread.
+Mesmos documentos e formatos de retorno de database.py.
+"""
+import os
+from datetime import datetime
+from typing import Union
+
+from bson.objectid import ObjectId
+from pymongo import AsyncMongoClient
+import certifi
+
+from database import MONGO_URI, DB_NAME, COLLECTION_NAME, TraceCommandListener, montar_filtro_toxinas
+
+# cliente criado no primeiro uso, dentro do event loop do processo (seguro após fork)
+_client = None
+_client_pid = None
+
+
+def _get_db():
+    global _client, _client_pid
+    # um único event loop por processo: sem lock (não há await entre o teste e a criação)
+    if _client is None or _client_pid != os.getpid():
+        _client = AsyncMongoClient(MONGO_URI, tlsCAFile=certifi.where(),
+                                   event_listeners=[TraceCommandListener()])
+        _client_pid = os.getpid()
+    return _client[DB_NAME]
+
+
+def _get_collection():
+    return _get_db()[COLLECTION_NAME]
+
+
+async def fechar_conexao() -> None:
+    """Fecha o cliente (shutdown do servidor ASGI)."""
+    global _client
+    if _client is not None and _client_pid == os.getpid():
+        await _client.close()
+    _client = None
+
+
+async def buscar_usuario_por_id(id: str) -> Union[dict, None]:
+    """
+    Busca um usuário por ID do MongoDB.
+    """
+    try:
+        usuario = await _get_collection().find_one({"_id": ObjectId(id)})
+        if usuario:
+            usuario['_id'] = str(usuario['_id'])
+        return usuario
+    except Exception:
+        return None
+
+
+async def remover_usuario(id: str) -> bool:
+    """
+    Remove um usuário pelo ID do MongoDB.
+    Retorna True se o usuário foi removido, False caso contrário.
+    """
+    try:
+        result = await _get_collection().delete_one({"_id": ObjectId(id)})
+        return result.deleted_count > 0
+    except Exception:
+        return False
+
+
+async def armarzenar_toxicina(toxin: dict) -> None:
+    criado_em = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+
+    await _get_db().toxin.insert_one({
+        **toxin,
+        "criado_em": criado_em
+    })
+
+
+async def procurar_toxina_por_id(id: str) -> Union[dict, None]:
+    return await _get_db().toxin.find_one({
+        "_id": ObjectId(id)
+    })
+
+
+async def atualizar_toxina(id: str, toxina: dict) -> None:
+    await _get_db().toxin.update_one(
+        {"_id": ObjectId(id)},
+        {"$set": {**toxina}}
+    )
+
+
+async def remover_toxina(id: str) -> None:
+    await _get_db().toxin.delete_one({
+        "_id": ObjectId(id)
+    })
+
+
+async def listar_toxinas(params: dict) -> list[dict]:
+    toxins = await _get_db().toxin.find(montar_filtro_toxinas(params)).to_list()
+
+    for toxin in toxins:
+        toxin['_id'] = str(toxin['_id'])
+
+    return toxins
+
+
+async def buscar_toxinas_por_nivel_maximo(nivel_maximo: int) -> list[dict]:
+    """
+    Busca toxinas com nível menor ou igual ao nível máximo fornecido.
+    """
+    toxins = await _get_db().toxin.find({"nivel": {"$lte": nivel_maximo}}).to_list()
+
+    for toxin in toxins:
+        toxin['_id'] = str(toxin['_id'])
+
+    return toxins
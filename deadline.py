@@ -0,0 +1,97 @@
+"""
+Prazo (deadline) por requisição, propagado por todo o pipeline de verificação.
+
+O prazo vem do cabeçalho DEADLINE_HEADER (segundos a partir da chegada da requisição)
+ou de DEADLINE_DEFAULT_SECONDS, limitado a DEADLINE_MAX_SECONDS. Fica num contextvar,
+então vale também nas tarefas dos pools (inference_server.WorkerPool copia o contexto).
+
+Os estágios chamam check_deadline(estágio) nos seus laços (transcodificação, leitura de
+frames, batches do YOLO, espera na admissão); com o prazo esgotado levantam
+DeadlineExceeded, e a requisição termina com 504 em vez de continuar consumindo CPU
+para um cliente que já desistiu.
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# ============================
+# CONFIGURAÇÕES
+# ============================
+
+# cabeçalho com o prazo do cliente, em segundos
+DEADLINE_HEADER = os.getenv("DEADLINE_HEADER", "X-Request-Timeout")
+
+# prazo sem o cabeçalho (0 = sem prazo)
+DEADLINE_DEFAULT_SECONDS = float(os.getenv("DEADLINE_DEFAULT_SECONDS", "30"))
+
+# maior prazo aceito do cliente (0 = sem limite)
+DEADLINE_MAX_SECONDS = float(os.getenv("DEADLINE_MAX_SECONDS", "120"))
+
+
+class DeadlineExceeded(Exception):
+    """Prazo da requisição esgotado; `stage` é o estágio que desistiu."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Prazo da requisição esgotado em {stage}")
+        self.stage = stage
+
+
+# instante (time.monotonic) em que o prazo termina; None = sem prazo
+_DEADLINE: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+def seconds_from_headers(headers) -> Optional[float]:
+    """Prazo (s) pedido no cabeçalho, ou o padrão. None = sem prazo."""
+    seconds = DEADLINE_DEFAULT_SECONDS
+    value = headers.get(DEADLINE_HEADER) if DEADLINE_HEADER else None
+    if value:
+        try:
+            seconds = float(value)
+        except ValueError:
+            pass
+    if DEADLINE_MAX_SECONDS > 0:
+        seconds = min(seconds, DEADLINE_MAX_SECONDS) if seconds > 0 else DEADLINE_MAX_SECONDS
+    return seconds if seconds > 0 else None
+
+
+def set_deadline(seconds: Optional[float]):
+    """Define o prazo do contexto atual. Retorna o token para reset_deadline."""
+    return _DEADLINE.set(time.monotonic() + seconds if seconds is not None else None)
+
+
+def reset_deadline(token) -> None:
+    _DEADLINE.reset(token)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """Prazo próprio para o bloco (None = sem prazo)."""
+    token = set_deadline(seconds)
+    try:
+        yield
+    finally:
+        reset_deadline(token)
+
+
+def remaining() -> Optional[float]:
+    """Segundos restantes (pode ser negativo); None = sem prazo."""
+    deadline = _DEADLINE.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline(stage: str) -> None:
+    """Levanta DeadlineExceeded se o prazo da requisição já passou."""
+    deadline = _DEADLINE.get()
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded(stage)
+
+
+def timeout_for(limit: Optional[float] = None) -> Optional[float]:
+    """Menor entre `limit` e o tempo restante, para timeouts de subprocessos e esperas."""
+    left = remaining()
+    if left is None:
+        return limit
+    left = max(0.0, left)
+    return left if limit is None else min(limit, left)
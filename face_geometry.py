@@ -0,0 +1,27 @@
+"""
+Geometria do recorte de rosto compartilhada entre o servidor (utils.crop_face) e os
+scripts de coleta/treino (yolo_auto_train.py). Sem dependências além da biblioteca
+padrão, para que os scripts não importem os módulos do servidor.
+"""
+from typing import Tuple
+
+# margem adicionada ao bbox do rosto (% da largura/altura), igual à da coleta de dados
+OFFSET_W = 10
+OFFSET_H = 20
+
+
+def expand_face_bbox(x: int, y: int, w: int, h: int,
+                     offset_w: float = OFFSET_W, offset_h: float = OFFSET_H) -> Tuple[int, int, int, int]:
+    """
+    Expande o bbox do rosto com as margens usadas na coleta de dados
+    (mais espaço acima da cabeça) e evita valores negativos.
+    """
+    offsetW = (offset_w / 100) * w
+    x = int(x - offsetW)
+    w = int(w + offsetW * 2)
+
+    offsetH = (offset_h / 100) * h
+    y = int(y - offsetH * 3)
+    h = int(h + offsetH * 3.5)
+
+    return max(0, x), max(0, y), max(0, w), max(0, h)
@@ -0,0 +1,110 @@
+"""
+Servidor de produção: gunicorn com vários processos.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+ou, com a camada ASGI (asgi.py) em workers do uvicorn:
+
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py asgi:app
+
+- WEB_CONCURRENCY processos (padrão: metade dos núcleos), cada um com seu GIL,
+  seus pools e sua cópia do modelo de liveness.
+- GUNICORN_THREADS threads de requisição por processo (worker gthread; necessário
+  para /verify/ws e para a espera na fila de admissão).
+- CV_THREADS_PER_WORKER threads nativas (OpenMP/BLAS, OpenCV, ONNX Runtime/OpenVINO)
+  por processo, para que os processos juntos não passem do número de núcleos.
+- Com preload (GUNICORN_PRELOAD), o master importa app, face_recognition (pesos do
+  dlib) e a biblioteca do backend antes do fork: essas páginas são compartilhadas
+  copy-on-write entre os workers. A sessão do modelo de liveness é criada (e
+  aquecida) em cada worker, no post_fork: pools de threads de runtimes como
+  OpenMP e ONNX Runtime não sobrevivem ao fork.
+- Com mais de um worker, /admin/model/reload é recusado (só trocaria o modelo do
+  worker que atendeu a chamada): a troca é feita por MODEL_WATCH_INTERVAL, que
+  observa o arquivo em cada worker.
+"""
+import importlib
+import os
+
+CPU_COUNT = os.cpu_count() or 1
+
+# ============================
+# CONFIGURAÇÕES
+# ============================
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+
+workers = int(os.getenv("WEB_CONCURRENCY", str(max(1, CPU_COUNT // 2))))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# vídeo: upload + conversão + decodificação podem passar do padrão de 30 s
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# reciclar workers após N requisições (0 = nunca), com jitter para não reiniciarem juntos
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max(1, max_requests // 10) if max_requests > 0 else 0
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+
+# threads nativas por processo
+CV_THREADS_PER_WORKER = int(os.getenv("CV_THREADS_PER_WORKER", str(max(1, CPU_COUNT // workers))))
+
+
+# ============================
+# AMBIENTE DOS WORKERS
+# ============================
+
+# lidas no import das bibliotecas nativas e dos módulos do serviço: precisam estar
+# definidas antes do preload do app (valores explícitos do ambiente prevalecem)
+for _name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "LIVENESS_THREADS"):
+    os.environ.setdefault(_name, str(CV_THREADS_PER_WORKER))
+
+# limites por processo dimensionados para a fatia de núcleos do worker
+# (ADMISSION_MAX_CONCURRENT cobre requisições síncronas e jobs assíncronos)
+os.environ.setdefault("FACE_ENCODING_WORKERS", str(CV_THREADS_PER_WORKER))
+os.environ.setdefault("ADMISSION_MAX_CONCURRENT", str(CV_THREADS_PER_WORKER))
+os.environ.setdefault("ADMISSION_QUEUE_SIZE", str(threads))
+
+# lida pelo app para recusar /admin/model/reload com vários workers
+os.environ.setdefault("WEB_CONCURRENCY", str(workers))
+
+# a carga dos modelos é disparada pelos hooks abaixo, não pelo import do app
+os.environ["STARTUP_BACKGROUND_LOAD"] = "false"
+
+
+def when_ready(server):
+    """Master, antes do fork: importa as dependências pesadas para compartilhá-las."""
+    if not preload_app:
+        return
+
+    from liveness_backend import import_runtime, DEFAULT_MODEL_PATHS, LIVENESS_BACKEND
+
+    # import síncrono, na thread do master: SUBSYSTEMS carrega numa thread daemon, que
+    # poderia estar com o lock de import preso no momento do fork
+    try:
+        importlib.import_module("face_recognition")
+    except ImportError as e:
+        server.log.warning("face_recognition não pré-carregado no master: %s", e)
+
+    model_path = os.getenv("YOLO_MODEL_PATH") or DEFAULT_MODEL_PATHS.get(LIVENESS_BACKEND, "best.pt")
+    try:
+        import_runtime(model_path)
+    except ImportError as e:
+        server.log.warning("Runtime do modelo de liveness não pré-carregado: %s", e)
+
+
+def post_fork(server, worker):
+    """Worker recém-criado: threads nativas e carga + warmup do modelo em segundo plano."""
+    import cv2
+    cv2.setNumThreads(CV_THREADS_PER_WORKER)
+
+    from startup import start_background_loading
+    start_background_loading()
+
+    server.log.info("Worker %s: %s threads de requisição, %s threads nativas",
+                    worker.pid, threads, CV_THREADS_PER_WORKER)
@@ -0,0 +1,196 @@
+"""
+Servidor de inferência dentro do processo.
+
+- MicroBatcher: uma única thread dona do modelo consome uma fila de pedidos
+  (frames de requisições concorrentes), junta-os em micro-batches limitados por
+  tamanho máximo e tempo máximo de espera, executa um único forward pass e devolve
+  o resultado de cada pedido via Future.
+- WorkerPool: pool limitado para trabalho de CPU sem API em lote (encoding facial),
+  evitando que requisições concorrentes disputem todos os núcleos ao mesmo tempo.
+  As tarefas rodam no contexto (contextvars) de quem as submeteu.
+"""
+import contextvars
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+# ============================
+# CONFIGURAÇÕES
+# ============================
+
+# máximo de frames por micro-batch (somando requisições)
+MICROBATCH_MAX_FRAMES = int(os.getenv("MICROBATCH_MAX_FRAMES", "16"))
+
+# tempo máximo (ms) que o primeiro pedido espera por outros antes do forward pass
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "5"))
+
+# máximo de pedidos aguardando na fila
+MICROBATCH_QUEUE_SIZE = int(os.getenv("MICROBATCH_QUEUE_SIZE", "256"))
+
+# máximo de encodings faciais simultâneos
+FACE_ENCODING_WORKERS = int(os.getenv("FACE_ENCODING_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+# threads para estágios de I/O do /verify (ex.: busca da galeria no MongoDB)
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "8"))
+
+
+class _Request:
+    __slots__ = ("frames", "future", "key")
+
+    def __init__(self, frames: List, future: Future, key=None):
+        self.frames = frames
+        self.future = future
+        self.key = key
+
+
+class MicroBatcher:
+    """
+    Agrupa pedidos de inferência concorrentes em micro-batches.
+    `predict_fn(frames, key) -> list` é chamada apenas pela thread do batcher,
+    com um resultado por frame. Pedidos com chaves diferentes (ex.: versões do
+    modelo durante uma troca) nunca dividem o mesmo batch.
+    """
+
+    def __init__(self, predict_fn: Callable[[List, object], List], max_frames: int = MICROBATCH_MAX_FRAMES,
+                 max_wait_ms: float = MICROBATCH_MAX_WAIT_MS, queue_size: int = MICROBATCH_QUEUE_SIZE,
+                 name: str = "microbatcher"):
+        self.predict_fn = predict_fn
+        self.max_frames = max(1, max_frames)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+
+        self._queue: "queue.Queue[_Request]" = queue.Queue(maxsize=queue_size)
+        # pedido retirado da fila com chave diferente do batch anterior: abre o próximo
+        self._carry: Optional[_Request] = None
+        self._lock = threading.Lock()
+        self._worker_pid = None
+
+        self._batches = 0
+        self._frames = 0
+        self._requests = 0
+        self._errors = 0
+
+    def submit(self, frames: List, key=None) -> Future:
+        """Enfileira os frames e retorna um Future com um resultado por frame."""
+        self._ensure_worker()
+        future: Future = Future()
+        if not frames:
+            future.set_result([])
+            return future
+
+        self._queue.put(_Request(list(frames), future, key))
+        return future
+
+    def predict(self, frames: List, key=None) -> List:
+        """Versão bloqueante de submit."""
+        return self.submit(frames, key).result()
+
+    def _ensure_worker(self) -> None:
+        # a thread não sobrevive a fork (workers do gunicorn): reinicia quando o PID muda
+        if self._worker_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._worker_pid == os.getpid():
+                return
+            self._worker_pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._carry = None
+
+        thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        thread.start()
+
+    def _collect(self) -> List[_Request]:
+        first, self._carry = self._carry, None
+        if first is None:
+            first = self._queue.get()
+        batch = [first]
+        total = len(first.frames)
+        deadline = time.monotonic() + self.max_wait
+
+        while total < self.max_frames:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item.key is not first.key:
+                self._carry = item
+                break
+            batch.append(item)
+            total += len(item.frames)
+
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            frames = [frame for item in batch for frame in item.frames]
+
+            try:
+                outputs = self.predict_fn(frames, batch[0].key)
+            except Exception as e:
+                with self._lock:
+                    self._errors += 1
+                for item in batch:
+                    item.future.set_exception(e)
+                continue
+
+            offset = 0
+            for item in batch:
+                count = len(item.frames)
+                item.future.set_result(outputs[offset:offset + count])
+                offset += count
+
+            with self._lock:
+                self._batches += 1
+                self._frames += len(frames)
+                self._requests += len(batch)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "batches": self._batches,
+                "frames": self._frames,
+                "requests": self._requests,
+                "errors": self._errors,
+                "avg_batch_frames": self._frames / self._batches if self._batches else 0.0,
+                "queue_depth": self._queue.qsize(),
+            }
+
+
+class WorkerPool:
+    """Pool limitado de threads para trabalho de CPU, criado sob demanda por processo."""
+
+    def __init__(self, max_workers: int, name: str):
+        self.max_workers = max(1, max_workers)
+        self.name = name
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+                    self._pid = os.getpid()
+        return self._executor
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        # propaga os contextvars da requisição para a thread do pool
+        context = contextvars.copy_context()
+        return self._get_executor().submit(context.run, fn, *args, **kwargs)
+
+    def run(self, fn: Callable, *args, **kwargs):
+        """Executa `fn` no pool e aguarda o resultado."""
+        return self.submit(fn, *args, **kwargs).result()
+
+
+FACE_ENCODING_POOL = WorkerPool(FACE_ENCODING_WORKERS, "face-encoding")
+PIPELINE_POOL = WorkerPool(PIPELINE_WORKERS, "verify-pipeline")
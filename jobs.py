@@ -0,0 +1,211 @@
+"""
+Verificações assíncronas (submit/poll).
+
+POST /verify/jobs grava o upload, enfileira a verificação num pool limitado e
+responde na hora com o id do job; GET /verify/jobs/<id> devolve o estado e, quando
+pronto, o mesmo corpo e status de /verify (com ?wait=N espera até N segundos).
+
+A fila é em memória, por processo: com vários workers o cliente precisa voltar ao
+mesmo processo (sticky session). O JobManager recebe uma função independente da
+requisição (pipeline.verify_video), então pode ser trocado por um broker externo
+sem mudar o núcleo.
+
+Cada job executa com uma vaga de admission.ADMISSION, como as requisições síncronas:
+ADMISSION_MAX_CONCURRENT limita todo o trabalho de visão computacional do processo,
+e JOB_WORKERS só limita quantos jobs disputam essas vagas.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+from admission import ADMISSION, AdmissionRejected
+from deadline import deadline_scope, check_deadline, remaining, DeadlineExceeded
+from inference_server import WorkerPool
+from pipeline import handle_deadline_exceeded
+
+logger = logging.getLogger(__name__)
+
+# ============================
+# CONFIGURAÇÕES
+# ============================
+
+# verificações executadas ao mesmo tempo
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# jobs aguardando além dos que estão em execução (acima disso, 503)
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "32"))
+
+# tempo (s) que o resultado fica disponível após o término
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", "300"))
+
+# prazo (s) de cada verificação, contado do início da execução (0 = sem prazo);
+# substitui o prazo da requisição HTTP que criou o job
+JOB_DEADLINE_SECONDS = float(os.getenv("JOB_DEADLINE_SECONDS", "120"))
+
+# espera máxima (s) aceita no long-poll (?wait=)
+JOB_MAX_WAIT_SECONDS = float(os.getenv("JOB_MAX_WAIT_SECONDS", "30"))
+
+
+class JobQueueFullError(RuntimeError):
+    """Fila de jobs cheia."""
+
+
+@dataclass
+class Job:
+    id: str
+    state: str = "queued"  # queued -> running -> done
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    body: Optional[Dict] = None
+    status: Optional[int] = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def to_dict(self) -> Dict:
+        data = {"job_id": self.id, "state": self.state}
+        if self.state == "done":
+            data["status"] = self.status
+            data["result"] = self.body
+        return data
+
+
+class JobManager:
+    """Fila limitada de jobs em memória, com expiração dos resultados."""
+
+    def __init__(self, workers: int = JOB_WORKERS, queue_size: int = JOB_QUEUE_SIZE,
+                 ttl: float = JOB_TTL_SECONDS):
+        self.capacity = max(1, workers) + max(0, queue_size)
+        self.ttl = ttl
+        self._pool = WorkerPool(workers, "verify-jobs")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._pending = 0  # queued + running
+
+        # métricas
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._expired = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+
+    def submit(self, fn: Callable, *args, on_reject: Optional[Callable] = None,
+               on_abandon: Optional[Callable] = None) -> Job:
+        """
+        Enfileira `fn(*args)`, que deve retornar (corpo, status).
+        Levanta JobQueueFullError (após chamar `on_reject`) se a fila estiver cheia.
+        `on_abandon` é chamada se o job terminar sem chegar a executar `fn`
+        (ex.: prazo esgotado esperando admissão), para liberar o que `fn` liberaria.
+        """
+        with self._lock:
+            self._sweep()
+            if self._pending >= self.capacity:
+                self._rejected += 1
+                full = True
+            else:
+                full = False
+                job = Job(id=uuid.uuid4().hex)
+                self._jobs[job.id] = job
+                self._pending += 1
+                self._submitted += 1
+
+        if full:
+            if on_reject is not None:
+                on_reject()
+            raise JobQueueFullError(f"Fila de verificações cheia ({self.capacity} jobs)")
+
+        self._pool.submit(self._run, job, fn, args, on_abandon)
+        return job
+
+    def _run(self, job: Job, fn: Callable, args: tuple, on_abandon: Optional[Callable] = None) -> None:
+        job.started_at = time.time()
+        job.state = "running"
+        try:
+            with deadline_scope(JOB_DEADLINE_SECONDS if JOB_DEADLINE_SECONDS > 0 else None):
+                job.body, job.status = self._run_admitted(fn, args, on_abandon)
+        except DeadlineExceeded as e:
+            job.body, job.status = handle_deadline_exceeded(e)
+        except Exception as e:
+            logger.exception("Exceção não tratada no job %s: %s", job.id, e)
+            job.body, job.status = {"erro": "Erro ao processar verificação"}, 500
+        finally:
+            job.finished_at = time.time()
+            job.state = "done"
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+                self._wait_total += job.started_at - job.created_at
+                self._run_total += job.finished_at - job.started_at
+            job.done.set()
+
+    def _run_admitted(self, fn: Callable, args: tuple, on_abandon: Optional[Callable] = None):
+        """
+        fn(*args) com uma vaga de ADMISSION. Fila cheia ou espera esgotada não
+        descartam o job (já aceito): ele tenta de novo até o prazo do job.
+        Se `fn` nunca chegar a ser chamada, chama `on_abandon`.
+        """
+        admitted = False
+        try:
+            while True:
+                try:
+                    with ADMISSION.slot():
+                        admitted = True
+                        return fn(*args)
+                except AdmissionRejected as e:
+                    if admitted:
+                        raise
+                    check_deadline("admission")
+                    left = remaining()
+                    time.sleep(max(0.05, e.retry_after if left is None else min(e.retry_after, left)))
+        except BaseException:
+            if not admitted and on_abandon is not None:
+                on_abandon()
+            raise
+
+    def get(self, job_id: str, wait: float = 0.0) -> Optional[Job]:
+        """Retorna o job (ou None), esperando até `wait` segundos pelo término."""
+        with self._lock:
+            self._sweep()
+            job = self._jobs.get(job_id)
+
+        if job is not None and wait > 0:
+            job.done.wait(min(wait, JOB_MAX_WAIT_SECONDS))
+        return job
+
+    def _sweep(self) -> None:
+        # chamado com o lock adquirido; remove resultados expirados
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and now - job.finished_at > self.ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+        self._expired += len(expired)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._sweep()
+            running = sum(1 for job in self._jobs.values() if job.state == "running")
+            completed = self._completed
+            return {
+                "queued": self._pending - running,
+                "running": running,
+                "retained": len(self._jobs),
+                "capacity": self.capacity,
+                "submitted": self._submitted,
+                "completed": completed,
+                "rejected": self._rejected,
+                "expired": self._expired,
+                "avg_queue_wait_s": self._wait_total / completed if completed else 0.0,
+                "avg_run_s": self._run_total / completed if completed else 0.0,
+            }
+
+
+JOBS = JobManager()
+
+
+def job_stats() -> Dict:
+    return JOBS.stats()
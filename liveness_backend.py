@@ -0,0 +1,241 @@
+"""
+Backends de inferência do classificador de liveness (YOLOv8-cls).
+
+- torch: ultralytics/PyTorch (best.pt)
+- onnx: ONNX Runtime (best.onnx, exportado por yolo_export.py), sem importar torch
+- openvino: OpenVINO IR (diretório best_openvino_model/ ou arquivo .xml)
+
+Todos recebem frames BGR (OpenCV) e retornam, por frame, o vetor de
+probabilidades na ordem das classes do modelo.
+"""
+import importlib
+import logging
+import os
+import threading
+from typing import List, Optional
+
+import cv2
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# ============================
+# CONFIGURAÇÕES
+# ============================
+
+# backend: auto (pela extensão do modelo), torch, onnx ou openvino
+LIVENESS_BACKEND = os.getenv("LIVENESS_BACKEND", "auto").lower()
+
+# threads de inferência do ONNX Runtime / OpenVINO (0 = padrão do runtime)
+LIVENESS_THREADS = int(os.getenv("LIVENESS_THREADS", "0"))
+
+# resolução usada quando o modelo exportado tem entrada dinâmica
+DEFAULT_CLS_IMGSZ = 224
+
+BACKENDS = ("torch", "onnx", "openvino")
+
+# biblioteca de cada backend
+RUNTIME_MODULES = {
+    "torch": "ultralytics",
+    "onnx": "onnxruntime",
+    "openvino": "openvino",
+}
+
+# caminho padrão do modelo para cada backend
+DEFAULT_MODEL_PATHS = {
+    "torch": "best.pt",
+    "onnx": "best.onnx",
+    "openvino": "best_openvino_model",
+}
+
+
+def detect_backend(model_path: str) -> str:
+    """Escolhe o backend: LIVENESS_BACKEND, se definido, ou pela extensão do modelo."""
+    if LIVENESS_BACKEND != "auto":
+        return LIVENESS_BACKEND
+
+    if model_path.endswith(".onnx"):
+        return "onnx"
+    if model_path.endswith(".xml") or (os.path.isdir(model_path) and model_path.rstrip("/").endswith("_openvino_model")):
+        return "openvino"
+    return "torch"
+
+
+def preprocess(frames: List[np.ndarray], imgsz: int) -> np.ndarray:
+    """
+    Mesmo pré-processamento do classify_transforms do ultralytics (usado pelo backend
+    torch): BGR->RGB, redimensiona o lado menor para `imgsz` com o bilinear do PIL (com
+    antialias, como o torchvision.Resize), recorta o centro e escala para [0, 1].
+    Retorna tensor float32 NCHW.
+    """
+    batch = np.empty((len(frames), 3, imgsz, imgsz), dtype=np.float32)
+
+    for i, frame in enumerate(frames):
+        h, w = frame.shape[:2]
+        # mesma regra de arredondamento do torchvision (lado maior truncado)
+        if w <= h:
+            new_w, new_h = imgsz, int(imgsz * h / w)
+        else:
+            new_w, new_h = int(imgsz * w / h), imgsz
+
+        image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if (new_w, new_h) != (w, h):
+            image = image.resize((new_w, new_h), Image.BILINEAR)
+        resized = np.asarray(image)
+
+        top = int(round((new_h - imgsz) / 2.0))
+        left = int(round((new_w - imgsz) / 2.0))
+        crop = resized[top:top + imgsz, left:left + imgsz]
+
+        batch[i] = crop.transpose(2, 0, 1)
+
+    batch /= 255.0
+    return batch
+
+
+def _run_fixed_batch(run, x: np.ndarray, fixed_batch: Optional[int]) -> np.ndarray:
+    """Executa `run` respeitando um tamanho de batch fixo do modelo (preenche o último lote)."""
+    if not fixed_batch or fixed_batch == len(x):
+        return run(x)
+
+    outputs = []
+    for start in range(0, len(x), fixed_batch):
+        chunk = x[start:start + fixed_batch]
+        valid = len(chunk)
+        if valid < fixed_batch:
+            padding = np.zeros((fixed_batch - valid,) + chunk.shape[1:], dtype=chunk.dtype)
+            chunk = np.concatenate([chunk, padding])
+        outputs.append(run(chunk)[:valid])
+
+    return np.concatenate(outputs)
+
+
+class TorchBackend:
+    """
+    ultralytics/PyTorch: mesmo caminho de inferência usado originalmente.
+    O predictor do ultralytics guarda estado entre chamadas, então o acesso é serializado.
+    """
+
+    name = "torch"
+
+    def __init__(self, model_path: str, imgsz: int = 0):
+        from ultralytics import YOLO
+
+        self.model_path = model_path
+        self.model = YOLO(model_path)
+        self.imgsz = imgsz
+        self._lock = threading.Lock()
+
+    def predict(self, frames: List[np.ndarray]) -> List[List[float]]:
+        predict_args = {"verbose": False}
+        if self.imgsz > 0:
+            predict_args["imgsz"] = self.imgsz
+
+        with self._lock:
+            results = self.model(frames, **predict_args)
+            return [r.probs.data.tolist() for r in results]
+
+
+class OnnxBackend:
+    """ONNX Runtime na CPU, com pré-processamento em NumPy/OpenCV."""
+
+    name = "onnx"
+
+    def __init__(self, model_path: str, imgsz: int = 0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if LIVENESS_THREADS > 0:
+            options.intra_op_num_threads = LIVENESS_THREADS
+
+        self.model_path = model_path
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.fixed_batch, self.imgsz = _input_geometry(model_input.shape, imgsz)
+
+    def predict(self, frames: List[np.ndarray]) -> List[List[float]]:
+        x = preprocess(frames, self.imgsz)
+        run = lambda batch: self.session.run(None, {self.input_name: batch})[0]
+        return _run_fixed_batch(run, x, self.fixed_batch).tolist()
+
+
+class OpenVinoBackend:
+    """
+    OpenVINO Runtime na CPU, com pré-processamento em NumPy/OpenCV.
+    Cada thread usa o seu próprio InferRequest (o do CompiledModel é compartilhado).
+    """
+
+    name = "openvino"
+
+    def __init__(self, model_path: str, imgsz: int = 0):
+        import openvino as ov
+
+        xml_path = model_path
+        if os.path.isdir(model_path):
+            xml_files = sorted(f for f in os.listdir(model_path) if f.endswith(".xml"))
+            if not xml_files:
+                raise FileNotFoundError(f"Nenhum .xml encontrado em {model_path}")
+            xml_path = os.path.join(model_path, xml_files[0])
+
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if LIVENESS_THREADS > 0:
+            config["INFERENCE_NUM_THREADS"] = LIVENESS_THREADS
+
+        core = ov.Core()
+        model = core.read_model(xml_path)
+        self.model_path = model_path
+        self.compiled = core.compile_model(model, "CPU", config)
+        self.output = self.compiled.output(0)
+        self._local = threading.local()
+
+        shape = [d.get_length() if d.is_static else None for d in model.inputs[0].get_partial_shape()]
+        self.fixed_batch, self.imgsz = _input_geometry(shape, imgsz)
+
+    def predict(self, frames: List[np.ndarray]) -> List[List[float]]:
+        request = getattr(self._local, "request", None)
+        if request is None:
+            request = self._local.request = self.compiled.create_infer_request()
+
+        x = preprocess(frames, self.imgsz)
+        # copia: o buffer de saída é reaproveitado na próxima inferência
+        run = lambda batch: request.infer({0: batch})[self.output].copy()
+        return _run_fixed_batch(run, x, self.fixed_batch).tolist()
+
+
+def _input_geometry(shape, imgsz: int):
+    """(batch fixo ou None, resolução) a partir do shape NCHW de entrada do modelo."""
+    fixed_batch = shape[0] if isinstance(shape[0], int) and shape[0] > 0 else None
+    static_size = shape[2] if isinstance(shape[2], int) and shape[2] > 0 else None
+
+    if static_size:
+        if imgsz and imgsz != static_size:
+            logger.info("imgsz %s ignorado: modelo exportado com entrada fixa %s", imgsz, static_size)
+        return fixed_batch, static_size
+
+    return fixed_batch, imgsz or DEFAULT_CLS_IMGSZ
+
+
+def load_backend(model_path: str, backend: Optional[str] = None, imgsz: int = 0):
+    """Carrega o modelo no backend indicado (ou detectado). Lança ImportError se o runtime faltar."""
+    backend = backend or detect_backend(model_path)
+
+    if backend == "torch":
+        return TorchBackend(model_path, imgsz)
+    if backend == "onnx":
+        return OnnxBackend(model_path, imgsz)
+    if backend == "openvino":
+        return OpenVinoBackend(model_path, imgsz)
+
+    raise ValueError(f"Backend de liveness desconhecido: {backend} (use um de {BACKENDS})")
+
+
+def import_runtime(model_path: str) -> None:
+    """
+    Importa a biblioteca do backend sem criar sessão nem pools de threads
+    (gunicorn: feito no master, antes do fork dos workers).
+    """
+    importlib.import_module(RUNTIME_MODULES[detect_backend(model_path)])
@@ -0,0 +1,182 @@
+"""
+Logging estruturado do serviço.
+
+- Nível padrão INFO (LOG_LEVEL) e níveis por módulo (LOG_LEVELS="utils=DEBUG,pipeline=WARNING").
+- Formatação preguiçosa: os módulos usam logger.debug("... %s", valor), então mensagens
+  abaixo do nível não são formatadas.
+- Não bloqueante: a requisição só enfileira o registro (QueueHandler); a formatação e a
+  escrita no stderr ficam numa thread própria (QueueListener), recriada após fork.
+- Eventos DEBUG de alto volume (por frame) são amostrados (LOG_DEBUG_SAMPLE_RATE).
+- Saída em JSON por linha (LOG_FORMAT=json) ou texto (LOG_FORMAT=text), com o id do
+  trace da requisição quando houver (tracing).
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from tracing import current_trace
+
+# ============================
+# CONFIGURAÇÕES
+# ============================
+
+# nível padrão de todos os loggers
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# níveis por módulo: "utils=DEBUG,anti_spoofing=WARNING"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+
+# "json" (uma linha JSON por evento) ou "text"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+
+# fração dos eventos DEBUG marcados como alto volume que são emitidos (0 a 1)
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+
+# registros aguardando escrita (acima disso, descartados em vez de bloquear a requisição)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# marca de eventos de alto volume: logger.debug("...", extra=SAMPLED)
+SAMPLED = {"sampled": True}
+
+# atributos padrão do LogRecord (o restante vem de `extra` e vira campo estruturado)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "trace_id"}
+
+
+class _StructuredFormatter(logging.Formatter):
+    def __init__(self, fmt: str):
+        super().__init__()
+        self.fmt = fmt
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS and k != "sampled"}
+        trace_id = getattr(record, "trace_id", None)
+        message = record.getMessage()
+
+        if self.fmt == "text":
+            ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.created))
+            extras = "".join(f" {k}={v}" for k, v in fields.items())
+            if trace_id:
+                extras += f" trace_id={trace_id}"
+            line = f"{ts} {record.levelname} {record.name}: {message}{extras}"
+            if record.exc_text:
+                line += "\n" + record.exc_text
+            return line
+
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": message,
+            **fields,
+        }
+        if trace_id:
+            data["trace_id"] = trace_id
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _DebugSampler(logging.Filter):
+    """Descarta parte dos eventos DEBUG marcados com `extra=SAMPLED`."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno == logging.DEBUG and getattr(record, "sampled", False):
+            return random.random() < LOG_DEBUG_SAMPLE_RATE
+        return True
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """
+    Enfileira o registro sem formatá-lo (a formatação fica na thread do listener).
+    Só o que depende da thread da requisição é resolvido aqui: argumentos da mensagem,
+    traceback e id do trace.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        trace = current_trace()
+        record.trace_id = trace.id if trace is not None else None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_lock = threading.Lock()
+_handler = None
+_listener = None
+
+
+def _start_listener() -> None:
+    global _listener
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(_StructuredFormatter(LOG_FORMAT))
+    _handler.queue = log_queue
+    _listener = QueueListener(log_queue, stream, respect_handler_level=False)
+    _listener.start()
+
+
+def _stop_listener() -> None:
+    if _listener is not None:
+        try:
+            _listener.stop()
+        except Exception:
+            pass
+
+
+def _parse_levels(spec: str) -> dict:
+    levels = {}
+    for item in spec.split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging() -> None:
+    """Configura o logging do processo (idempotente)."""
+    global _handler
+    with _lock:
+        if _handler is not None:
+            return
+
+        _handler = _NonBlockingQueueHandler(None)
+        _handler.addFilter(_DebugSampler())
+        _start_listener()
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(_handler)
+        root.setLevel(LOG_LEVEL)
+
+        for name, level in _parse_levels(LOG_LEVELS).items():
+            logging.getLogger(name).setLevel(level)
+
+        atexit.register(_stop_listener)
+        # a thread do listener não sobrevive ao fork (gunicorn --preload): recria no filho
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_start_listener)
+
+
+def logging_stats() -> dict:
+    return {"dropped": _handler.dropped if _handler is not None else 0}
@@ -0,0 +1,184 @@
+"""
+Métricas no formato texto do Prometheus (GET /metrics), sem dependências externas.
+
+- Histogramas de latência por estágio do pipeline (stage) e por rota.
+- Contadores de decisões de liveness (por reason) e de resultados do reconhecimento.
+- Estatísticas dos componentes (spool, micro-batcher, admissão, jobs, orçamento de
+  frames...) registradas com register_stats e exportadas como gauges.
+
+Os valores são por processo; com vários workers, cada um expõe os seus.
+"""
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "face_auth"
+
+# limites (s) dos buckets de latência: de 1 ms a 10 s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = f"{PREFIX}_{name}"
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = f"{PREFIX}_{name}"
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._lock = threading.Lock()
+        # chave -> [contagem por bucket..., soma, total]
+        self._values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+                    break
+            data[-2] += value
+            data[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, data in sorted(self._values.items()):
+                cumulative = 0
+                for i, bound in enumerate(self.buckets):
+                    cumulative += data[i]
+                    le = f'le="{_number(bound)}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(data[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {data[-1]}")
+        return lines
+
+
+# ============================
+# MÉTRICAS DO SERVIÇO
+# ============================
+
+STAGE_SECONDS = Histogram("stage_seconds", "Duração de cada estágio do pipeline de verificação", ["stage"])
+REQUEST_SECONDS = Histogram("request_seconds", "Duração das requisições por rota e status", ["route", "method", "status"])
+LIVENESS_DECISIONS = Counter("liveness_decisions_total", "Decisões de liveness por motivo", ["reason", "liveness"])
+MATCH_OUTCOMES = Counter("match_outcomes_total", "Resultados do reconhecimento facial", ["outcome"])
+DEADLINE_EXCEEDED = Counter("deadline_exceeded_total", "Requisições abandonadas por prazo esgotado, por estágio", ["stage"])
+
+_METRICS = [STAGE_SECONDS, REQUEST_SECONDS, LIVENESS_DECISIONS, MATCH_OUTCOMES, DEADLINE_EXCEEDED]
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Mede o bloco como um estágio do pipeline (e como span, se houver trace ativo)."""
+    start = time.perf_counter()
+    try:
+        with span(name):
+            yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=name)
+
+
+def timed(name: str) -> Callable:
+    """Decorator equivalente a `with stage(name)`."""
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ============================
+# ESTATÍSTICAS DOS COMPONENTES
+# ============================
+
+_STATS_PROVIDERS: List[Tuple[str, Callable[[], Dict]]] = []
+
+
+def register_stats(name: str, provider: Callable[[], Dict]) -> None:
+    """
+    Exporta os valores numéricos de `provider()` como gauges `face_auth_<name>_<chave>`.
+    Dicionários aninhados de números viram um gauge com o rótulo `key`.
+    """
+    _STATS_PROVIDERS.append((name, provider))
+
+
+def _render_stats(name: str, provider: Callable[[], Dict]) -> List[str]:
+    try:
+        stats = provider() or {}
+    except Exception as e:
+        logger.warning("Falha ao coletar %s: %s", name, e)
+        return []
+
+    lines = []
+    for key, value in stats.items():
+        metric = f"{PREFIX}_{name}_{key}"
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {_number(value)}")
+        elif isinstance(value, dict):
+            samples = [(k, v) for k, v in value.items() if isinstance(v, (int, float))]
+            if samples:
+                lines.append(f"# TYPE {metric} gauge")
+                lines.extend(f'{metric}{{key="{_escape(k)}"}} {_number(v)}' for k, v in samples)
+    return lines
+
+
+def render() -> str:
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    for name, provider in _STATS_PROVIDERS:
+        lines.extend(_render_stats(name, provider))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,231 @@
+"""
+Registro do modelo de liveness ativo, com troca a quente.
+
+- Candidatos são carregados em segundo plano e aquecidos (inferências de warmup)
+  antes de entrarem em produção, então a primeira requisição não paga a inicialização.
+- A troca é atômica: novas requisições passam a usar o novo modelo imediatamente,
+  enquanto o antigo é mantido até a última requisição em andamento devolvê-lo (lease).
+- A troca pode ser disparada pelo endpoint administrativo ou pela observação do arquivo.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ============================
+# CONFIGURAÇÕES
+# ============================
+
+# inferências de aquecimento antes de ativar um modelo
+MODEL_WARMUP_RUNS = int(os.getenv("MODEL_WARMUP_RUNS", "2"))
+
+# intervalo (s) de verificação do arquivo do modelo (0 = desativado)
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+
+
+class _ModelHandle:
+    __slots__ = ("model", "path", "version", "loaded_at", "refs", "retired")
+
+    def __init__(self, model, path: str, version: int):
+        self.model = model
+        self.path = path
+        self.version = version
+        self.loaded_at = datetime.utcnow().isoformat() + "Z"
+        self.refs = 0
+        self.retired = False
+
+
+class ModelRegistry:
+    """
+    Mantém o modelo ativo e controla o seu ciclo de vida.
+    `loader(path)` cria o modelo (objeto com `predict(frames)`).
+    """
+
+    def __init__(self, loader: Callable[[str], object], warmup_runs: int = MODEL_WARMUP_RUNS):
+        self.loader = loader
+        self.warmup_runs = warmup_runs
+
+        self._lock = threading.Lock()
+        self._active: Optional[_ModelHandle] = None
+        self._version = 0
+        self._loading: Optional[str] = None
+        self._last_error: Optional[str] = None
+        self._retired_pending = 0
+        self._watch_pid = None
+        self._watch_path: Optional[str] = None
+        self._watch_interval = 0.0
+
+    # ---------- uso pelas requisições ----------
+
+    def has_model(self) -> bool:
+        return self._active is not None
+
+    @contextmanager
+    def lease(self) -> Iterator[object]:
+        """Empresta o modelo ativo durante o bloco; ele não é descartado enquanto emprestado."""
+        handle = self.acquire()
+        try:
+            yield handle.model
+        finally:
+            self.release(handle)
+
+    def acquire(self) -> _ModelHandle:
+        """
+        Versão explícita de lease, para empréstimos que atravessam várias chamadas
+        (ex.: liveness incremental). Todo acquire deve ter um release.
+        """
+        self._ensure_watcher()
+
+        with self._lock:
+            handle = self._active
+            if handle is None:
+                raise RuntimeError("Nenhum modelo de liveness carregado")
+            handle.refs += 1
+        return handle
+
+    def release(self, handle: _ModelHandle) -> None:
+        with self._lock:
+            handle.refs -= 1
+            if handle.retired and handle.refs == 0:
+                self._retired_pending -= 1
+                self._dispose(handle)
+
+    # ---------- carga e troca ----------
+
+    def load(self, path: str, block: bool = False) -> bool:
+        """
+        Carrega e aquece `path` e o ativa. Em segundo plano por padrão.
+        Retorna False se já houver uma carga em andamento.
+        """
+        with self._lock:
+            if self._loading is not None:
+                return False
+            self._loading = path
+
+        if block:
+            # em modo bloqueante, erros de carga são repassados ao chamador
+            self._load(path, reraise=True)
+        else:
+            threading.Thread(target=self._load, args=(path,), name="model-loader", daemon=True).start()
+        return True
+
+    def install(self, model, path: str = "<memória>") -> None:
+        """Ativa um modelo já carregado (sem warmup)."""
+        self._swap(model, path)
+
+    def _load(self, path: str, reraise: bool = False) -> None:
+        try:
+            start = time.perf_counter()
+            model = self.loader(path)
+            self._warmup(model)
+            self._swap(model, path)
+            logger.info("Modelo ativo: %s (versão %s, carga + warmup em %.2fs)",
+                        path, self._version, time.perf_counter() - start)
+            self._last_error = None
+        except Exception as e:
+            self._last_error = f"{type(e).__name__}: {e}"
+            logger.error("Falha ao carregar modelo %s: %s", path, e)
+            if reraise:
+                raise
+        finally:
+            with self._lock:
+                self._loading = None
+
+    def _warmup(self, model) -> None:
+        dummy = np.zeros((480, 640, 3), dtype=np.uint8)
+        for _ in range(self.warmup_runs):
+            model.predict([dummy])
+
+    def _swap(self, model, path: str) -> None:
+        with self._lock:
+            self._version += 1
+            old = self._active
+            self._active = _ModelHandle(model, path, self._version)
+
+            if old is not None:
+                old.retired = True
+                if old.refs == 0:
+                    self._dispose(old)
+                else:
+                    self._retired_pending += 1
+
+    def _dispose(self, handle: _ModelHandle) -> None:
+        # chamado com o lock adquirido
+        if handle.model is not None:
+            logger.info("Modelo versão %s descartado (%s)", handle.version, handle.path)
+            handle.model = None
+
+    # ---------- observação do arquivo ----------
+
+    def watch(self, path: str, interval: float = MODEL_WATCH_INTERVAL) -> None:
+        """Recarrega o modelo quando o arquivo (ou diretório) em `path` mudar."""
+        self._watch_path = path
+        self._watch_interval = interval
+        self._ensure_watcher()
+
+    def _ensure_watcher(self) -> None:
+        # a thread não sobrevive a fork: reinicia quando o PID muda
+        if not self._watch_path or self._watch_interval <= 0 or self._watch_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._watch_pid == os.getpid():
+                return
+            self._watch_pid = os.getpid()
+
+        threading.Thread(target=self._watch_loop, name="model-watcher", daemon=True).start()
+
+    def _watch_loop(self) -> None:
+        path = self._watch_path
+        last_seen = _mtime(path)
+        pending = None
+
+        while True:
+            time.sleep(self._watch_interval)
+            current = _mtime(path)
+            if current is None or current == last_seen:
+                pending = None
+                continue
+
+            # só recarrega quando o arquivo parar de mudar (cópia concluída)
+            if pending != current:
+                pending = current
+                continue
+
+            logger.info("Alteração detectada em %s, recarregando...", path)
+            if self.load(path):
+                last_seen = current
+            pending = None
+
+    # ---------- estado ----------
+
+    def status(self) -> Dict:
+        with self._lock:
+            active = self._active
+            return {
+                "path": active.path if active else None,
+                "version": active.version if active else 0,
+                "backend": getattr(active.model, "name", None) if active else None,
+                "loaded_at": active.loaded_at if active else None,
+                "in_flight": active.refs if active else 0,
+                "loading": self._loading,
+                "retired_pending": self._retired_pending,
+                "last_error": self._last_error,
+                "watching": self._watch_path if self._watch_interval > 0 else None,
+            }
+
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        if os.path.isdir(path):
+            return max((os.path.getmtime(os.path.join(path, f)) for f in os.listdir(path)), default=None)
+        return os.path.getmtime(path)
+    except OSError:
+        return None
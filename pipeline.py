@@ -0,0 +1,337 @@
+"""
+Estágios sobrepostos do /verify com vídeo.
+
+A decodificação (FrameSampler, meio do vídeo primeiro) alimenta dois consumidores:
+o anti-spoofing, na thread da requisição, e o encoding facial do frame de identidade,
+no FACE_ENCODING_POOL, disparado assim que esse frame sai do decoder. A galeria de
+usuários é buscada no MongoDB em paralelo (PIPELINE_POOL). OpenCV, dlib e o backend
+do modelo liberam o GIL, então a latência tende à do estágio mais lento em vez da
+soma de todos.
+"""
+import logging
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from database import buscar_todos_encodings_com_id
+from deadline import check_deadline, timeout_for, DeadlineExceeded
+from inference_server import FACE_ENCODING_POOL, PIPELINE_POOL
+from metrics import stage, STAGE_SECONDS, MATCH_OUTCOMES, DEADLINE_EXCEEDED
+from spool import SPOOL, SpoolFullError
+from startup import face_recognition_module, anti_spoofing_module, NotReadyError
+from utils import FrameSampler, extract_frames_from_video, probe_video_duration, convert_to_mp4, validate_video_file, MAX_VIDEO_MB, MAX_VIDEO_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# mínimo de frames decodificados quando a decisão não foi antecipada
+MIN_DECODED_FRAMES = 5
+
+
+@dataclass
+class VideoStages:
+    """Resultado dos estágios de vídeo de uma requisição."""
+    anti_spoof_result: Dict
+    identity_frame: Optional[np.ndarray]
+    encodings: Optional[Future]
+
+
+def _fetch_gallery() -> list:
+    check_deadline("gallery_fetch")
+    with stage("gallery_fetch"):
+        return buscar_todos_encodings_com_id()
+
+
+def prefetch_gallery() -> Future:
+    """Busca os encodings cadastrados em segundo plano."""
+    return PIPELINE_POOL.submit(_fetch_gallery)
+
+
+def encode_faces(rgb: np.ndarray) -> list:
+    """
+    Equivalente a face_recognition.face_encodings(rgb), com detecção e encoding
+    medidos como estágios separados.
+    """
+    face_recognition = face_recognition_module()
+    check_deadline("face_detection")
+    with stage("face_detection"):
+        locations = face_recognition.face_locations(rgb)
+    if not locations:
+        return []
+    with stage("face_encoding"):
+        return face_recognition.face_encodings(rgb, known_face_locations=locations)
+
+
+def _encode_bgr(frame: np.ndarray) -> list:
+    return encode_faces(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+
+def encode_face_async(frame: np.ndarray) -> Future:
+    """Encoding facial de um frame BGR no FACE_ENCODING_POOL."""
+    return FACE_ENCODING_POOL.submit(_encode_bgr, frame)
+
+
+def run_video_stages(video_path: str, anti_spoofing) -> VideoStages:
+    """
+    Decodifica o vídeo e roda o anti-spoofing, com o encoding do frame de identidade
+    em paralelo. `anti_spoofing` é o módulo já carregado (startup.anti_spoofing_module).
+    O encoding roda mesmo se o liveness reprovar; o resultado é apenas descartado.
+    """
+    encodings = None
+
+    if anti_spoofing.LIVENESS_INCREMENTAL:
+        # Extrair frames e classificar à medida que são decodificados
+        try:
+            with FrameSampler(video_path, num_frames=anti_spoofing.LIVENESS_MAX_FRAMES, coarse_to_fine=True) as sampler:
+
+                def frames() -> Iterator[np.ndarray]:
+                    nonlocal encodings
+                    iterator = iter(sampler)
+                    decode_seconds = 0.0
+                    try:
+                        while True:
+                            start = time.perf_counter()
+                            frame = next(iterator, None)
+                            decode_seconds += time.perf_counter() - start
+                            if frame is None:
+                                break
+                            if encodings is None and sampler.identity_frame is not None:
+                                encodings = encode_face_async(sampler.identity_frame)
+                            yield frame
+                    finally:
+                        # só o tempo de decodificação (o liveness roda entre um frame e outro)
+                        STAGE_SECONDS.observe(decode_seconds, stage="frame_extraction")
+
+                frame_iter = frames()
+                try:
+                    with stage("liveness"):
+                        anti_spoof_result = anti_spoofing.process_anti_spoofing_incremental(frame_iter, sampler.fps)
+                finally:
+                    frame_iter.close()
+                identity_frame = sampler.identity_frame
+            logger.debug("Resultado anti-spoofing: %s", anti_spoof_result)
+            frames_used = anti_spoof_result["frames_used"]
+            if not anti_spoof_result["early_exit"] and frames_used < MIN_DECODED_FRAMES:
+                raise ValueError(f"Frames insuficientes: {frames_used}")
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error("Falha no anti-spoofing incremental: %s", e, extra={"status": 500})
+            raise
+    else:
+        # Extrair frames
+        try:
+            with stage("frame_extraction"):
+                frames, fps, identity_frame = extract_frames_from_video(video_path, num_frames=anti_spoofing.LIVENESS_MAX_FRAMES)
+            logger.debug("Frames extraídos: %s, FPS: %s", len(frames), fps)
+            if len(frames) < MIN_DECODED_FRAMES:
+                raise ValueError(f"Frames insuficientes: {len(frames)}")
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error("Falha ao extrair frames: %s", e, extra={"status": 500})
+            raise
+
+        if identity_frame is not None:
+            encodings = encode_face_async(identity_frame)
+
+        # Anti-spoofing
+        try:
+            with stage("liveness"):
+                anti_spoof_result = anti_spoofing.process_anti_spoofing(frames, fps)
+            logger.debug("Resultado anti-spoofing: %s", anti_spoof_result)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error("Falha no anti-spoofing: %s", e, extra={"status": 500})
+            raise
+
+    return VideoStages(anti_spoof_result, identity_frame, encodings)
+
+
+def liveness_failure_body(anti_spoof_result: dict) -> dict:
+    return {
+        "erro": f"Falha na verificação de liveness: {anti_spoof_result.get('reason', 'spoof_detectado')}",
+        "scores": anti_spoof_result.get("scores", {}),
+        "final_score": anti_spoof_result.get("final_score", 0.0)
+    }
+
+
+def deadline_exceeded_body(e: DeadlineExceeded) -> dict:
+    return {
+        "erro": "Prazo da requisição esgotado",
+        "reason": "deadline_exceeded",
+        "stage": e.stage,
+    }
+
+
+def handle_deadline_exceeded(e: DeadlineExceeded) -> Tuple[Dict, int]:
+    """Resposta 504 (e métrica) de uma requisição abandonada por prazo esgotado."""
+    logger.warning("%s", e, extra={"status": 504, "stage": e.stage})
+    DEADLINE_EXCEEDED.inc(stage=e.stage)
+    return deadline_exceeded_body(e), 504
+
+
+def _result_within_deadline(future: Future, stage_name: str):
+    """Resultado de um estágio em andamento, sem esperar além do prazo da requisição."""
+    try:
+        return future.result(timeout=timeout_for())
+    except FutureTimeoutError:
+        future.cancel()
+        raise DeadlineExceeded(stage_name)
+
+
+def processing_error_body() -> dict:
+    return {
+        "liveness": False,
+        "final_score": 0.0,
+        "scores": {"yolo": 0.0},
+        "identity_match": False,
+        "identity_confidence": 0.0,
+        "reason": "erro_processamento",
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
+
+
+def identify_face(rgb: np.ndarray, encodings: Optional[Future] = None, gallery: Optional[Future] = None) -> tuple:
+    """
+    Extrai o encoding do rosto e compara com os usuários cadastrados.
+    `encodings` e `gallery` são estágios já em andamento (Futures); sem eles,
+    o encoding e a busca da galeria são feitos aqui.
+    Retorna (corpo da resposta, status HTTP), no formato de /verify.
+    """
+    face_recognition = face_recognition_module()
+    if encodings is not None:
+        encodings = _result_within_deadline(encodings, "face_encoding")
+    else:
+        encodings = _result_within_deadline(FACE_ENCODING_POOL.submit(encode_faces, rgb), "face_encoding")
+    if not encodings:
+        logger.warning("Nenhum rosto detectado na imagem/frame", extra={"status": 400})
+        MATCH_OUTCOMES.inc(outcome="no_face")
+        return {"erro": "Nenhum rosto detectado"}, 400
+
+    encoding = np.array(encodings[0])
+    usuarios = _result_within_deadline(gallery, "gallery_fetch") if gallery is not None else _fetch_gallery()
+    if not usuarios:
+        MATCH_OUTCOMES.inc(outcome="empty_gallery")
+        return {"erro": "Nenhum usuário cadastrado"}, 404
+
+    check_deadline("matching")
+    best_match = None
+    lowest_distance = 1.0
+    with stage("matching"):
+        for u in usuarios:
+            known_encoding = np.array(u["face_encoding"])
+            distance = face_recognition.face_distance([known_encoding], encoding)[0]
+            if distance < lowest_distance and distance < 0.45:
+                lowest_distance = distance
+                best_match = u
+
+    if best_match:
+        MATCH_OUTCOMES.inc(outcome="match")
+        return {
+            "_id": best_match.get("_id"),
+            "nome": best_match["nome"],
+            "nivel": best_match["nivel"],
+            "imagem_base64": best_match.get("imagem_base64")
+        }, 200
+
+    MATCH_OUTCOMES.inc(outcome="no_match")
+    return {"erro": "Rosto não reconhecido"}, 404
+
+
+def finish_stream_session(session) -> Tuple[Dict, int]:
+    """Fecha uma sessão de streaming (streaming.VerificationSession) e monta a resposta no formato de /verify."""
+    if not session.has_enough_frames():
+        logger.warning("Frames insuficientes no streaming: %s", session.frames_received, extra={"status": 400})
+        return {"erro": f"Frames insuficientes: {session.frames_received}"}, 400
+
+    anti_spoof_result = session.liveness_result()
+    logger.debug("Resultado anti-spoofing (streaming): %s", anti_spoof_result)
+
+    if not anti_spoof_result.get("liveness", False):
+        return liveness_failure_body(anti_spoof_result), 403
+
+    rgb = cv2.cvtColor(session.identity_frame, cv2.COLOR_BGR2RGB)
+    return identify_face(rgb)
+
+
+def verify_video(temp_video_path: str, video_format: str) -> Tuple[Dict, int]:
+    """
+    Núcleo do /verify com vídeo, independente da requisição HTTP (usado também pelos
+    jobs assíncronos). Recebe o vídeo já gravado no spool e assume a posse do arquivo:
+    ele é devolvido ao spool ao final, inclusive em erros.
+    Retorna (corpo da resposta, status HTTP).
+    """
+    try:
+        # galeria buscada no MongoDB enquanto o vídeo é convertido/decodificado
+        gallery = prefetch_gallery()
+
+        # Duração declarada no cabeçalho, antes de qualquer decodificação/conversão
+        with stage("probe"):
+            declared_duration = probe_video_duration(temp_video_path)
+        if declared_duration is not None and declared_duration > MAX_VIDEO_SECONDS:
+            logger.warning("Vídeo muito longo (cabeçalho): %.2fs > %ss", declared_duration, MAX_VIDEO_SECONDS, extra={"status": 400})
+            return {"erro": "Vídeo excede duração máxima permitida"}, 400
+
+        # Conversão WebM → MP4
+        if video_format == "webm":
+            logger.debug("Convertendo WebM para MP4...")
+            try:
+                with stage("transcode"):
+                    temp_video_path_mp4 = convert_to_mp4(temp_video_path)
+                SPOOL.release(temp_video_path)
+                temp_video_path = temp_video_path_mp4
+                video_format = "mp4"
+                logger.debug("Conversão concluída: %s", temp_video_path)
+            except Exception as e:
+                logger.error("Falha na conversão: %s", e, extra={"status": 500})
+                raise
+
+        # Validar vídeo
+        with stage("validation"):
+            is_valid, error_msg = validate_video_file(temp_video_path, max_size_mb=MAX_VIDEO_MB)
+        if not is_valid:
+            logger.warning("Validação de vídeo falhou: %s", error_msg, extra={"status": 400})
+            return {"erro": error_msg}, 400
+
+        # decodificação → liveness, com encoding facial e galeria em paralelo
+        stages = run_video_stages(temp_video_path, anti_spoofing_module())
+        anti_spoof_result = stages.anti_spoof_result
+
+        # Limpar temporário
+        SPOOL.release(temp_video_path)
+        temp_video_path = None
+
+        if not anti_spoof_result.get("liveness", False):
+            return liveness_failure_body(anti_spoof_result), 403
+
+        # frame em resolução original reservado para o reconhecimento facial
+        rgb = cv2.cvtColor(stages.identity_frame, cv2.COLOR_BGR2RGB)
+        encodings = stages.encodings
+
+        # Reconhecimento facial
+        return identify_face(rgb, encodings=encodings, gallery=gallery)
+
+    except DeadlineExceeded as e:
+        return handle_deadline_exceeded(e)
+
+    except SpoolFullError as e:
+        logger.warning("%s", e, extra={"status": 503})
+        return {"erro": "Servidor sem espaço temporário no momento, tente novamente"}, 503
+
+    except NotReadyError as e:
+        logger.warning("%s", e, extra={"status": 503})
+        return {"erro": "Serviço inicializando, tente novamente", "detalhe": str(e)}, 503
+
+    except Exception as e:
+        logger.exception("Exceção não tratada em verify_video: %s", e)
+        return processing_error_body(), 500
+
+    finally:
+        # arquivo temporário sempre devolvido ao spool, inclusive em erros
+        SPOOL.release(temp_video_path)
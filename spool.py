@@ -0,0 +1,279 @@
+"""
+Spool de mídia temporária (uploads e vídeos convertidos).
+Coloca os arquivos num diretório configurável (preferencialmente em RAM/tmpfs),
+aplica uma cota total de bytes, garante a remoção via context managers e varre
+arquivos órfãos em segundo plano.
+
+O diretório é compartilhado pelos workers do gunicorn: cada processo grava em
+SPOOL_DIR/<pid>, a cota também é conferida contra o espaço livre real do sistema de
+arquivos (os.statvfs) e a varredura só remove diretórios de processos encerrados.
+"""
+import errno
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# ============================
+# CONFIGURAÇÕES
+# ============================
+
+
+def _default_spool_dir() -> str:
+    # /dev/shm é tmpfs na maioria das distribuições Linux e containers
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm/face-auth-spool"
+    return os.path.join(tempfile.gettempdir(), "face-auth-spool")
+
+
+SPOOL_DIR = os.getenv("SPOOL_DIR") or _default_spool_dir()
+
+# cota do spool por processo (o espaço livre do sistema de arquivos, compartilhado
+# entre os workers, é conferido a cada escrita)
+SPOOL_MAX_MB = int(os.getenv("SPOOL_MAX_MB", "256"))
+
+# espaço mínimo (MB) mantido livre no sistema de arquivos do spool
+SPOOL_MIN_FREE_MB = int(os.getenv("SPOOL_MIN_FREE_MB", "8"))
+
+# arquivos não rastreados do próprio processo (ou soltos na raiz do spool) mais antigos
+# que isso (s) são considerados órfãos
+SPOOL_ORPHAN_TTL = float(os.getenv("SPOOL_ORPHAN_TTL", "300"))
+
+# intervalo (s) da varredura de órfãos
+SPOOL_SWEEP_INTERVAL = float(os.getenv("SPOOL_SWEEP_INTERVAL", "60"))
+
+
+class SpoolFullError(Exception):
+    """A cota do spool seria ultrapassada (ou o sistema de arquivos está cheio)."""
+
+
+def is_disk_full(e: BaseException) -> bool:
+    """OSError de sistema de arquivos cheio (ENOSPC/EDQUOT)."""
+    return isinstance(e, OSError) and e.errno in (errno.ENOSPC, errno.EDQUOT)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Spool:
+    """
+    Gerencia os arquivos temporários de mídia de um processo.
+    Cada arquivo é registrado com os bytes que ocupa; `charge` reserva espaço
+    e falha com SpoolFullError quando a cota do processo seria ultrapassada ou
+    quando o sistema de arquivos (compartilhado) não tem espaço.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, orphan_ttl: float, sweep_interval: float,
+                 min_free_bytes: int = 0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.min_free_bytes = min_free_bytes
+        self.orphan_ttl = orphan_ttl
+        self.sweep_interval = sweep_interval
+
+        self._lock = threading.Lock()
+        self._files: Dict[str, int] = {}
+        self._bytes_in_use = 0
+        self._peak_bytes = 0
+        self._rejected = 0
+        self._created = 0
+        self._swept_files = 0
+        self._swept_bytes = 0
+        self._sweeper_pid = None
+
+    # ---------- ciclo de vida dos arquivos ----------
+
+    @property
+    def process_directory(self) -> str:
+        """Subdiretório deste processo (o PID muda após o fork dos workers)."""
+        return os.path.join(self.directory, str(os.getpid()))
+
+    def new_path(self, suffix: str = "") -> str:
+        """Reserva um caminho único no spool (o arquivo ainda não existe)."""
+        self._ensure_sweeper()
+        directory = self.process_directory
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{uuid.uuid4().hex}{suffix}")
+
+        with self._lock:
+            self._files[path] = 0
+            self._created += 1
+
+        return path
+
+    def free_bytes(self) -> Optional[int]:
+        """Espaço livre no sistema de arquivos do spool, descontada a reserva mínima."""
+        try:
+            st = os.statvfs(self.directory)
+        except OSError:
+            return None
+        return max(0, st.f_bavail * st.f_frsize - self.min_free_bytes)
+
+    def charge(self, path: str, nbytes: int) -> None:
+        """Contabiliza `nbytes` adicionais para `path`, respeitando a cota e o espaço livre."""
+        free = self.free_bytes()
+        with self._lock:
+            if self._bytes_in_use + nbytes > self.max_bytes:
+                self._rejected += 1
+                raise SpoolFullError(f"Spool cheio ({self._bytes_in_use} de {self.max_bytes} bytes em uso)")
+            if free is not None and nbytes > free:
+                self._rejected += 1
+                raise SpoolFullError(f"Sistema de arquivos do spool cheio ({free} bytes livres)")
+
+            self._files[path] = self._files.get(path, 0) + nbytes
+            self._bytes_in_use += nbytes
+            self._peak_bytes = max(self._peak_bytes, self._bytes_in_use)
+
+    def remaining_bytes(self) -> int:
+        free = self.free_bytes()
+        with self._lock:
+            left = max(0, self.max_bytes - self._bytes_in_use)
+        return left if free is None else min(left, free)
+
+    def release(self, path: Optional[str]) -> None:
+        """Remove o arquivo e libera sua cota. Idempotente."""
+        if not path:
+            return
+
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Falha ao remover %s: %s", path, e)
+
+        with self._lock:
+            self._bytes_in_use -= self._files.pop(path, 0)
+
+    @contextmanager
+    def temp_path(self, suffix: str = "") -> Iterator[str]:
+        """Caminho temporário removido ao sair do bloco, com ou sem exceção."""
+        path = self.new_path(suffix)
+        try:
+            yield path
+        finally:
+            self.release(path)
+
+    # ---------- varredura de órfãos ----------
+
+    def sweep(self) -> int:
+        """
+        Remove órfãos: os diretórios de processos encerrados (inteiros) e, no diretório
+        deste processo e na raiz, arquivos não rastreados mais antigos que o TTL.
+        Diretórios de outros workers vivos nunca são tocados.
+        """
+        removed = 0
+
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return 0
+
+        own_pid = os.getpid()
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False) and entry.name.isdigit():
+                pid = int(entry.name)
+                if pid == own_pid:
+                    removed += self._sweep_files(entry.path, self.orphan_ttl)
+                elif not _pid_alive(pid):
+                    removed += self._sweep_files(entry.path, 0.0)
+                    try:
+                        os.rmdir(entry.path)
+                    except OSError:
+                        pass
+        # arquivos soltos na raiz (versões anteriores, sem subdiretório por processo)
+        removed += self._sweep_files(self.directory, self.orphan_ttl)
+
+        if removed:
+            logger.info("%s arquivo(s) órfão(s) removido(s) de %s", removed, self.directory)
+        return removed
+
+    def _sweep_files(self, directory: str, ttl: float) -> int:
+        """Remove os arquivos não rastreados de `directory` mais antigos que `ttl`."""
+        now = time.time()
+        removed = 0
+
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            return 0
+
+        with self._lock:
+            tracked = set(self._files)
+
+        for entry in entries:
+            if entry.path in tracked or not entry.is_file(follow_symlinks=False):
+                continue
+            try:
+                stat = entry.stat(follow_symlinks=False)
+                if now - stat.st_mtime < ttl:
+                    continue
+                os.unlink(entry.path)
+            except OSError:
+                continue
+
+            removed += 1
+            with self._lock:
+                self._swept_files += 1
+                self._swept_bytes += stat.st_size
+
+        return removed
+
+    def _ensure_sweeper(self) -> None:
+        # a thread não sobrevive a fork: reinicia quando o PID muda
+        if self._sweeper_pid == os.getpid() or self.sweep_interval <= 0:
+            return
+
+        with self._lock:
+            if self._sweeper_pid == os.getpid():
+                return
+            self._sweeper_pid = os.getpid()
+
+        thread = threading.Thread(target=self._sweep_loop, name="spool-sweeper", daemon=True)
+        thread.start()
+
+    def _sweep_loop(self) -> None:
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error("Erro na varredura: %s", e)
+            time.sleep(self.sweep_interval)
+
+    # ---------- métricas ----------
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "dir": self.process_directory,
+                "bytes_in_use": self._bytes_in_use,
+                "max_bytes": self.max_bytes,
+                "peak_bytes": self._peak_bytes,
+                "files": len(self._files),
+                "files_created": self._created,
+                "rejected": self._rejected,
+                "swept_files": self._swept_files,
+                "swept_bytes": self._swept_bytes,
+                "fs_free_bytes": self.free_bytes()
+            }
+
+
+SPOOL = Spool(SPOOL_DIR, SPOOL_MAX_MB * 1024 * 1024, SPOOL_ORPHAN_TTL, SPOOL_SWEEP_INTERVAL,
+              min_free_bytes=SPOOL_MIN_FREE_MB * 1024 * 1024)
+
+
+def spool_stats() -> Dict:
+    return SPOOL.stats()
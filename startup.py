@@ -0,0 +1,138 @@
+"""
+Carga tardia das dependências pesadas da visão computacional.
+
+Importar app.py não carrega face_recognition (dlib) nem anti_spoofing (backend do
+modelo + pesos): o servidor sobe na hora e as rotas de CRUD já respondem.
+start_background_loading() carrega esses módulos em threads de segundo plano; as
+rotas que dependem deles esperam até STARTUP_WAIT_SECONDS e respondem 503 se ainda
+não estiverem prontos. /readyz (ver readiness) informa o estado de cada subsistema.
+"""
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# ============================
+# CONFIGURAÇÕES
+# ============================
+
+# carregar os módulos de visão computacional em segundo plano logo no startup
+STARTUP_BACKGROUND_LOAD = os.getenv("STARTUP_BACKGROUND_LOAD", "true").lower() == "true"
+
+# tempo máximo (s) que uma requisição espera um subsistema ainda carregando
+STARTUP_WAIT_SECONDS = float(os.getenv("STARTUP_WAIT_SECONDS", "30"))
+
+
+class NotReadyError(RuntimeError):
+    """Subsistema ainda carregando (ou falhou ao carregar)."""
+
+
+class _Subsystem:
+    """Um módulo pesado importado uma única vez por processo, em segundo plano."""
+
+    def __init__(self, name: str, module_name: str):
+        self.name = name
+        self.module_name = module_name
+        self.module = None
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._pid = None
+
+    def ensure_loading(self) -> None:
+        # uma thread que estava carregando antes de um fork não existe no filho
+        if self.state == "pending" or (self.state == "loading" and self._pid != os.getpid()):
+            with self._lock:
+                if self.state == "pending" or (self.state == "loading" and self._pid != os.getpid()):
+                    self.state = "loading"
+                    self._pid = os.getpid()
+                    self._ready = threading.Event()
+                    threading.Thread(target=self._load, name=f"load-{self.name}", daemon=True).start()
+
+    def _load(self) -> None:
+        start = time.perf_counter()
+        try:
+            self.module = importlib.import_module(self.module_name)
+            self.state = "ready"
+            self.load_seconds = time.perf_counter() - start
+            logger.info("%s carregado em %.2fs", self.name, self.load_seconds)
+        except Exception as e:
+            self.state = "error"
+            self.error = f"{type(e).__name__}: {e}"
+            logger.error("Falha ao carregar %s: %s", self.name, e)
+        finally:
+            self._ready.set()
+
+    def get(self, timeout: float = STARTUP_WAIT_SECONDS):
+        """Retorna o módulo, esperando a carga até `timeout` segundos."""
+        if self.module is not None:
+            return self.module
+
+        self.ensure_loading()
+        if not self._ready.wait(timeout) or self.module is None:
+            if self.state == "error":
+                raise NotReadyError(f"{self.name} indisponível: {self.error}")
+            raise NotReadyError(f"{self.name} ainda carregando")
+
+        return self.module
+
+    def status(self) -> Dict:
+        return {
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "error": self.error,
+        }
+
+
+SUBSYSTEMS = {
+    "face_recognition": _Subsystem("face_recognition", "face_recognition"),
+    "liveness": _Subsystem("liveness", "anti_spoofing"),
+}
+
+
+def start_background_loading() -> None:
+    for subsystem in SUBSYSTEMS.values():
+        subsystem.ensure_loading()
+
+
+def face_recognition_module():
+    """face_recognition (dlib), carregado sob demanda."""
+    return SUBSYSTEMS["face_recognition"].get()
+
+
+def anti_spoofing_module():
+    """anti_spoofing com o modelo de liveness carregado, sob demanda."""
+    return SUBSYSTEMS["liveness"].get()
+
+
+def readiness() -> Dict:
+    """
+    Estado de cada subsistema para o /readyz.
+    Pronto quando os módulos de visão estão carregados, o modelo de liveness
+    configurado está ativo e o MongoDB responde.
+    """
+    from database import verificar_conexao
+
+    subsystems = {name: s.status() for name, s in SUBSYSTEMS.items()}
+    ready = all(s.state == "ready" for s in SUBSYSTEMS.values())
+
+    liveness = SUBSYSTEMS["liveness"].module
+    if liveness is not None:
+        model = liveness.MODEL_REGISTRY.status()
+        model["ready"] = liveness.model_ready()
+        subsystems["liveness"]["model"] = model
+        # sem modelo configurado (desenvolvimento) o serviço sobe sem liveness por modelo
+        if liveness.YOLO_MODEL_PATH and not model["ready"]:
+            ready = False
+
+    database_ok = verificar_conexao()
+    subsystems["database"] = {"state": "ready" if database_ok else "error"}
+
+    return {"ready": ready and database_ok, "subsystems": subsystems}
@@ -0,0 +1,130 @@
+"""
+Sessão de verificação por streaming de frames.
+O cliente envia frames JPEG um a um (WebSocket ou HTTP chunked) e o servidor
+executa o anti-spoofing incrementalmente, respondendo assim que a decisão é clara.
+"""
+import os
+import struct
+from typing import Dict, Iterator, Optional
+
+import cv2
+import numpy as np
+
+from metrics import stage
+from startup import anti_spoofing_module
+from utils import resize_to_width, FRAME_TARGET_WIDTH
+
+# ============================
+# CONFIGURAÇÕES
+# ============================
+
+# máximo de frames aceitos por sessão (após isso a decisão é tomada com o que houver)
+STREAM_MAX_FRAMES = int(os.getenv("STREAM_MAX_FRAMES", os.getenv("LIVENESS_MAX_FRAMES", "12")))
+
+# tamanho máximo de um frame individual
+STREAM_MAX_FRAME_BYTES = int(os.getenv("STREAM_MAX_FRAME_BYTES", str(2 * 1024 * 1024)))
+
+# tempo máximo (s) aguardando o próximo frame no WebSocket
+STREAM_IDLE_TIMEOUT = float(os.getenv("STREAM_IDLE_TIMEOUT", "5"))
+
+# mínimo de frames quando a decisão não foi antecipada (mesmo critério do vídeo)
+STREAM_MIN_FRAMES = 5
+
+# prefixo de tamanho de cada frame no corpo HTTP chunked (uint32 big-endian)
+_LENGTH_PREFIX = struct.Struct(">I")
+
+
+class StreamProtocolError(ValueError):
+    """Frame malformado ou fora dos limites enviado pelo cliente."""
+
+
+class VerificationSession:
+    """
+    Estado de uma verificação por streaming: liveness incremental sobre frames
+    reduzidos e o último frame em resolução original para o reconhecimento facial.
+    """
+
+    def __init__(self, max_frames: int = STREAM_MAX_FRAMES):
+        self.max_frames = max_frames
+        self.liveness = anti_spoofing_module().IncrementalLiveness(max_frames=max_frames)
+        self.identity_frame: Optional[np.ndarray] = None
+        self.frames_received = 0
+        self.done = False
+
+    def push_frame(self, data: bytes) -> bool:
+        """
+        Recebe um frame codificado (JPEG/PNG). Retorna True quando a sessão
+        já tem informação suficiente para o veredito.
+        """
+        if self.done:
+            return True
+
+        if len(data) > STREAM_MAX_FRAME_BYTES:
+            raise StreamProtocolError(f"Frame excede {STREAM_MAX_FRAME_BYTES} bytes")
+
+        with stage("stream_frame_decode"):
+            frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise StreamProtocolError("Frame inválido")
+
+        self.frames_received += 1
+        self.identity_frame = frame
+
+        decided = self.liveness.add_frame(resize_to_width(frame, FRAME_TARGET_WIDTH))
+        self.done = decided or self.frames_received >= self.max_frames
+        return self.done
+
+    def has_enough_frames(self) -> bool:
+        return self.liveness.decided or self.frames_received >= STREAM_MIN_FRAMES
+
+    def liveness_result(self) -> Dict:
+        return self.liveness.result().to_dict()
+
+    def close(self) -> None:
+        """Devolve o modelo emprestado pelo liveness (também quando o cliente desiste)."""
+        self.liveness.close()
+
+    def __enter__(self) -> "VerificationSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def iter_length_prefixed_frames(stream, max_frame_bytes: int = STREAM_MAX_FRAME_BYTES) -> Iterator[bytes]:
+    """
+    Lê frames de um corpo HTTP no formato [uint32 big-endian tamanho][bytes do frame]...
+    Termina no fim do corpo.
+    """
+    while True:
+        header = _read_exact(stream, _LENGTH_PREFIX.size)
+        if header is None:
+            return
+
+        (length,) = _LENGTH_PREFIX.unpack(header)
+        if length == 0 or length > max_frame_bytes:
+            raise StreamProtocolError(f"Tamanho de frame inválido: {length}")
+
+        data = _read_exact(stream, length)
+        if data is None:
+            raise StreamProtocolError("Corpo terminou no meio de um frame")
+
+        yield data
+
+
+def _read_exact(stream, size: int) -> Optional[bytes]:
+    """Lê exatamente `size` bytes; None se o corpo terminar antes do primeiro byte."""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+
+    if remaining == size:
+        return None
+    if remaining > 0:
+        raise StreamProtocolError("Corpo terminou no meio de um frame")
+    return b"".join(chunks)
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected
+from deadline import DeadlineExceeded, deadline_scope
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condição não atingida")
+        time.sleep(0.001)
+
+
+def test_fifo_order_and_direct_handoff():
+    controller = AdmissionController(max_concurrent=1, queue_size=10, max_wait=5.0)
+    controller._acquire()
+    order = []
+
+    def worker(i):
+        controller._acquire()
+        order.append(i)
+        controller._release(0.01)
+
+    threads = []
+    for i in range(6):
+        t = threading.Thread(target=worker, args=(i,))
+        t.start()
+        threads.append(t)
+        wait_until(lambda: controller.stats()["waiting"] == i + 1)
+
+    controller._release(0.01)
+    for t in threads:
+        t.join()
+
+    assert order == list(range(6))
+    assert controller.stats()["active"] == 0
+    assert controller.stats()["waiting"] == 0
+
+
+def test_new_arrival_does_not_barge_ahead_of_queue():
+    controller = AdmissionController(max_concurrent=1, queue_size=10, max_wait=0.05)
+    controller._acquire()
+    got = threading.Event()
+
+    def waiter():
+        controller._acquire()
+        got.set()
+
+    t = threading.Thread(target=waiter)
+    t.start()
+    wait_until(lambda: controller.stats()["waiting"] == 1)
+
+    controller._release(0.01)
+    # a vaga foi entregue ao da fila: quem chega agora espera e desiste
+    with pytest.raises(AdmissionRejected):
+        controller._acquire()
+    t.join()
+    assert got.is_set()
+    controller._release(0.01)
+    assert controller.stats()["active"] == 0
+
+
+def test_queue_full_and_timeout_rejections():
+    controller = AdmissionController(max_concurrent=1, queue_size=1, max_wait=0.05)
+    controller._acquire()
+
+    t = threading.Thread(target=lambda: pytest.raises(AdmissionRejected, controller._acquire))
+    t.start()
+    wait_until(lambda: controller.stats()["waiting"] == 1)
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller._acquire()
+    assert excinfo.value.reason == "fila cheia"
+
+    t.join()
+    stats = controller.stats()
+    assert stats["waiting"] == 0
+    assert stats["rejected_queue_full"] == 1
+    assert stats["rejected_timeout"] == 1
+    assert stats["active"] == 1
+
+
+def test_wait_bounded_by_request_deadline():
+    controller = AdmissionController(max_concurrent=1, queue_size=1, max_wait=5.0)
+    controller._acquire()
+    with deadline_scope(0.05):
+        with pytest.raises(DeadlineExceeded):
+            controller._acquire()
+    assert controller.stats()["waiting"] == 0
+
+
+def test_timeout_racing_release_never_loses_a_slot():
+    controller = AdmissionController(max_concurrent=1, queue_size=1, max_wait=0.002)
+
+    for _ in range(300):
+        controller._acquire()
+        outcome = []
+
+        def waiter():
+            try:
+                controller._acquire()
+            except AdmissionRejected:
+                outcome.append("rejected")
+            else:
+                outcome.append("admitted")
+                controller._release(0.0)
+
+        t = threading.Thread(target=waiter)
+        t.start()
+        wait_until(lambda: controller.stats()["waiting"] == 1 or outcome)
+        time.sleep(0.002)
+        controller._release(0.0)
+        t.join()
+
+        stats = controller.stats()
+        assert stats["active"] == 0, outcome
+        assert stats["waiting"] == 0
+
+
+def test_async_slot_cancelled_while_waiting_returns_the_slot():
+    controller = AdmissionController(max_concurrent=1, queue_size=1, max_wait=5.0)
+
+    async def scenario():
+        controller._acquire()
+
+        async def client():
+            async with controller.async_slot():
+                pytest.fail("cliente cancelado não deveria executar")
+
+        task = asyncio.ensure_future(client())
+        while controller.stats()["waiting"] == 0:
+            await asyncio.sleep(0.001)
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # a vaga entregue ao cliente cancelado volta a ficar livre
+        controller._release(0.01)
+        while controller.stats()["active"] != 0:
+            await asyncio.sleep(0.001)
+
+        async with controller.async_slot() as waited:
+            assert waited == 0.0
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5.0))
+    assert controller.stats()["active"] == 0
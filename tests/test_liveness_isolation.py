@@ -0,0 +1,92 @@
+"""
+Isolamento do anti-spoofing sob concorrência: cada requisição recebe frames próprios
+e deve receber de volta exatamente as suas probabilidades por frame, como numa
+execução sequencial. O modelo é um classificador sintético (sem pesos).
+"""
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+import anti_spoofing  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+
+REQUESTS = 64
+FRAMES = 12
+WORKERS = 16
+
+
+class SyntheticBackend:
+    """Probabilidade derivada do brilho médio do frame, com latência aleatória."""
+
+    name = "synthetic"
+
+    def predict(self, frames):
+        time.sleep(random.uniform(0.0, 0.004))
+        probs = []
+        for frame in frames:
+            p = float(frame.mean()) / 255.0
+            probs.append([1.0 - p, p])
+        return probs
+
+
+@pytest.fixture
+def synthetic_model(monkeypatch):
+    registry = ModelRegistry(lambda path: SyntheticBackend(), warmup_runs=0)
+    registry.install(SyntheticBackend(), path="<sintético>")
+    monkeypatch.setattr(anti_spoofing, "MODEL_REGISTRY", registry)
+    monkeypatch.setattr(anti_spoofing, "YOLO_AVAILABLE", True)
+    monkeypatch.setattr(anti_spoofing, "LIVENESS_INPUT", "frame")
+    # o teste compara as probabilidades por frame: nenhum vídeo pode sair pelo pré-filtro
+    monkeypatch.setattr(anti_spoofing, "MOTION_FILTER", False)
+    return registry
+
+
+def make_request_frames(request_id, rng):
+    # brilho distinto por requisição para que trocas de resultado sejam detectáveis
+    base = (request_id * 37) % 256
+    frames = []
+    for i in range(FRAMES):
+        frame = rng.integers(0, 16, size=(120, 160, 3), dtype=np.uint8)
+        frames.append(np.clip(frame.astype(np.int32) + base - i, 0, 255).astype(np.uint8))
+    return frames
+
+
+def run_request(frames, incremental):
+    if incremental:
+        return anti_spoofing.analyze_liveness_incremental(iter(frames), 30.0)
+    return anti_spoofing.analyze_liveness(frames, 30.0)
+
+
+def run_concurrently(workloads, incremental, mode):
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        if mode == "threads":
+            return list(executor.map(lambda frames: run_request(frames, incremental), workloads))
+
+        async def gather():
+            loop = asyncio.get_running_loop()
+            return await asyncio.gather(*(loop.run_in_executor(executor, run_request, frames, incremental)
+                                          for frames in workloads))
+        return asyncio.run(gather())
+
+
+@pytest.mark.parametrize("mode", ["threads", "asyncio"])
+@pytest.mark.parametrize("incremental", [False, True], ids=["completo", "incremental"])
+def test_concurrent_requests_get_their_own_scores(synthetic_model, incremental, mode):
+    rng = np.random.default_rng(0)
+    workloads = [make_request_frames(i, rng) for i in range(REQUESTS)]
+
+    expected = [run_request(frames, incremental) for frames in workloads]
+    actual = run_concurrently(workloads, incremental, mode)
+
+    # as requisições precisam ser distinguíveis para o teste detectar trocas
+    assert len({round(result.real_scores[0], 6) for result in expected}) > REQUESTS // 2
+
+    for request_id, (e, a) in enumerate(zip(expected, actual)):
+        assert a.real_scores == pytest.approx(e.real_scores, abs=1e-9), request_id
+        assert (a.reason, a.liveness) == (e.reason, e.liveness), request_id
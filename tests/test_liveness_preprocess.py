@@ -0,0 +1,25 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("PIL")
+pytest.importorskip("torchvision")
+augment = pytest.importorskip("ultralytics.data.augment")
+
+from PIL import Image  # noqa: E402
+
+from liveness_backend import preprocess  # noqa: E402
+
+
+@pytest.mark.parametrize("shape", [(480, 640), (640, 480), (224, 224), (150, 100), (721, 1283)])
+def test_preprocess_matches_ultralytics_classify_transforms(shape):
+    """ONNX/OpenVINO recebem exatamente o tensor que o backend torch recebe."""
+    rng = np.random.default_rng(0)
+    frame = cv2.GaussianBlur(rng.integers(0, 256, size=(*shape, 3), dtype=np.uint8), (5, 5), 0)
+    transforms = augment.classify_transforms(224)
+
+    expected = transforms(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))).numpy()
+    actual = preprocess([frame], 224)[0]
+
+    assert actual.shape == expected.shape
+    assert np.abs(actual - expected).max() < 1e-6
@@ -0,0 +1,46 @@
+import threading
+from concurrent.futures import Future
+
+from inference_server import MicroBatcher, _Request
+
+
+def test_collect_never_mixes_keys():
+    batcher = MicroBatcher(lambda frames, key: frames, max_frames=16, max_wait_ms=10)
+    old, new = object(), object()
+    for frame, key in (("a1", old), ("a2", old), ("b1", new), ("a3", old)):
+        batcher._queue.put(_Request([frame], Future(), key))
+
+    batches = [batcher._collect() for _ in range(3)]
+
+    assert [[item.frames[0] for item in batch] for batch in batches] == [["a1", "a2"], ["b1"], ["a3"]]
+    for batch in batches:
+        assert len({id(item.key) for item in batch}) == 1
+
+
+def test_predict_runs_on_the_request_key():
+    calls = []
+    lock = threading.Lock()
+
+    def predict_fn(frames, key):
+        with lock:
+            calls.append((key, list(frames)))
+        return [(key, frame) for frame in frames]
+
+    batcher = MicroBatcher(predict_fn, max_frames=8, max_wait_ms=20)
+    results = {}
+
+    def worker(i):
+        key = "v1" if i % 2 else "v2"
+        results[i] = (key, batcher.predict([f"f{i}-{j}" for j in range(3)], key=key))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for i, (key, outputs) in results.items():
+        assert outputs == [(key, f"f{i}-{j}") for j in range(3)]
+    for key, frames in calls:
+        assert all(frame.startswith("f") for frame in frames)
+        assert all((int(frame[1:].split("-")[0]) % 2 == 1) == (key == "v1") for frame in frames)
@@ -0,0 +1,230 @@
+"""
+Trace opcional por requisição: árvore de spans com os estágios do pipeline.
+
+Ativado pelo cabeçalho TRACE_HEADER (ex.: "X-Trace: 1") ou por amostragem
+(TRACE_SAMPLE_RATE). Cada metrics.stage vira um span, além de aberturas de
+cv2.VideoCapture, chamadas ao YOLO e comandos do MongoDB (via CommandListener).
+Ao final da requisição a árvore é resumida no cabeçalho Server-Timing e, com
+TRACE_DIR definido, gravada em arquivo rotativo no formato Chrome trace-event
+(abrir em chrome://tracing ou ui.perfetto.dev).
+
+O trace vive num contextvar: threads dos pools (inference_server.WorkerPool)
+herdam o contexto de quem submeteu a tarefa. Desativado, cada span custa uma
+leitura de contextvar.
+"""
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# ============================
+# CONFIGURAÇÕES
+# ============================
+
+# cabeçalho que ativa o trace na requisição (vazio = desativado)
+TRACE_HEADER = os.getenv("TRACE_HEADER", "X-Trace")
+
+# fração das requisições rastreadas sem o cabeçalho (0 a 1)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+
+# diretório dos arquivos de trace (vazio = apenas Server-Timing)
+TRACE_DIR = os.getenv("TRACE_DIR", "")
+
+# tamanho máximo de cada arquivo e quantidade de arquivos antigos mantidos
+TRACE_FILE_MAX_MB = float(os.getenv("TRACE_FILE_MAX_MB", "20"))
+TRACE_FILE_BACKUPS = int(os.getenv("TRACE_FILE_BACKUPS", "3"))
+
+
+_TRACE: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+_SPAN: ContextVar[Optional["Span"]] = ContextVar("trace_span", default=None)
+
+_NULL_SPAN = nullcontext()
+
+
+class Span:
+    __slots__ = ("trace", "name", "attrs", "parent", "start_ns", "end_ns", "thread_id", "_tokens")
+
+    def __init__(self, trace: "Trace", name: str, attrs: Dict, parent: Optional["Span"]):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.start_ns = 0
+        self.end_ns = 0
+        self.thread_id = 0
+        self._tokens = None
+
+    def start(self) -> "Span":
+        self.thread_id = threading.get_native_id()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def finish(self) -> None:
+        self.end_ns = time.perf_counter_ns()
+        self.trace.add(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    # usado como context manager: vira o span corrente (pai dos spans internos)
+    def __enter__(self) -> "Span":
+        self.start()
+        self._tokens = _SPAN.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _SPAN.reset(self._tokens)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.finish()
+        return False
+
+
+class Trace:
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.wall_start_us = time.time() * 1e6
+        self.perf_start_ns = time.perf_counter_ns()
+        self.spans: List[Span] = []
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            # spans de tarefas que terminam depois da resposta são descartados
+            if not self.finished:
+                self.spans.append(span)
+
+    def _ts_us(self, perf_ns: int) -> float:
+        return self.wall_start_us + (perf_ns - self.perf_start_ns) / 1000
+
+    def server_timing(self, total_ms: float) -> str:
+        """Soma das durações por nome de span, no formato do cabeçalho Server-Timing."""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            name = re.sub(r"[^A-Za-z0-9_.-]", "_", span.name)
+            totals[name] = totals.get(name, 0.0) + span.duration_ms
+
+        entries = [f"{name};dur={ms:.2f}" for name, ms in totals.items()]
+        entries.append(f"total;dur={total_ms:.2f}")
+        return ", ".join(entries)
+
+    def chrome_events(self, total_end_ns: int) -> List[Dict]:
+        pid = os.getpid()
+        root_tid = threading.get_native_id()
+        events = [{
+            "name": self.name, "ph": "X", "pid": pid, "tid": root_tid,
+            "ts": self.wall_start_us, "dur": (total_end_ns - self.perf_start_ns) / 1000,
+            "args": {"trace_id": self.id},
+        }]
+        for span in self.spans:
+            events.append({
+                "name": span.name, "ph": "X", "pid": pid, "tid": span.thread_id,
+                "ts": self._ts_us(span.start_ns), "dur": (span.end_ns - span.start_ns) / 1000,
+                "args": {"trace_id": self.id, "parent": span.parent.name if span.parent else self.name,
+                         **{k: str(v) for k, v in span.attrs.items()}},
+            })
+        return events
+
+
+def span(name: str, **attrs):
+    """Context manager de um span; sem trace ativo, não faz nada."""
+    trace = _TRACE.get()
+    if trace is None:
+        return _NULL_SPAN
+    return Span(trace, name, attrs, _SPAN.get())
+
+
+def start_span(name: str, **attrs) -> Optional[Span]:
+    """Span iniciado e terminado manualmente (finish), sem virar o span corrente."""
+    trace = _TRACE.get()
+    if trace is None:
+        return None
+    return Span(trace, name, attrs, _SPAN.get()).start()
+
+
+def current_trace() -> Optional[Trace]:
+    return _TRACE.get()
+
+
+def should_trace(headers) -> bool:
+    if TRACE_HEADER and headers.get(TRACE_HEADER, "").lower() in ("1", "true", "yes"):
+        return True
+    return TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+
+
+def begin(name: str):
+    """Inicia um trace no contexto atual. Retorna o token para `end`."""
+    trace = Trace(name)
+    return trace, (_TRACE.set(trace), _SPAN.set(None))
+
+
+def end(trace: Trace, tokens) -> str:
+    """Encerra o trace, grava no arquivo (se configurado) e retorna o Server-Timing."""
+    end_ns = time.perf_counter_ns()
+    _TRACE.reset(tokens[0])
+    _SPAN.reset(tokens[1])
+
+    with trace._lock:
+        trace.finished = True
+
+    if TRACE_DIR:
+        TRACE_WRITER.write(trace.chrome_events(end_ns))
+
+    return trace.server_timing((end_ns - trace.perf_start_ns) / 1e6)
+
+
+class _TraceWriter:
+    """
+    Arquivo JSON-array do Chrome trace-event, um por processo, com rotação por tamanho.
+    O "]" final é opcional no formato, então eventos são apenas acrescentados.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, backups: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"trace-{os.getpid()}.json")
+
+    def write(self, events: List[Dict]) -> None:
+        data = "".join(json.dumps(event, ensure_ascii=False) + ",\n" for event in events)
+        try:
+            with self._lock:
+                os.makedirs(self.directory, exist_ok=True)
+                path = self.path
+                if os.path.exists(path) and os.path.getsize(path) + len(data) > self.max_bytes:
+                    self._rotate(path)
+                new_file = not os.path.exists(path)
+                with open(path, "a", encoding="utf-8") as f:
+                    if new_file:
+                        f.write("[\n")
+                    f.write(data)
+        except OSError as e:
+            logger.warning("Falha ao gravar trace: %s", e)
+
+    def _rotate(self, path: str) -> None:
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{path}.{i}"):
+                os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+
+
+TRACE_WRITER = _TraceWriter(TRACE_DIR, int(TRACE_FILE_MAX_MB * 1024 * 1024), TRACE_FILE_BACKUPS)
@@ -1,12 +1,40 @@
 import cv2
 import base64
+import logging
 import numpy as np
 import os
-import tempfile
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Tuple, Optional
 import subprocess
-import os
-import uuid
+import threading
+from deadline import check_deadline, timeout_for, DeadlineExceeded
+from face_geometry import expand_face_bbox
+from logging_setup import SAMPLED
+from spool import SPOOL, SpoolFullError, is_disk_full
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# ============================
+# CONFIGURAÇÕES
+# ============================
+
+# largura alvo dos frames amostrados (0 = manter resolução da câmera)
+FRAME_TARGET_WIDTH = int(os.getenv("FRAME_TARGET_WIDTH", "640"))
+
+# limites do vídeo enviado
+MAX_VIDEO_MB = int(os.getenv("MAX_VIDEO_MB", "15"))
+MAX_VIDEO_SECONDS = 10.0
+
+# tamanho dos blocos copiados do upload para o disco
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+# confiança mínima da detecção de rosto usada no recorte
+FACE_CROP_CONFIDENCE = float(os.getenv("FACE_CROP_CONFIDENCE", "0.8"))
+
+
+class VideoTooLargeError(ValueError):
+    """Upload de vídeo ultrapassou o limite de tamanho durante a cópia."""
+
 
 def decode_base64_image(image_base64: str):
     """Converte string base64 em frame RGB (OpenCV)."""
@@ -17,9 +45,43 @@ def decode_base64_image(image_base64: str):
         rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         return rgb
     except Exception as e:
-        print(f"Erro ao decodificar imagem: {e}")
+        logger.error("Erro ao decodificar imagem: %s", e)
+        return None
+
+
+_face_detector_local = threading.local()
+
+
+def crop_face(frame: np.ndarray, confidence: float = FACE_CROP_CONFIDENCE) -> Optional[np.ndarray]:
+    """
+    Recorta o rosto de maior confiança do frame, com o mesmo detector (cvzone/mediapipe)
+    e as mesmas margens da coleta de dados de treino.
+    Retorna None se nenhum rosto passar da confiança mínima.
+    """
+    detector = getattr(_face_detector_local, "detector", None)
+    if detector is None:
+        # um detector por thread: o grafo do mediapipe não é thread-safe
+        from cvzone.FaceDetectionModule import FaceDetector
+        detector = _face_detector_local.detector = FaceDetector()
+
+    _, bboxs = detector.findFaces(frame, draw=False)
+    if not bboxs:
+        return None
+
+    best = max(bboxs, key=lambda b: b["score"][0])
+    if best["score"][0] <= confidence:
         return None
 
+    x, y, w, h = expand_face_bbox(*best["bbox"])
+    face = frame[y:y + h, x:x + w]
+    return face if face.size > 0 else None
+
+
+def open_video_capture(file_path: str) -> cv2.VideoCapture:
+    """cv2.VideoCapture registrado como span no trace da requisição."""
+    with span("video_capture_open"):
+        return cv2.VideoCapture(file_path)
+
 
 def validate_video_file(file_path: str, max_size_mb: int = 15) -> Tuple[bool, Optional[str]]:
     """
@@ -31,19 +93,19 @@ def validate_video_file(file_path: str, max_size_mb: int = 15) -> Tuple[bool, Op
         max_size_bytes = max_size_mb * 1024 * 1024
         file_size_mb = file_size / (1024 * 1024)
         
-        print(f"[DEBUG] Validação de vídeo - Tamanho: {file_size_mb:.2f} MB")
+        logger.debug("Validação de vídeo - Tamanho: %.2f MB", file_size_mb)
         
         if file_size > max_size_bytes:
-            print(f"[ERROR] Vídeo muito grande: {file_size_mb:.2f} MB > {max_size_mb} MB")
+            logger.warning("Vídeo muito grande: %.2f MB > %s MB", file_size_mb, max_size_mb)
             return False, f"Vídeo excede {max_size_mb} MB"
         
         if file_size == 0:
-            print("[ERROR] Arquivo de vídeo está vazio")
+            logger.warning("Arquivo de vídeo está vazio")
             return False, "Arquivo vazio"
         
-        cap = cv2.VideoCapture(file_path)
+        cap = open_video_capture(file_path)
         if not cap.isOpened():
-            print("[ERROR] Não foi possível abrir o vídeo com OpenCV")
+            logger.error("Não foi possível abrir o vídeo com OpenCV")
             return False, "Não foi possível abrir o vídeo"
         
         fps = cap.get(cv2.CAP_PROP_FPS)
@@ -53,11 +115,11 @@ def validate_video_file(file_path: str, max_size_mb: int = 15) -> Tuple[bool, Op
         fps_valid = 0 < fps <= 120
         frame_count_valid = 0 < frame_count < 1000000  # Evitar valores negativos ou absurdamente grandes
         
-        print(f"[DEBUG] Vídeo - FPS: {fps}, Frames: {frame_count}, FPS válido: {fps_valid}, Frame count válido: {frame_count_valid}")
+        logger.debug("Vídeo - FPS: %s, Frames: %s, FPS válido: %s, Frame count válido: %s", fps, frame_count, fps_valid, frame_count_valid)
         
         # Se metadados são inválidos, tentar validar lendo frames reais
         if not fps_valid or not frame_count_valid:
-            print("[DEBUG] Metadados inválidos, validando vídeo lendo frames reais...")
+            logger.debug("Metadados inválidos, validando vídeo lendo frames reais...")
             
             # Tentar ler frames para estimar duração real
             frames_read = 0
@@ -67,6 +129,7 @@ def validate_video_file(file_path: str, max_size_mb: int = 15) -> Tuple[bool, Op
             
             cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
             while frames_read < max_frames_to_test:
+                check_deadline("validation")
                 ret, frame = cap.read()
                 if not ret or frame is None:
                     break
@@ -81,156 +144,305 @@ def validate_video_file(file_path: str, max_size_mb: int = 15) -> Tuple[bool, Op
                 if frames_read >= 30 and end_time > start_time:
                     estimated_duration = end_time - start_time
                     if estimated_duration >= 1.0:
-                        print(f"[DEBUG] Duração estimada lendo frames: {estimated_duration:.2f}s ({frames_read} frames)")
+                        logger.debug("Duração estimada lendo frames: %.2fs (%s frames)", estimated_duration, frames_read)
                         
-                        if estimated_duration > 10.0:
+                        if estimated_duration > MAX_VIDEO_SECONDS:
                             cap.release()
-                            print(f"[ERROR] Vídeo muito longo: {estimated_duration:.2f}s > 10.0s")
+                            logger.warning("Vídeo muito longo: %.2fs > %ss", estimated_duration, MAX_VIDEO_SECONDS)
                             return False, "Vídeo excede duração máxima permitida"
                         
                         cap.release()
-                        print("[DEBUG] Validação de vídeo: OK (validação por leitura de frames)")
+                        logger.debug("Validação de vídeo: OK (validação por leitura de frames)")
                         return True, None
             
             # Se conseguiu ler pelo menos alguns frames, aceitar
             if frames_read >= 10:
                 cap.release()
-                print(f"[DEBUG] Validação de vídeo: OK (leu {frames_read} frames, metadados inválidos mas vídeo é válido)")
+                logger.debug("Validação de vídeo: OK (leu %s frames, metadados inválidos mas vídeo é válido)", frames_read)
                 return True, None
             else:
                 cap.release()
-                print(f"[ERROR] Não foi possível ler frames suficientes do vídeo ({frames_read} frames)")
+                logger.warning("Não foi possível ler frames suficientes do vídeo (%s frames)", frames_read)
                 return False, "Não foi possível validar o vídeo"
         
         # Se metadados são válidos, usar cálculo normal
         duration = frame_count / fps if fps > 0 else 0
         
-        print(f"[DEBUG] Duração calculada: {duration:.2f}s")
+        logger.debug("Duração calculada: %.2fs", duration)
         
         cap.release()
         
         if duration < 1.0:
-            print(f"[ERROR] Vídeo muito curto: {duration:.2f}s < 1.0s")
+            logger.warning("Vídeo muito curto: %.2fs < 1.0s", duration)
             return False, "Vídeo deve ter pelo menos 1 segundo de duração"
         
-        if duration > 10.0:
-            print(f"[ERROR] Vídeo muito longo: {duration:.2f}s > 10.0s")
+        if duration > MAX_VIDEO_SECONDS:
+            logger.warning("Vídeo muito longo: %.2fs > %ss", duration, MAX_VIDEO_SECONDS)
             return False, "Vídeo excede duração máxima permitida"
         
-        print("[DEBUG] Validação de vídeo: OK")
+        logger.debug("Validação de vídeo: OK")
         return True, None
     
+    except DeadlineExceeded:
+        raise
+
     except Exception as e:
-        print(f"[ERROR] Exceção ao validar vídeo: {str(e)}")
+        logger.error("Exceção ao validar vídeo: %s", e)
         return False, f"Erro ao validar vídeo: {str(e)}"
 
 
-def extract_frames_from_video(video_path: str, num_frames: int = 12) -> Tuple[List[np.ndarray], float]:
+def resize_to_width(frame: np.ndarray, target_width: Optional[int]) -> np.ndarray:
+    """Reduz o frame para a largura alvo mantendo a proporção (nunca amplia)."""
+    if not target_width or frame is None:
+        return frame
+
+    height, width = frame.shape[:2]
+    if width <= target_width:
+        return frame
+
+    target_height = max(1, int(round(height * target_width / width)))
+    return cv2.resize(frame, (target_width, target_height), interpolation=cv2.INTER_AREA)
+
+
+def coarse_to_fine_order(n: int) -> List[int]:
     """
-    Extrai frames uniformemente distribuídos do vídeo.
-    Retorna (frames_list, fps).
+    Ordem de visita de n posições uniformes, do grosso ao fino: meio do vídeo,
+    quartos, oitavos... Qualquer prefixo da ordem cobre o vídeo todo, então quem
+    para cedo ainda vê frames espalhados no tempo.
     """
-    frames = []
-    cap = cv2.VideoCapture(video_path)
-    
-    if not cap.isOpened():
-        print("[ERROR] Não foi possível abrir vídeo para extrair frames")
-        return [], 0.0
-    
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    
-    # Validar total_frames (WebM pode reportar valores inválidos)
-    total_frames_valid = 0 < total_frames < 1000000
-    
-    # Corrigir FPS inválido (WebM às vezes reporta FPS errado)
-    if fps <= 0 or fps > 120:
-        # Tentar calcular FPS real lendo alguns frames
-        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-        ret, _ = cap.read()
-        if ret:
-            # Ler alguns frames para estimar FPS
-            test_frames = 30
-            start_time = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
-            for _ in range(test_frames):
-                ret, _ = cap.read()
-                if not ret:
-                    break
-            end_time = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
-            if end_time > start_time:
-                estimated_fps = test_frames / (end_time - start_time)
-                if 1 <= estimated_fps <= 120:
-                    fps = estimated_fps
-                    print(f"[DEBUG] FPS corrigido: {fps:.2f} (estimado)")
-            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-        
-        # Se ainda inválido, usar FPS padrão
+    order = []
+    seen = set()
+    denominator = 2
+    while len(order) < n and denominator <= 2 * n:
+        for numerator in range(1, denominator, 2):
+            idx = min(n - 1, int(numerator * n / denominator))
+            if idx not in seen:
+                seen.add(idx)
+                order.append(idx)
+        denominator *= 2
+
+    order.extend(i for i in range(n) if i not in seen)
+    return order
+
+
+class FrameSampler:
+    """
+    Amostra frames uniformemente distribuídos do vídeo, entregando cada frame
+    assim que é decodificado (permite decisões incrementais sem esperar a
+    extração completa).
+
+    Os frames entregues são reduzidos para `target_width` (padrão FRAME_TARGET_WIDTH);
+    apenas o último frame entregue é mantido em resolução original, em
+    `identity_frame`, para o reconhecimento facial.
+
+    Com `coarse_to_fine=True` os frames saem na ordem de coarse_to_fine_order
+    (meio do vídeo primeiro) e `identity_frame` passa a ser o primeiro frame
+    entregue, disponível antes do fim da amostragem.
+
+    Uso:
+        with FrameSampler(path, num_frames=12) as sampler:
+            for frame in sampler:
+                ...
+    """
+
+    def __init__(self, video_path: str, num_frames: int = 12, target_width: Optional[int] = None,
+                 coarse_to_fine: bool = False):
+        self.video_path = video_path
+        self.num_frames = num_frames
+        self.coarse_to_fine = coarse_to_fine
+        self.target_width = FRAME_TARGET_WIDTH if target_width is None else target_width
+        self.cap = None
+        self.fps = 0.0
+        self.total_frames = 0
+        self.frames_yielded = 0
+        self.identity_frame = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def open(self) -> bool:
+        """Abre o vídeo e lê os metadados (FPS corrigido e total de frames)."""
+        self.cap = open_video_capture(self.video_path)
+
+        if not self.cap.isOpened():
+            logger.error("Não foi possível abrir vídeo para extrair frames")
+            self.cap = None
+            return False
+
+        self.fps = self._read_fps()
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        return True
+
+    def close(self) -> None:
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def _read_fps(self) -> float:
+        cap = self.cap
+        fps = cap.get(cv2.CAP_PROP_FPS)
+
+        # Corrigir FPS inválido (WebM às vezes reporta FPS errado)
         if fps <= 0 or fps > 120:
-            fps = 30.0
-            print(f"[DEBUG] FPS inválido, usando padrão: {fps}")
-    
-    print(f"[DEBUG] Extraindo frames - Total: {total_frames}, FPS: {fps:.2f}, Solicitados: {num_frames}, Total válido: {total_frames_valid}")
-    
-    # Se total_frames é inválido, usar leitura sequencial diretamente
-    if not total_frames_valid:
-        print("[DEBUG] Total de frames inválido, usando leitura sequencial direta")
-        
+            # Tentar calcular FPS real lendo alguns frames
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, _ = cap.read()
+            if ret:
+                # Ler alguns frames para estimar FPS
+                test_frames = 30
+                start_time = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                for _ in range(test_frames):
+                    ret, _ = cap.read()
+                    if not ret:
+                        break
+                end_time = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                if end_time > start_time:
+                    estimated_fps = test_frames / (end_time - start_time)
+                    if 1 <= estimated_fps <= 120:
+                        fps = estimated_fps
+                        logger.debug("FPS corrigido: %.2f (estimado)", fps)
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+            # Se ainda inválido, usar FPS padrão
+            if fps <= 0 or fps > 120:
+                fps = 30.0
+                logger.debug("FPS inválido, usando padrão: %s", fps)
+
+        return fps
+
+    def _emit(self, frame: np.ndarray) -> np.ndarray:
+        self.frames_yielded += 1
+        if self.identity_frame is None or not self.coarse_to_fine:
+            self.identity_frame = frame
+        return resize_to_width(frame, self.target_width)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        if self.cap is None:
+            return
+
+        num_frames = self.num_frames
+        total_frames = self.total_frames
+
+        # Validar total_frames (WebM pode reportar valores inválidos)
+        total_frames_valid = 0 < total_frames < 1000000
+
+        logger.debug("Extraindo frames - Total: %s, FPS: %.2f, Solicitados: %s, Total válido: %s", total_frames, self.fps, num_frames, total_frames_valid)
+
+        # Se total_frames é inválido, usar leitura sequencial diretamente
+        if not total_frames_valid:
+            yield from self._iter_sequential()
+            return
+
+        # Se total_frames é válido, tentar usar índices calculados
+        cap = self.cap
+        frame_indices = np.linspace(0, total_frames - 1, num_frames, dtype=int)
+        if self.coarse_to_fine:
+            frame_indices = frame_indices[coarse_to_fine_order(len(frame_indices))]
+        logger.debug("Tentando extrair frames nos índices: %s", frame_indices, extra=SAMPLED)
+
+        for idx in frame_indices:
+            check_deadline("frame_extraction")
+            if idx < 0:  # Pular índices inválidos
+                continue
+            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+            ret, frame = cap.read()
+            if ret and frame is not None:
+                yield self._emit(frame)
+            else:
+                # Se falhar, tentar ler frame sequencialmente
+                logger.debug("Falha ao ler frame %s, tentando método alternativo", idx, extra=SAMPLED)
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                for i in range(idx + 1):
+                    check_deadline("frame_extraction")
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                if ret and frame is not None:
+                    yield self._emit(frame)
+
+        # Se ainda não conseguiu frames suficientes, completar com leitura sequencial
+        if self.frames_yielded < num_frames:
+            logger.warning("Apenas %s frames extraídos, tentando leitura sequencial", self.frames_yielded)
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            step = max(1, total_frames // num_frames)
+            for i in range(0, total_frames, step):
+                check_deadline("frame_extraction")
+                ret, frame = cap.read()
+                if ret and frame is not None:
+                    yield self._emit(frame)
+                    if self.frames_yielded >= num_frames:
+                        break
+
+        logger.debug("Frames extraídos com sucesso: %s/%s", self.frames_yielded, num_frames)
+
+    def _iter_sequential(self) -> Iterator[np.ndarray]:
+        num_frames = self.num_frames
+        logger.debug("Total de frames inválido, usando leitura sequencial direta")
+
         # Fechar e reabrir o vídeo para garantir estado limpo (importante para WebM/VP9)
-        cap.release()
-        cap = cv2.VideoCapture(video_path)
-        
+        self.cap.release()
+        self.cap = open_video_capture(self.video_path)
+        cap = self.cap
+
         if not cap.isOpened():
-            print("[ERROR] Não foi possível reabrir vídeo para extrair frames")
-            return [], fps
-        
+            logger.error("Não foi possível reabrir vídeo para extrair frames")
+            return
+
         # Tentar configurar para melhor compatibilidade com WebM
         cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        
-        # Ler todos os frames disponíveis
+
+        # Ler todos os frames disponíveis (já reduzidos)
         all_frames = []
+        last_full_frame = None
         max_frames_to_read = 1000  # Limite de segurança
         consecutive_failures = 0
         max_consecutive_failures = 30  # Aumentar tolerância para WebM/VP9
         total_attempts = 0
         successful_reads = 0
-        
-        print("[DEBUG] Iniciando leitura sequencial de frames...")
-        
+
+        logger.debug("Iniciando leitura sequencial de frames...")
+
         # Tentar ler pelo menos alguns frames antes de desistir
         while len(all_frames) < max_frames_to_read and total_attempts < max_frames_to_read * 2:
             total_attempts += 1
+            check_deadline("frame_extraction")
             ret, frame = cap.read()
-            
+
             if not ret or frame is None:
                 consecutive_failures += 1
-                
+
                 # Se já leu alguns frames, parar após muitas falhas
                 if successful_reads > 0 and consecutive_failures >= max_consecutive_failures:
-                    print(f"[DEBUG] Muitas falhas consecutivas ({consecutive_failures}) após {successful_reads} frames, parando leitura")
+                    logger.debug("Muitas falhas consecutivas (%s) após %s frames, parando leitura", consecutive_failures, successful_reads)
                     break
-                
+
                 # Se ainda não leu nenhum frame, continuar tentando
                 if successful_reads == 0:
                     # Tentar resetar posição a cada 20 tentativas
                     if total_attempts % 20 == 0:
                         cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                        print(f"[DEBUG] Resetando posição do vídeo (tentativa {total_attempts})")
+                        logger.debug("Resetando posição do vídeo (tentativa %s)", total_attempts, extra=SAMPLED)
                 continue
-            
+
             consecutive_failures = 0
             successful_reads += 1
-            all_frames.append(frame)
-            
+            all_frames.append(resize_to_width(frame, self.target_width))
+            last_full_frame = frame
+
             # Log a cada 10 frames para debug
             if len(all_frames) % 10 == 0:
-                print(f"[DEBUG] Frames lidos até agora: {len(all_frames)}")
-        
-        print(f"[DEBUG] Total de frames lidos: {len(all_frames)}")
-        
+                logger.debug("Frames lidos até agora: %s", len(all_frames), extra=SAMPLED)
+
+        logger.debug("Total de frames lidos: %s", len(all_frames))
+
         if len(all_frames) == 0:
-            cap.release()
-            return [], fps
-        
+            return
+
         # Amostrar uniformemente dos frames lidos
         if len(all_frames) >= num_frames:
             step = max(1, len(all_frames) // num_frames)
@@ -238,80 +450,134 @@ def extract_frames_from_video(video_path: str, num_frames: int = 12) -> Tuple[Li
         else:
             # Se tem menos frames que o solicitado, usar todos
             frames = all_frames
-        
-        print(f"[DEBUG] Frames extraídos com sucesso: {len(frames)}/{num_frames} (de {len(all_frames)} frames totais)")
-        cap.release()
-        return frames, fps
-    
-    # Se total_frames é válido, tentar usar índices calculados
-    frame_indices = np.linspace(0, total_frames - 1, num_frames, dtype=int)
-    print(f"[DEBUG] Tentando extrair frames nos índices: {frame_indices.tolist()}")
-    
-    for idx in frame_indices:
-        if idx < 0:  # Pular índices inválidos
-            continue
-        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-        ret, frame = cap.read()
-        if ret and frame is not None:
-            frames.append(frame)
-        else:
-            # Se falhar, tentar ler frame sequencialmente
-            print(f"[WARNING] Falha ao ler frame {idx}, tentando método alternativo")
-            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            for i in range(idx + 1):
-                ret, frame = cap.read()
-                if not ret:
-                    break
-            if ret and frame is not None:
-                frames.append(frame)
-    
-    # Se ainda não conseguiu frames suficientes, ler sequencialmente
-    if len(frames) < num_frames:
-        print(f"[WARNING] Apenas {len(frames)} frames extraídos, tentando leitura sequencial")
-        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-        frames = []
-        step = max(1, total_frames // num_frames)
-        for i in range(0, total_frames, step):
-            ret, frame = cap.read()
-            if ret and frame is not None:
-                frames.append(frame)
-                if len(frames) >= num_frames:
-                    break
-    
-    print(f"[DEBUG] Frames extraídos com sucesso: {len(frames)}/{num_frames}")
-    cap.release()
-    return frames, fps
 
+        if self.coarse_to_fine:
+            frames = [frames[i] for i in coarse_to_fine_order(len(frames))]
+
+        logger.debug("Frames extraídos com sucesso: %s/%s (de %s frames totais)", len(frames), num_frames, len(all_frames))
+
+        # no modo sequencial o frame de identidade é o último frame decodificado
+        self.identity_frame = last_full_frame
+        for frame in frames:
+            self.frames_yielded += 1
+            yield frame
+
+
+def extract_frames_from_video(video_path: str, num_frames: int = 12,
+                              target_width: Optional[int] = None) -> Tuple[List[np.ndarray], float, Optional[np.ndarray]]:
+    """
+    Extrai frames uniformemente distribuídos do vídeo.
+    Os frames são reduzidos para `target_width` (padrão FRAME_TARGET_WIDTH) logo após
+    a leitura; apenas o último frame amostrado é mantido em resolução original,
+    para o reconhecimento facial.
+    Retorna (frames_list, fps, identity_frame).
+    """
+    with FrameSampler(video_path, num_frames=num_frames, target_width=target_width) as sampler:
+        if sampler.cap is None:
+            return [], 0.0, None
+
+        frames = list(sampler)
+        return frames, sampler.fps, sampler.identity_frame
 
-def save_temp_video(file_storage, video_format: str = "mp4") -> Optional[str]:
+
+def save_temp_video(file_storage, video_format: str = "mp4", max_bytes: Optional[int] = None) -> Optional[str]:
     """
-    Salva arquivo de vídeo temporário com nome seguro.
+    Salva arquivo de vídeo temporário com nome seguro no spool (ver spool.py).
+    O upload é copiado em blocos com contador de bytes; se `max_bytes` for
+    ultrapassado a cópia é interrompida e VideoTooLargeError é lançada.
+    SpoolFullError é propagada quando a cota do spool acaba.
+    O chamador deve liberar o arquivo com SPOOL.release(path).
     Retorna caminho do arquivo ou None em caso de erro.
     """
+    path = None
     try:
         # Criar arquivo temporário com extensão apropriada
-        suffix = f".{video_format}"
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix, mode='wb')
-        
-        # Salvar conteúdo do upload
-        file_storage.seek(0)
-        temp_file.write(file_storage.read())
-        temp_file.close()
-        
-        # Restringir permissões (apenas leitura para o dono)
-        os.chmod(temp_file.name, 0o600)
-        
-        return temp_file.name
+        # e permissões restritas (leitura/escrita apenas para o dono)
+        path = SPOOL.new_path(f".{video_format}")
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+
+        with os.fdopen(fd, "wb") as temp_file:
+            # Salvar conteúdo do upload em blocos
+            file_storage.stream.seek(0)
+            written = 0
+            while True:
+                chunk = file_storage.stream.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+
+                written += len(chunk)
+                if max_bytes is not None and written > max_bytes:
+                    raise VideoTooLargeError(f"Vídeo excede {max_bytes // (1024 * 1024)} MB")
+
+                SPOOL.charge(path, len(chunk))
+                temp_file.write(chunk)
+
+        return path
     
+    except (VideoTooLargeError, SpoolFullError) as e:
+        logger.warning("Upload interrompido: %s", e)
+        SPOOL.release(path)
+        raise
+
     except Exception as e:
-        print(f"Erro ao salvar vídeo temporário: {e}")
+        SPOOL.release(path)
+        # sistema de arquivos cheio (outros workers usando o mesmo spool): 503, não 500
+        if is_disk_full(e):
+            logger.warning("Upload interrompido: spool sem espaço (%s)", e)
+            raise SpoolFullError(f"Sistema de arquivos do spool cheio: {e}") from e
+        logger.error("Erro ao salvar vídeo temporário: %s", e)
         return None
 
 
-def convert_to_mp4(input_path: str, output_dir: str = "tmp_videos") -> str:
-    """Converte um vídeo para MP4 usando ffmpeg."""
-    os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, f"{uuid.uuid4()}.mp4")
+def probe_video_duration(file_path: str, timeout: float = 5.0) -> Optional[float]:
+    """
+    Lê a duração declarada no cabeçalho do container, sem decodificar frames.
+    Usa ffprobe e, na falta dele, os metadados do OpenCV.
+    Retorna None quando o container não declara a duração (comum em WebM do MediaRecorder).
+    """
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        file_path
+    ]
+
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout_for(timeout), check=True)
+        value = result.stdout.decode().strip()
+        duration = float(value)
+        if duration > 0:
+            return duration
+        return None
+    except (OSError, subprocess.SubprocessError, ValueError):
+        pass
+
+    cap = open_video_capture(file_path)
+    try:
+        if not cap.isOpened():
+            return None
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        if 0 < fps <= 120 and 0 < frame_count < 1000000:
+            return frame_count / fps
+        return None
+    finally:
+        cap.release()
+
+
+def convert_to_mp4(input_path: str) -> str:
+    """
+    Converte um vídeo para MP4 usando ffmpeg, gravando a saída no spool.
+    O tamanho da saída é limitado ao espaço restante na cota (-fs); se o limite
+    for atingido, a saída truncada é descartada e SpoolFullError é levantado.
+    O chamador deve liberar o arquivo com SPOOL.release(path).
+    """
+    output_path = SPOOL.new_path(".mp4")
+    remaining = SPOOL.remaining_bytes()
+    if remaining <= 0:
+        SPOOL.release(output_path)
+        raise SpoolFullError("Spool cheio, conversão não iniciada")
     
     cmd = [
         "ffmpeg",
@@ -322,8 +588,33 @@ def convert_to_mp4(input_path: str, output_dir: str = "tmp_videos") -> str:
         "-crf", "23",
         "-c:a", "aac",
         "-b:a", "128k",
+        "-fs", str(remaining),
         output_path
     ]
     
-    subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        try:
+            _, stderr = process.communicate(timeout=timeout_for())
+        except subprocess.TimeoutExpired:
+            # cliente já desistiu: interrompe o ffmpeg em vez de terminar a conversão
+            process.kill()
+            process.communicate()
+            raise DeadlineExceeded("transcode")
+        if process.returncode != 0:
+            if b"No space left on device" in (stderr or b""):
+                raise SpoolFullError("Sistema de arquivos do spool cheio durante a conversão")
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+        size = os.path.getsize(output_path)
+        # ffmpeg encerra com sucesso ao atingir -fs: a saída estaria truncada
+        if size >= remaining:
+            raise SpoolFullError("Cota do spool atingida durante a conversão (saída truncada)")
+        SPOOL.charge(output_path, size)
+    except BaseException:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        SPOOL.release(output_path)
+        raise
+
     return output_path
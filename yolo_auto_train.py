@@ -12,6 +12,7 @@ from itertools import islice
 from ultralytics import YOLO
 from time import time
 import argparse
+from face_geometry import expand_face_bbox, OFFSET_W, OFFSET_H
 
 # Configurações
 OUTPUT_FOLDER = 'Dataset/DataCollect'
@@ -21,9 +22,10 @@ CLASSES = ["fake", "real"]
 SPLIT_RATIO = {"train": 0.7, "val": 0.2, "test": 0.1}
 CONFIDENCE = 0.8
 BLUR_THRESHOLD = 35
-OFFSET_W = 10
-OFFSET_H = 20
 FLOATING_POINT = 6
+CROP_FOLDER = 'Dataset/CropData'
+CROP_MODEL_OUTPUT = 'models/anti_spoofing_crop_cls.pt'
+CROP_IMGSZ = 128
 
 def collect_from_camera(class_id, class_name, min_images=100):
     """Coleta dados da câmera para uma classe específica."""
@@ -59,20 +61,8 @@ def collect_from_camera(class_id, class_name, min_images=100):
                 score = bbox["score"][0]
                 
                 if score > CONFIDENCE:
-                    # Offset
-                    offsetW = (OFFSET_W / 100) * w
-                    x = int(x - offsetW)
-                    w = int(w + offsetW * 2)
-                    
-                    offsetH = (OFFSET_H / 100) * h
-                    y = int(y - offsetH * 3)
-                    h = int(h + offsetH * 3.5)
-                    
-                    # Clamp
-                    x = max(0, x)
-                    y = max(0, y)
-                    w = max(0, w)
-                    h = max(0, h)
+                    # Offset + clamp (mesma lógica do recorte em produção)
+                    x, y, w, h = expand_face_bbox(x, y, w, h, OFFSET_W, OFFSET_H)
                     
                     # Blur check
                     imgFace = img[y:y + h, x:x + w]
@@ -181,19 +171,8 @@ def collect_from_video(video_path, class_id, output_folder):
                 score = bbox["score"][0]
                 
                 if score > CONFIDENCE:
-                    # Offset
-                    offsetW = (OFFSET_W / 100) * w
-                    x = int(x - offsetW)
-                    w = int(w + offsetW * 2)
-                    
-                    offsetH = (OFFSET_H / 100) * h
-                    y = int(y - offsetH * 3)
-                    h = int(h + offsetH * 3.5)
-                    
-                    x = max(0, x)
-                    y = max(0, y)
-                    w = max(0, w)
-                    h = max(0, h)
+                    # Offset + clamp (mesma lógica do recorte em produção)
+                    x, y, w, h = expand_face_bbox(x, y, w, h, OFFSET_W, OFFSET_H)
                     
                     # Blur check
                     imgFace = frame[y:y + h, x:x + w]
@@ -306,6 +285,119 @@ names: {CLASSES}'''
     print(f"[OK] Data.yaml criado: {yamlPath}")
     return True
 
+def export_face_crops():
+    """
+    Exporta recortes de rosto dos splits para treinar o classificador no modo face_crop.
+    Os labels já contêm o bbox com as margens (OFFSET_W/OFFSET_H), então o recorte
+    é o mesmo que anti_spoofing.py faz em produção.
+    Saída no formato de classificação do ultralytics: CROP_FOLDER/<split>/<classe>/*.jpg
+    """
+    print(f"\n{'='*60}")
+    print("EXPORTANDO RECORTES DE ROSTO")
+    print(f"{'='*60}")
+    
+    if not os.path.exists(SPLIT_FOLDER):
+        print(f"[ERRO] Pasta de split não encontrada: {SPLIT_FOLDER}")
+        return False
+    
+    try:
+        shutil.rmtree(CROP_FOLDER)
+    except:
+        pass
+    
+    total = 0
+    for split in ['train', 'val', 'test']:
+        for class_name in CLASSES:
+            os.makedirs(f"{CROP_FOLDER}/{split}/{class_name}", exist_ok=True)
+        
+        imagesDir = f"{SPLIT_FOLDER}/{split}/images"
+        labelsDir = f"{SPLIT_FOLDER}/{split}/labels"
+        if not os.path.exists(imagesDir):
+            continue
+        
+        count = 0
+        for imgName in os.listdir(imagesDir):
+            if not imgName.endswith('.jpg'):
+                continue
+            
+            fileName = imgName.split('.')[0]
+            labelPath = f"{labelsDir}/{fileName}.txt"
+            if not os.path.exists(labelPath):
+                continue
+            
+            img = cv2.imread(f"{imagesDir}/{imgName}")
+            if img is None:
+                continue
+            ih, iw, _ = img.shape
+            
+            with open(labelPath) as f:
+                lines = [line.split() for line in f if line.strip()]
+            
+            for i, (class_id, xcn, ycn, wn, hn) in enumerate(lines):
+                w, h = float(wn) * iw, float(hn) * ih
+                x = int(max(0, float(xcn) * iw - w / 2))
+                y = int(max(0, float(ycn) * ih - h / 2))
+                imgFace = img[y:y + int(h), x:x + int(w)]
+                if imgFace.size == 0:
+                    continue
+                
+                cv2.imwrite(f"{CROP_FOLDER}/{split}/{CLASSES[int(class_id)]}/{fileName}_{i}.jpg", imgFace)
+                count += 1
+        
+        print(f"{split}: {count} recortes")
+        total += count
+    
+    print(f"[OK] {total} recortes exportados em: {CROP_FOLDER}")
+    return total > 0
+
+def train_crop_model(epochs=50, imgsz=CROP_IMGSZ):
+    """Treina o classificador YOLO-CLS nos recortes de rosto (entrada menor)."""
+    print(f"\n{'='*60}")
+    print("TREINANDO CLASSIFICADOR DE RECORTES")
+    print(f"{'='*60}")
+    
+    if not os.path.exists(f"{CROP_FOLDER}/train"):
+        print(f"[ERRO] Recortes não encontrados: {CROP_FOLDER}")
+        return False
+    
+    os.makedirs('models', exist_ok=True)
+    
+    print(f"Modelo base: yolov8n-cls.pt")
+    print(f"Épocas: {epochs}")
+    print(f"Resolução: {imgsz}")
+    
+    try:
+        model = YOLO('yolov8n-cls.pt')
+        
+        model.train(
+            data=CROP_FOLDER,
+            epochs=epochs,
+            imgsz=imgsz,
+            batch=32,
+            name='anti_spoofing_crop_cls',
+            project='runs/classify',
+            save=True,
+            val=True,
+        )
+        
+        model.save(CROP_MODEL_OUTPUT)
+        
+        print(f"\n{'='*60}")
+        print(f"[SUCESSO] Treinamento concluído!")
+        print(f"Modelo salvo em: {CROP_MODEL_OUTPUT}")
+        print(f"\nConfigure no .env:")
+        print(f"YOLO_MODEL_PATH={CROP_MODEL_OUTPUT}")
+        print(f"LIVENESS_INPUT=face_crop")
+        print(f"LIVENESS_CROP_IMGSZ={imgsz}")
+        print(f"YOLO_INVERT_CLASSES=false  # classes em ordem alfabética: fake=0, real=1")
+        print(f"{'='*60}")
+        
+        return True
+        
+    except Exception as e:
+        print(f"[ERRO] Falha no treinamento: {e}")
+        return False
+
 def train_model(epochs=50):
     """Treina o modelo YOLO."""
     print(f"\n{'='*60}")
@@ -366,6 +458,10 @@ def main():
                        help='Número de épocas para treinamento')
     parser.add_argument('--skip-train', action='store_true', 
                        help='Pular treinamento (apenas coletar e dividir)')
+    parser.add_argument('--crop', action='store_true',
+                       help='Exportar recortes de rosto e treinar o classificador de recortes')
+    parser.add_argument('--crop-imgsz', type=int, default=CROP_IMGSZ,
+                       help='Resolução de entrada do classificador de recortes')
     
     args = parser.parse_args()
     
@@ -407,10 +503,18 @@ def main():
         print("[ERRO] Falha na divisão de dados")
         return
     
+    # Fase 2b: Recortes de rosto
+    if args.crop:
+        print("\n[FASE 2b] Exportando recortes de rosto...")
+        if not export_face_crops():
+            print("[ERRO] Falha na exportação de recortes")
+            return
+    
     # Fase 3: Treinamento
     if not args.skip_train:
         print("\n[FASE 3] Treinando modelo...")
-        if not train_model(args.epochs):
+        trained = train_crop_model(args.epochs, args.crop_imgsz) if args.crop else train_model(args.epochs)
+        if not trained:
             print("[ERRO] Falha no treinamento")
             return
     else:
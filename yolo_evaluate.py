@@ -0,0 +1,143 @@
+"""
+Script para avaliar modelos do classificador anti-spoofing no split de teste.
+Reporta acurácia, divergência em relação ao modelo de referência (o primeiro),
+latência e throughput. Com --max-drop funciona como gate de acurácia (exit 1).
+
+Exemplo:
+    python yolo_evaluate.py --models best.onnx best_int8.onnx --max-drop 0.01
+"""
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from liveness_backend import load_backend
+
+# Configurações
+SPLIT_FOLDER = 'Dataset/SplitData'
+CLASSES = ["fake", "real"]
+
+
+def load_split(split_folder, split, limit=None):
+    """Carrega (imagens, rótulos) de um split gerado por yolo_auto_train.split_data."""
+    images_dir = f"{split_folder}/{split}/images"
+    labels_dir = f"{split_folder}/{split}/labels"
+
+    if not os.path.exists(images_dir):
+        print(f"[ERRO] Pasta não encontrada: {images_dir}")
+        return [], []
+
+    images, labels = [], []
+    for name in sorted(os.listdir(images_dir)):
+        if not name.endswith('.jpg'):
+            continue
+
+        label_path = f"{labels_dir}/{name.rsplit('.', 1)[0]}.txt"
+        if not os.path.exists(label_path):
+            continue
+
+        with open(label_path) as f:
+            first_line = f.readline().split()
+        if not first_line:
+            continue
+
+        image = cv2.imread(f"{images_dir}/{name}")
+        if image is None:
+            continue
+
+        images.append(image)
+        labels.append(int(first_line[0]))
+
+        if limit and len(images) >= limit:
+            break
+
+    return images, labels
+
+
+def evaluate_model(model_path, images, labels, invert_classes, batch_size=8, imgsz=0):
+    """Roda o modelo em todas as imagens e calcula acurácia, latência e throughput."""
+    model = load_backend(model_path, imgsz=imgsz)
+
+    # warmup
+    model.predict(images[:1])
+
+    real_probs = []
+    batch_times = []
+    start = time.perf_counter()
+    for i in range(0, len(images), batch_size):
+        batch = images[i:i + batch_size]
+        t0 = time.perf_counter()
+        probs = model.predict(batch)
+        batch_times.append((time.perf_counter() - t0) * 1000.0 / len(batch))
+        for p in probs:
+            real_probs.append(p[0] if invert_classes else p[1])
+    total = time.perf_counter() - start
+
+    predictions = [1 if p >= 0.5 else 0 for p in real_probs]
+    correct = sum(1 for pred, label in zip(predictions, labels) if pred == label)
+
+    return {
+        "model": model_path,
+        "backend": model.name,
+        "accuracy": correct / len(labels) if labels else 0.0,
+        "latency_ms_per_frame": float(np.median(batch_times)) if batch_times else 0.0,
+        "throughput_fps": len(images) / total if total > 0 else 0.0,
+        "real_probs": real_probs,
+        "predictions": predictions,
+    }
+
+
+def compare(results, max_drop=None):
+    """Imprime a comparação com o modelo de referência. Retorna False se o gate falhar."""
+    reference = results[0]
+    passed = True
+
+    print(f"\n{'modelo':<36} {'acc':>7} {'Δacc':>7} {'concord.':>9} {'Δprob':>7} {'ms/frame':>9} {'fps':>8} {'speedup':>8}")
+    for r in results:
+        drop = reference["accuracy"] - r["accuracy"]
+        agreement = np.mean([a == b for a, b in zip(r["predictions"], reference["predictions"])])
+        drift = np.mean([abs(a - b) for a, b in zip(r["real_probs"], reference["real_probs"])])
+        speedup = reference["latency_ms_per_frame"] / r["latency_ms_per_frame"] if r["latency_ms_per_frame"] else 0.0
+
+        print(f"{r['model']:<36} {r['accuracy']:>7.4f} {-drop:>+7.4f} {agreement:>9.4f} {drift:>7.4f} "
+              f"{r['latency_ms_per_frame']:>9.2f} {r['throughput_fps']:>8.1f} {speedup:>7.2f}x")
+
+        if max_drop is not None and drop > max_drop:
+            print(f"[GATE] {r['model']}: queda de acurácia {drop:.4f} > {max_drop}")
+            passed = False
+
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Avaliação do classificador anti-spoofing')
+    parser.add_argument('--models', nargs='+', required=True,
+                        help='Modelos a avaliar (o primeiro é a referência)')
+    parser.add_argument('--split', default='test', choices=['train', 'val', 'test'])
+    parser.add_argument('--split-folder', default=SPLIT_FOLDER)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--imgsz', type=int, default=0)
+    parser.add_argument('--limit', type=int, default=None, help='Máximo de imagens avaliadas')
+    parser.add_argument('--max-drop', type=float, default=None,
+                        help='Queda máxima de acurácia aceita em relação à referência')
+
+    args = parser.parse_args()
+    invert_classes = os.getenv("YOLO_INVERT_CLASSES", "true").lower() == "true"
+
+    images, labels = load_split(args.split_folder, args.split, args.limit)
+    if not images:
+        print(f"[ERRO] Nenhuma imagem rotulada em {args.split_folder}/{args.split}")
+        exit(1)
+
+    print(f"[INFO] {len(images)} imagens ({args.split}), classes invertidas: {invert_classes}")
+
+    results = [evaluate_model(m, images, labels, invert_classes, args.batch_size, args.imgsz) for m in args.models]
+
+    if not compare(results, args.max_drop):
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
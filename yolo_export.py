@@ -0,0 +1,57 @@
+"""
+Script para exportar o classificador anti-spoofing (best.pt) para ONNX e/ou OpenVINO IR.
+Os modelos exportados são carregados por anti_spoofing.py via YOLO_MODEL_PATH
+(o backend é escolhido pela extensão ou por LIVENESS_BACKEND).
+"""
+import argparse
+import os
+
+from ultralytics import YOLO
+
+
+def export_model(model_path, fmt, imgsz=None, dynamic=True):
+    """Exporta o modelo no formato indicado e retorna o caminho gerado."""
+    model = YOLO(model_path)
+
+    export_args = {"format": fmt}
+    if imgsz:
+        export_args["imgsz"] = imgsz
+
+    if fmt == "onnx":
+        # batch dinâmico para permitir inferência em lote
+        export_args["dynamic"] = dynamic
+        export_args["simplify"] = True
+    elif fmt == "openvino":
+        export_args["dynamic"] = dynamic
+
+    output = model.export(**export_args)
+    print(f"[OK] {fmt.upper()} exportado: {output}")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exportar classificador YOLO anti-spoofing para ONNX/OpenVINO')
+    parser.add_argument('--model', default='best.pt', help='Modelo PyTorch de origem')
+    parser.add_argument('--format', choices=['onnx', 'openvino', 'all'], default='onnx',
+                        help='Formato de exportação')
+    parser.add_argument('--imgsz', type=int, default=None,
+                        help='Resolução de entrada (padrão: a usada no treinamento)')
+    parser.add_argument('--static', action='store_true',
+                        help='Exportar com batch fixo (1) em vez de dinâmico')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"[ERRO] Modelo não encontrado: {args.model}")
+        exit(1)
+
+    formats = ['onnx', 'openvino'] if args.format == 'all' else [args.format]
+    outputs = [export_model(args.model, fmt, args.imgsz, dynamic=not args.static) for fmt in formats]
+
+    print(f"\n[PRÓXIMO PASSO] Configure no .env um dos modelos exportados:")
+    for output in outputs:
+        print(f"YOLO_MODEL_PATH={output}")
+
+
+if __name__ == "__main__":
+    main()
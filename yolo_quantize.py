@@ -0,0 +1,129 @@
+"""
+Script para quantizar o classificador anti-spoofing para INT8 (ONNX Runtime, pós-treinamento).
+A calibração usa as imagens de Dataset/SplitData/val (geradas por yolo_auto_train.split_data)
+e, ao final, o modelo é avaliado no split de teste contra o modelo FP32 (gate de acurácia).
+
+O modelo gerado é carregado normalmente por anti_spoofing.py:
+    YOLO_MODEL_PATH=best_int8.onnx
+
+Exemplo:
+    python yolo_export.py --model best.pt --format onnx
+    python yolo_quantize.py --model best.onnx --output best_int8.onnx --max-drop 0.01
+"""
+import argparse
+import os
+
+import cv2
+import onnxruntime as ort
+from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+from onnxruntime.quantization.shape_inference import quant_pre_process
+
+from liveness_backend import preprocess, DEFAULT_CLS_IMGSZ
+from yolo_evaluate import load_split, evaluate_model, compare, SPLIT_FOLDER
+
+
+class SplitCalibrationReader(CalibrationDataReader):
+    """Entrega imagens do split de validação, pré-processadas como em produção."""
+
+    def __init__(self, model_path, images_dir, imgsz, limit):
+        session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        model_input = session.get_inputs()[0]
+        self.input_name = model_input.name
+        size = model_input.shape[2]
+        self.imgsz = size if isinstance(size, int) and size > 0 else (imgsz or DEFAULT_CLS_IMGSZ)
+
+        names = sorted(f for f in os.listdir(images_dir) if f.endswith('.jpg'))[:limit]
+        self.paths = [os.path.join(images_dir, n) for n in names]
+        self.index = 0
+        print(f"[INFO] Calibração: {len(self.paths)} imagens de {images_dir} (imgsz={self.imgsz})")
+
+    def get_next(self):
+        while self.index < len(self.paths):
+            image = cv2.imread(self.paths[self.index])
+            self.index += 1
+            if image is not None:
+                return {self.input_name: preprocess([image], self.imgsz)}
+        return None
+
+    def rewind(self):
+        self.index = 0
+
+
+def quantize(model_path, output_path, split_folder, imgsz=0, limit=300):
+    images_dir = f"{split_folder}/val/images"
+    if not os.path.exists(images_dir):
+        print(f"[ERRO] Pasta de calibração não encontrada: {images_dir}")
+        print(f"[INFO] Execute primeiro yolo_auto_train.py (split_data) para gerar os splits")
+        return False
+
+    # otimização + inferência de shapes recomendadas antes da quantização estática
+    prepared_path = output_path.replace('.onnx', '_prep.onnx')
+    quant_pre_process(model_path, prepared_path)
+
+    reader = SplitCalibrationReader(prepared_path, images_dir, imgsz, limit)
+    if not reader.paths:
+        print(f"[ERRO] Nenhuma imagem em {images_dir}")
+        return False
+
+    try:
+        quantize_static(
+            prepared_path,
+            output_path,
+            reader,
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            weight_type=QuantType.QInt8,
+            activation_type=QuantType.QUInt8,
+        )
+    finally:
+        if os.path.exists(prepared_path):
+            os.unlink(prepared_path)
+
+    fp32_mb = os.path.getsize(model_path) / (1024 * 1024)
+    int8_mb = os.path.getsize(output_path) / (1024 * 1024)
+    print(f"[OK] Modelo INT8 salvo em: {output_path} ({fp32_mb:.1f} MB -> {int8_mb:.1f} MB)")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quantização INT8 do classificador anti-spoofing')
+    parser.add_argument('--model', default='best.onnx', help='Modelo ONNX FP32 (gerado por yolo_export.py)')
+    parser.add_argument('--output', default='best_int8.onnx')
+    parser.add_argument('--split-folder', default=SPLIT_FOLDER)
+    parser.add_argument('--imgsz', type=int, default=0)
+    parser.add_argument('--calibration-images', type=int, default=300)
+    parser.add_argument('--max-drop', type=float, default=0.01,
+                        help='Queda máxima de acurácia aceita no split de teste')
+    parser.add_argument('--skip-eval', action='store_true', help='Não avaliar após quantizar')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"[ERRO] Modelo não encontrado: {args.model}")
+        print(f"[INFO] Execute primeiro: python yolo_export.py --model best.pt --format onnx")
+        exit(1)
+
+    if not quantize(args.model, args.output, args.split_folder, args.imgsz, args.calibration_images):
+        exit(1)
+
+    if args.skip_eval:
+        return
+
+    images, labels = load_split(args.split_folder, 'test')
+    if not images:
+        print("[AVISO] Split de teste vazio, avaliação pulada")
+        return
+
+    invert_classes = os.getenv("YOLO_INVERT_CLASSES", "true").lower() == "true"
+    results = [evaluate_model(m, images, labels, invert_classes, imgsz=args.imgsz) for m in (args.model, args.output)]
+
+    if not compare(results, args.max_drop):
+        print(f"[ERRO] Modelo INT8 reprovado no gate de acurácia; mantenha o modelo FP32 em produção")
+        exit(1)
+
+    print(f"\n[PRÓXIMO PASSO] Configure no .env:")
+    print(f"YOLO_MODEL_PATH={args.output}")
+
+
+if __name__ == "__main__":
+    main()